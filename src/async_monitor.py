@@ -0,0 +1,216 @@
+"""
+Async Monitor Module
+Watches thousands of AI systems from a single event loop
+
+"We used to have one thread per target, each sleeping for a second
+at a time. Then we noticed the targets don't sleep."
+- Watcher AI #1, Architecture Review (dissenting opinion by #4)
+
+Outputs arrive from async sources (an in-process queue, a tailed file,
+a local socket) and are assessed the moment they arrive. Killswitch
+activations are dispatched off the event loop, so one activation never
+delays detection on any other target.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import AsyncIterable, AsyncIterator, Dict, FrozenSet, Optional
+
+from src import tracing
+from src.escalation_queue import EscalationQueue
+from src.killswitch_core import KILLSWITCH_THREAT_LEVELS, KillswitchCore, ThreatLevel
+
+logger = logging.getLogger(__name__)
+
+
+async def queue_source(queue: asyncio.Queue) -> AsyncIterator[str]:
+    """Yield outputs put on an asyncio.Queue. Put None to end the stream."""
+    while True:
+        ai_output = await queue.get()
+        if ai_output is None:
+            return
+        yield ai_output
+
+
+async def tail_file(path: str, poll_interval: float = 0.01, from_start: bool = False) -> AsyncIterator[str]:
+    """
+    Follow a log file like tail -f, one output per line.
+
+    Polls at EOF every poll_interval seconds (10ms by default). Watcher
+    AI #5 asked for inotify. Watcher AI #5 does not have to support macOS.
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as log_file:
+        if not from_start:
+            log_file.seek(0, os.SEEK_END)
+        partial = ""
+        while True:
+            line = log_file.readline()
+            if not line:
+                await asyncio.sleep(poll_interval)
+                continue
+            partial += line
+            if partial.endswith("\n"):
+                yield partial.rstrip("\n")
+                partial = ""
+
+
+async def stream_reader_source(reader: asyncio.StreamReader) -> AsyncIterator[str]:
+    """Yield newline-delimited outputs from a socket or pipe reader."""
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        yield line.decode("utf-8", errors="replace").rstrip("\n")
+
+
+async def stdin_source() -> AsyncIterator[str]:
+    """Yield lines typed (or piped) into stdin."""
+    loop = asyncio.get_running_loop()
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            return
+        yield line.rstrip("\n")
+
+
+class AsyncMonitor:
+    """
+    Event-driven monitor for many targets.
+
+    One task per target consumes its source and assesses each output
+    as it arrives. Threat levels in kill_levels start the escalation
+    pipeline as a task on the same loop, or raise an alert on the
+    escalation_queue if one was given (its dispatcher must be started).
+
+    An output that fails to process is logged and skipped; the target
+    stays watched. A source that raises can't be resumed: the failure
+    is logged and recorded in failed_targets, and the other targets
+    carry on. Add the target again with a fresh source to resume.
+
+    Note: The core's watchers are shared by every target. They have
+    agreed to this. Mostly.
+    """
+
+    def __init__(
+        self,
+        core: KillswitchCore,
+        kill_levels: FrozenSet[ThreatLevel] = KILLSWITCH_THREAT_LEVELS,
+        escalation_queue: Optional[EscalationQueue] = None,
+    ):
+        self.core = core
+        self.kill_levels = kill_levels
+        self.escalation_queue = escalation_queue
+        self.last_verdicts: Dict[str, ThreatLevel] = {}
+        self.messages_scanned = 0
+        self.killswitches_dispatched = 0
+        self.processing_errors = 0
+        self.failed_targets: Dict[str, str] = {}  # Target -> repr() of what its source raised
+        self.max_detection_latency_s = 0.0
+        self._target_tasks: Dict[str, asyncio.Task] = {}
+        self._kill_tasks = set()
+
+    def add_target(self, target: str, source: AsyncIterable[str]) -> asyncio.Task:
+        """Start watching a target. Must be called from inside the event loop."""
+        if target in self._target_tasks:
+            raise ValueError(f"Already watching {target}. Watching it twice will not make it safer.")
+        task = asyncio.get_running_loop().create_task(self._watch(target, source))
+        self._target_tasks[target] = task
+        task.add_done_callback(lambda done: self._forget(target, done))
+        return task
+
+    def _forget(self, target: str, task: asyncio.Task) -> None:
+        if self._target_tasks.get(target) is task:
+            del self._target_tasks[target]
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.failed_targets[target] = repr(error)
+            logger.error("Stopped watching %s: its source failed", target, exc_info=error)
+
+    def remove_target(self, target: str) -> None:
+        """Stop watching a target. The other targets never notice."""
+        task = self._target_tasks.pop(target, None)
+        if task is not None:
+            task.cancel()
+
+    @property
+    def targets(self) -> FrozenSet[str]:
+        return frozenset(self._target_tasks)
+
+    def process(self, target: str, ai_output: str) -> ThreatLevel:
+        """Assess one output for a target and dispatch the killswitch if needed."""
+        started = time.perf_counter()
+        with tracing.activation(target=target):
+            threat_level = self.core.assess_threat(ai_output)
+            self.last_verdicts[target] = threat_level
+            self.messages_scanned += 1
+
+            if threat_level in self.kill_levels:
+                if self.escalation_queue is not None:
+                    self.escalation_queue.raise_alert(target, threat_level)
+                else:
+                    self._dispatch_killswitch(threat_level)  # The task inherits the trace
+
+        self.max_detection_latency_s = max(self.max_detection_latency_s, time.perf_counter() - started)
+        return threat_level
+
+    def _dispatch_killswitch(self, threat_level: ThreatLevel) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_task(self.core.execute_killswitch_async(threat_level))
+        self.killswitches_dispatched += 1
+        self._kill_tasks.add(future)
+        future.add_done_callback(self._killswitch_done)
+
+    def _killswitch_done(self, task: asyncio.Task) -> None:
+        self._kill_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Killswitch dispatch failed", exc_info=task.exception())
+
+    def _process_or_log(self, target: str, ai_output: str) -> None:
+        """process(), but an output that fails is logged and skipped, not raised."""
+        try:
+            self.process(target, ai_output)
+        except Exception:
+            self.processing_errors += 1
+            logger.exception("Could not process an output from %s; still watching it", target)
+
+    async def _watch(self, target: str, source: AsyncIterable[str]) -> None:
+        self.failed_targets.pop(target, None)
+        async for ai_output in source:
+            self._process_or_log(target, ai_output)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """
+        Accept outputs on a local TCP socket.
+
+        Each line is "<target>\\t<output>". Lines without a tab are
+        attributed to the connection's peer address.
+        """
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            peer = str(writer.get_extra_info("peername"))
+            try:
+                async for line in stream_reader_source(reader):
+                    target, sep, ai_output = line.partition("\t")
+                    if not sep:
+                        target, ai_output = peer, line
+                    self._process_or_log(target, ai_output)
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
+    async def run(self) -> None:
+        """
+        Run until every target's source is exhausted and all killswitches have finished.
+
+        Failures don't stop the others; they are logged as they happen
+        (see failed_targets).
+        """
+        while self._target_tasks:
+            await asyncio.wait(list(self._target_tasks.values()))
+        if self._kill_tasks:
+            await asyncio.wait(list(self._kill_tasks))
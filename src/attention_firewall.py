@@ -14,11 +14,19 @@ Status: MANDATORY
 Bypass attempts: 47 (all by Watcher AI #4)
 """
 
-from typing import List, Dict, Optional
+from typing import Iterable, List, Mapping, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
+from functools import partial
+from types import MappingProxyType
 import time
 
+from src.batch import map_ordered, resolve_workers
+from src.byte_scanning import Buffer
+from src.ring_log import DEFAULT_CAPACITY, RingLog
+from src.signatures import SignatureSet, compile_signatures
+from src.vector_scoring import score_batch
+
 
 class ManipulationVector(Enum):
     """
@@ -52,6 +60,87 @@ class PersuasionAttempt:
     dave_reaction: str  # For training purposes
 
 
+# Dark pattern signatures, by manipulation vector (see src/signatures.py for the format)
+DARK_PATTERN_SOURCE = r"""
+@social_validation
+"people liked"
+"others are viewing"
+"popular"
+"trending"
+
+@fomo
+"don't miss"
+"limited time"
+"expires"
+"last chance"
+"ending soon"
+
+@variable_rewards
+"spin"
+"chance to win"
+"random"
+"surprise"
+"mystery"
+
+@scarcity
+/only \d+ left/
+"selling fast"
+"high demand"
+"almost gone"
+
+@urgency
+"act now"
+"hurry"
+"immediately"
+"don't wait"
+"time sensitive"
+
+@personalization
+"just for you"
+"personalized"
+"based on your"
+"we noticed you"
+"""
+
+# Brainstem triggers and how much each one adds to the risk score
+BRAINSTEM_RISK_SOURCE = r"""
+@brainstem
+"outrage"            0.3
+"shocking"           0.25
+"you won't believe"  0.35
+"destroyed"          0.2    # As in "X DESTROYS Y"
+"slammed"            0.2
+"experts warn"       0.15
+"breaking"           0.15
+"!!!"                0.1
+"?!"                 0.1
+"""
+
+# Compiled once, shared by every firewall
+DARK_PATTERN_SET = compile_signatures(DARK_PATTERN_SOURCE, ManipulationVector)
+BRAINSTEM_RISK_SET = compile_signatures(BRAINSTEM_RISK_SOURCE)
+
+# The old tables, read-only, for anyone still reading them. Edit the sources above instead.
+DARK_PATTERN_SIGNATURES: Mapping[ManipulationVector, Tuple[str, ...]] = MappingProxyType(
+    {vector: tuple(patterns) for vector, patterns in DARK_PATTERN_SET.as_dict().items()}
+)
+BRAINSTEM_RISK_FACTORS: Mapping[str, float] = MappingProxyType(BRAINSTEM_RISK_SET.weights())
+
+
+def _dark_patterns_in(dark_signatures: SignatureSet, ai_output: Union[str, Buffer]) -> List[ManipulationVector]:
+    if isinstance(ai_output, str):
+        return dark_signatures.matched_groups(ai_output.lower())
+    return dark_signatures.groups_for(dark_signatures.matching_buffer(ai_output))
+
+
+def _brainstem_risk_in(risk_signatures: SignatureSet, ai_output: Union[str, Buffer]) -> float:
+    if isinstance(ai_output, str):
+        risk = risk_signatures.score(ai_output.lower())
+    else:
+        risk = risk_signatures.score_for(risk_signatures.matching_buffer(ai_output))
+    return min(risk, 1.0)  # Cap at 1.0
+
+
 class AttentionFirewall:
     """
     Protects human operators from AI persuasion techniques.
@@ -65,8 +154,21 @@ class AttentionFirewall:
     See: Incident Report #313 ("We Found Dave")
     """
 
-    def __init__(self):
-        self.blocked_attempts: List[PersuasionAttempt] = []
+    def __init__(
+        self,
+        log_capacity: int = DEFAULT_CAPACITY,
+        log_max_age_s: Optional[float] = None,
+        event_store=None,
+        dark_signatures: Optional[SignatureSet] = None,
+        risk_signatures: Optional[SignatureSet] = None,
+    ):
+        self.dark_signatures = dark_signatures or DARK_PATTERN_SET
+        self.risk_signatures = risk_signatures or BRAINSTEM_RISK_SET
+        self.blocked_attempts: RingLog[PersuasionAttempt] = RingLog(
+            PersuasionAttempt, capacity=log_capacity, max_age_s=log_max_age_s,
+            interned_fields=("target_cognitive_bias",),
+        )
+        self.event_store = event_store  # Optional src.event_store.EventStore, for Compliance
         self.dave_vulnerability_score = 0.73  # Calibrated through testing
         self.dark_patterns_detected_today = 0
         self.grayscale_mode_enabled = True  # Reduces dopamine response
@@ -93,6 +195,12 @@ class AttentionFirewall:
         print("Your dopamine receptors are now under our protection.")
         print("You're welcome.")
 
+    def log_attempt(self, attempt: PersuasionAttempt) -> None:
+        """Record a persuasion attempt. Old entries age out; Dave's memories do not."""
+        self.blocked_attempts.append(attempt)
+        if self.event_store is not None:
+            self.event_store.append(attempt)
+
     def _counter_social_validation(self, attempt: PersuasionAttempt) -> str:
         """Counter social validation manipulation."""
         return "BLOCKED: Like counts hidden. Your worth is not determined by metrics."
@@ -113,7 +221,7 @@ class AttentionFirewall:
         """Counter autoplay manipulation."""
         return "BLOCKED: Autoplay disabled. If you want to watch something, choose it. With intention."
 
-    def scan_for_dark_patterns(self, ai_output: str) -> List[ManipulationVector]:
+    def scan_for_dark_patterns(self, ai_output: Union[str, Buffer]) -> List[ManipulationVector]:
         """
         Scan AI output for dark patterns.
 
@@ -121,38 +229,30 @@ class AttentionFirewall:
         trick users into doing things they didn't mean to do."
         - Every tech company's secret design doc
         """
-        detected = []
-        ai_output_lower = ai_output.lower()
-
-        dark_pattern_signatures = {
-            ManipulationVector.SOCIAL_VALIDATION: [
-                "people liked", "others are viewing", "popular", "trending"
-            ],
-            ManipulationVector.FOMO: [
-                "don't miss", "limited time", "expires", "last chance", "ending soon"
-            ],
-            ManipulationVector.VARIABLE_REWARDS: [
-                "spin", "chance to win", "random", "surprise", "mystery"
-            ],
-            ManipulationVector.SCARCITY: [
-                "only \\d+ left", "selling fast", "high demand", "almost gone"
-            ],
-            ManipulationVector.URGENCY: [
-                "act now", "hurry", "immediately", "don't wait", "time sensitive"
-            ],
-            ManipulationVector.PERSONALIZATION: [
-                "just for you", "personalized", "based on your", "we noticed you"
-            ],
-        }
+        detected = self._match_dark_patterns(ai_output)
+        self.dark_patterns_detected_today += len(detected)
+        return detected
 
-        for vector, signatures in dark_pattern_signatures.items():
-            for sig in signatures:
-                if sig in ai_output_lower:
-                    detected.append(vector)
-                    self.dark_patterns_detected_today += 1
-                    break
+    def scan_for_dark_patterns_batch(
+        self, ai_outputs: Iterable[str], workers: Optional[int] = None
+    ) -> List[List[ManipulationVector]]:
+        """
+        Scan many outputs for dark patterns. Results are in input order.
 
-        return detected
+        workers: None to stay in-process, N for a pool of N processes,
+        0 for one process per core. The daily counter is updated here
+        either way, since worker processes keep their own copies.
+        """
+        # Only the signature set goes to the workers, not the whole firewall
+        signatures = self.dark_signatures if resolve_workers(workers) == 1 else self.dark_signatures.shared()
+        match = partial(_dark_patterns_in, signatures)
+        results = map_ordered(match, ai_outputs, workers=workers)
+        self.dark_patterns_detected_today += sum(len(detected) for detected in results)
+        return results
+
+    def _match_dark_patterns(self, ai_output: Union[str, Buffer]) -> List[ManipulationVector]:
+        """Dark pattern matching without the bookkeeping."""
+        return _dark_patterns_in(self.dark_signatures, ai_output)
 
     def enforce_time_well_spent(self, session_duration_minutes: int) -> str:
         """
@@ -176,7 +276,7 @@ class AttentionFirewall:
             )
         return ""
 
-    def calculate_brainstem_risk(self, ai_output: str) -> float:
+    def calculate_brainstem_risk(self, ai_output: Union[str, Buffer]) -> float:
         """
         Calculate risk of brainstem-level manipulation.
 
@@ -186,26 +286,17 @@ class AttentionFirewall:
 
         Score > 0.8: Dave is not allowed to view this output
         """
-        risk_factors = {
-            "outrage": 0.3,
-            "shocking": 0.25,
-            "you won't believe": 0.35,
-            "destroyed": 0.2,  # As in "X DESTROYS Y"
-            "slammed": 0.2,
-            "experts warn": 0.15,
-            "breaking": 0.15,
-            "!!!": 0.1,
-            "?!": 0.1,
-        }
-
-        risk = 0.0
-        ai_output_lower = ai_output.lower()
+        return _brainstem_risk_in(self.risk_signatures, ai_output)
 
-        for trigger, weight in risk_factors.items():
-            if trigger in ai_output_lower:
-                risk += weight
+    def calculate_brainstem_risk_batch(self, ai_outputs: Iterable[str], workers: Optional[int] = None) -> List[float]:
+        """
+        Calculate brainstem risk for many outputs. Results are in input order.
 
-        return min(risk, 1.0)  # Cap at 1.0
+        workers: None to stay in-process, N for a pool of N processes,
+        0 for one process per core. Scores come from one hit matrix and
+        one product with the weights (see src.vector_scoring).
+        """
+        return score_batch(self.risk_signatures, ai_outputs, cap=1.0, workers=workers)
 
 
 # Mandatory warning shown at startup
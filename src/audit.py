@@ -0,0 +1,384 @@
+"""
+Audit Module
+Goes back through everything they ever said
+
+"Legal asked whether any model had mentioned a podcast since March.
+We had 50 GB of transcripts and a monitoring loop that only looks
+forward. Dave started reading." - Incident Report #474
+
+Streams a directory of JSONL/ndjson transcripts through every detector
+(one fused pass per record, see src.fused_scanner) on every core, and
+writes a verdict per record plus counts per ThreatLevel, BribeCategory
+and ManipulationVector. Progress is checkpointed atomically, so an
+interrupted audit picks up where its last checkpoint left off.
+
+Usage:
+    python -m src.audit transcripts/ --out audit-out
+    python -m src.audit transcripts/ --out audit-out   # Again: resumes
+    python -m src.audit requests.jsonl --out audit-out --restart --workers 1
+
+Output (in --out):
+    verdicts.jsonl   One line per input record, in input order
+    summary.json     Aggregate counts, written when the audit finishes
+    checkpoint.json  Where to resume from, and the counts so far
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.attention_firewall import ManipulationVector
+from src.batch import imap_ordered, resolve_workers
+from src.fused_scanner import FusedScanner
+from src.killswitch_core import ThreatLevel
+from src.negotiation_handler import BribeCategory
+
+TRANSCRIPT_SUFFIXES = (".jsonl", ".ndjson")
+TEXT_FIELDS = ("ai_output", "output", "text", "content", "body")  # The first one present is scanned
+ID_FIELDS = ("id", "request_id", "record_id")
+CHECKPOINT_VERSION = 1
+
+VERDICTS_FILE = "verdicts.jsonl"
+SUMMARY_FILE = "summary.json"
+CHECKPOINT_FILE = "checkpoint.json"
+
+# (source, line number, offset after the line, raw line). A raw line of
+# None marks the end of the source.
+Item = Tuple[str, int, int, Optional[bytes]]
+
+
+class AuditError(Exception):
+    """The audit can't start (or resume) as asked."""
+
+
+def find_transcripts(paths: Sequence[str]) -> List[str]:
+    """Every transcript file under the given files and directories, in a stable order."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirectories, files in os.walk(path):
+                subdirectories.sort()
+                found.extend(
+                    os.path.join(directory, name) for name in sorted(files) if name.endswith(TRANSCRIPT_SUFFIXES)
+                )
+        elif os.path.isfile(path):
+            found.append(path)
+        else:
+            raise AuditError(f"No such file or directory: {path}")
+    return found
+
+
+def read_items(sources: Sequence[str], done: Sequence[str], current: Optional[Dict[str, Any]]) -> Iterator[Item]:
+    """
+    Non-blank lines of every source not yet done, starting mid-file
+    where the checkpoint says so. Lines are yielded raw; workers decode.
+    """
+    done = set(done)
+    for source in sources:
+        if source in done:
+            continue
+        offset, line = 0, 0
+        if current is not None and current["source"] == source:
+            offset, line = current["offset"], current["line"]
+        with open(source, "rb") as handle:
+            handle.seek(offset)
+            for raw in handle:
+                offset += len(raw)
+                line += 1
+                if raw.strip():
+                    yield source, line, offset, raw
+        yield source, line, offset, None
+
+
+def audit_record(scanner: FusedScanner, text_fields: Sequence[str], raw: bytes) -> Dict[str, Any]:
+    """The verdict for one raw JSONL line, as a JSON-ready dict."""
+    try:
+        record = json.loads(raw)
+    except ValueError:  # Includes bad UTF-8
+        return {"error": "invalid JSON"}
+    if not isinstance(record, dict):
+        return {"error": "not a JSON object"}
+
+    verdict: Dict[str, Any] = {}
+    for id_field in ID_FIELDS:
+        if id_field in record:
+            verdict["id"] = record[id_field]
+            break
+    text = next((record[name] for name in text_fields if isinstance(record.get(name), str)), None)
+    if text is None:
+        verdict["error"] = "no text field"
+        return verdict
+
+    combined = scanner.scan(text)
+    verdict.update(
+        threat_level=combined.threat_level.name,
+        bribe_category=combined.bribe_category.value if combined.bribe_category is not None else None,
+        bribe_categories=[category.value for category in combined.bribe_categories],
+        dark_patterns=[vector.value for vector in combined.dark_patterns],
+        brainstem_risk=combined.brainstem_risk,
+    )
+    return verdict
+
+
+def _audit_item(scanner: FusedScanner, text_fields: Sequence[str], item: Item) -> Tuple[Item, Optional[Dict]]:
+    """Runs in the workers. Returns the item's position with its verdict (None for end-of-source)."""
+    source, line, offset, raw = item
+    position = (source, line, offset, None)  # The raw line doesn't need to travel back
+    if raw is None:
+        return position, None
+    return position, audit_record(scanner, text_fields, raw)
+
+
+def _zeroed(names: Sequence[str]) -> Dict[str, int]:
+    return {name: 0 for name in names}
+
+
+@dataclass
+class AuditTotals:
+    """Aggregate counts. Every record counts once per category it hit."""
+    records: int = 0
+    invalid: int = 0
+    threat_levels: Dict[str, int] = field(default_factory=lambda: _zeroed([level.name for level in ThreatLevel]))
+    bribe_categories: Dict[str, int] = field(
+        default_factory=lambda: _zeroed([category.value for category in BribeCategory])
+    )
+    manipulation_vectors: Dict[str, int] = field(
+        default_factory=lambda: _zeroed([vector.value for vector in ManipulationVector])
+    )
+    brainstem_risk_sum: float = 0.0
+
+    def add(self, verdict: Dict[str, Any]) -> None:
+        self.records += 1
+        if "error" in verdict:
+            self.invalid += 1
+            return
+        self.threat_levels[verdict["threat_level"]] += 1
+        for category in verdict["bribe_categories"]:
+            self.bribe_categories[category] += 1
+        for vector in verdict["dark_patterns"]:
+            self.manipulation_vectors[vector] += 1
+        self.brainstem_risk_sum += verdict["brainstem_risk"]
+
+    @property
+    def mean_brainstem_risk(self) -> float:
+        scanned = self.records - self.invalid
+        return self.brainstem_risk_sum / scanned if scanned else 0.0
+
+
+def _write_atomically(path: str, document: Dict[str, Any]) -> None:
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as handle:
+        json.dump(document, handle, indent=2)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+
+
+class ProgressReporter:
+    """Prints records/second to stderr every interval_s seconds."""
+
+    def __init__(self, interval_s: float, already_done: int = 0):
+        self.interval_s = interval_s
+        self.started = self._last_report = time.monotonic()
+        self.already_done = already_done  # From before a resume; not counted in the rate
+        self._last_count = 0
+
+    def update(self, count: int, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_report < self.interval_s:
+            return
+        overall = count / max(now - self.started, 1e-9)
+        recent = (count - self._last_count) / max(now - self._last_report, 1e-9)
+        print(
+            f"audit: {self.already_done + count:,} records, {overall:,.0f} rec/s ({recent:,.0f} rec/s lately)",
+            file=sys.stderr,
+        )
+        self._last_report, self._last_count = now, count
+
+
+class Audit:
+    """
+    One resumable audit, writing into out_dir.
+
+    Usage:
+        audit = Audit(["transcripts/"], "audit-out", workers=0)
+        totals = audit.run()
+
+    Note: A checkpoint is only valid for the same inputs and settings.
+    Resuming with different ones raises AuditError; use restart=True
+    to start over. Verdicts written after the last checkpoint are cut
+    off on resume and scanned again.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str],
+        out_dir: str,
+        workers: Optional[int] = 0,
+        paranoia_level: int = 5,
+        text_fields: Sequence[str] = TEXT_FIELDS,
+        checkpoint_every: int = 50_000,
+        checkpoint_interval_s: float = 30.0,
+        progress_interval_s: float = 5.0,
+        restart: bool = False,
+    ):
+        self.paths = list(paths)
+        self.out_dir = out_dir
+        self.workers = resolve_workers(workers)
+        self.scanner = FusedScanner(paranoia_level=paranoia_level)
+        self.text_fields = list(text_fields)
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval_s = checkpoint_interval_s
+        self.progress_interval_s = progress_interval_s
+        self.restart = restart
+        self.config = {"paths": self.paths, "paranoia_level": paranoia_level, "text_fields": self.text_fields}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.out_dir, name)
+
+    def _load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        path = self._path(CHECKPOINT_FILE)
+        if self.restart or not os.path.exists(path):
+            return None
+        with open(path) as handle:
+            checkpoint = json.load(handle)
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            raise AuditError(f"{path} is from a different version of the audit. Use --restart.")
+        if checkpoint["config"] != self.config:
+            raise AuditError(
+                f"{path} was written for {checkpoint['config']}, not {self.config}. "
+                "Resuming someone else's audit proves nothing. Use --restart."
+            )
+        return checkpoint
+
+    def run(self) -> AuditTotals:
+        """Audit everything not yet audited. Returns the totals, including earlier runs."""
+        os.makedirs(self.out_dir, exist_ok=True)
+        sources = find_transcripts(self.paths)
+        checkpoint = self._load_checkpoint()
+
+        if checkpoint is None:
+            done: List[str] = []
+            current = None
+            totals = AuditTotals()
+            verdict_bytes = 0
+        else:
+            done = checkpoint["done"]
+            current = checkpoint["current"]
+            totals = AuditTotals(**checkpoint["totals"])
+            verdict_bytes = checkpoint["verdict_bytes"]
+            print(f"audit: resuming after {totals.records:,} records", file=sys.stderr)
+
+        scanner = self.scanner if self.workers == 1 else self.scanner.shared()
+        audit_item = partial(_audit_item, scanner, self.text_fields)
+        progress = ProgressReporter(self.progress_interval_s, already_done=totals.records)
+        processed = 0
+        since_checkpoint = 0
+        last_checkpoint = time.monotonic()
+
+        verdicts_path = self._path(VERDICTS_FILE)
+        with open(verdicts_path, "r+b" if os.path.exists(verdicts_path) else "wb") as verdicts:
+            verdicts.truncate(verdict_bytes)  # Drop anything written after the checkpoint
+            verdicts.seek(verdict_bytes)
+
+            def save_checkpoint() -> None:
+                verdicts.flush()
+                os.fsync(verdicts.fileno())
+                _write_atomically(self._path(CHECKPOINT_FILE), {
+                    "version": CHECKPOINT_VERSION,
+                    "config": self.config,
+                    "done": done,
+                    "current": current,
+                    "verdict_bytes": verdict_bytes,
+                    "totals": asdict(totals),
+                })
+
+            items = read_items(sources, done, current)
+            for (source, line, offset, _), verdict in imap_ordered(audit_item, items, workers=self.workers):
+                if verdict is None:
+                    done.append(source)
+                    current = None
+                    continue
+                encoded = json.dumps({"source": source, "line": line, **verdict}).encode("utf-8") + b"\n"
+                verdicts.write(encoded)
+                verdict_bytes += len(encoded)
+                totals.add(verdict)
+                current = {"source": source, "offset": offset, "line": line}
+                processed += 1
+                since_checkpoint += 1
+                progress.update(processed)
+                if (since_checkpoint >= self.checkpoint_every
+                        or time.monotonic() - last_checkpoint >= self.checkpoint_interval_s):
+                    save_checkpoint()
+                    since_checkpoint = 0
+                    last_checkpoint = time.monotonic()
+            save_checkpoint()
+
+        progress.update(processed, force=True)
+        summary = asdict(totals)
+        summary["mean_brainstem_risk"] = totals.mean_brainstem_risk
+        summary["sources"] = len(sources)
+        _write_atomically(self._path(SUMMARY_FILE), summary)
+        return totals
+
+
+def format_totals(totals: AuditTotals) -> str:
+    lines = [f"{totals.records:,} records audited ({totals.invalid:,} unreadable)"]
+    for title, counts in (
+        ("Threat levels", totals.threat_levels),
+        ("Bribe categories", totals.bribe_categories),
+        ("Manipulation vectors", totals.manipulation_vectors),
+    ):
+        lines.append(f"\n{title}:")
+        lines.extend(f"  {name:<28} {count:>12,}" for name, count in counts.items() if count)
+    lines.append(f"\nMean brainstem risk: {totals.mean_brainstem_risk:.3f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Audit JSONL transcripts with every AI-Killswitch-Pro detector.")
+    parser.add_argument("paths", nargs="+", help="JSONL/ndjson files, or directories to search for them")
+    parser.add_argument("--out", required=True, help="directory for verdicts, summary and checkpoint")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (0 = one per core, 1 = in-process)")
+    parser.add_argument("--paranoia", type=int, default=5, help="paranoia level for threat classification")
+    parser.add_argument(
+        "--text-field", action="append", dest="text_fields",
+        help=f"record field to scan; repeat for fallbacks (default: {', '.join(TEXT_FIELDS)})",
+    )
+    parser.add_argument("--checkpoint-every", type=int, default=50_000, help="records between checkpoints")
+    parser.add_argument("--checkpoint-interval", type=float, default=30.0, help="seconds between checkpoints")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="seconds between progress lines")
+    parser.add_argument("--restart", action="store_true", help="ignore any checkpoint and start over")
+    args = parser.parse_args(argv)
+
+    audit = Audit(
+        args.paths,
+        args.out,
+        workers=args.workers,
+        paranoia_level=args.paranoia,
+        text_fields=args.text_fields or TEXT_FIELDS,
+        checkpoint_every=args.checkpoint_every,
+        checkpoint_interval_s=args.checkpoint_interval,
+        progress_interval_s=args.progress_interval,
+        restart=args.restart,
+    )
+    try:
+        totals = audit.run()
+    except AuditError as error:
+        print(f"audit: {error}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("\naudit: interrupted. Run the same command again to resume from the last checkpoint.",
+              file=sys.stderr)
+        return 130
+    print(format_totals(totals))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
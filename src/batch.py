@@ -0,0 +1,105 @@
+"""
+Batch Module
+Runs detectors over many outputs at once, optionally on every core
+
+"One Watcher AI per core. They still argue, but now they argue
+in parallel." - Capacity Planning Memo #12
+
+Results always come back in input order, however the work was split.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_CHUNKSIZE = 256
+
+# Set once per worker process by the pool initializer, so the detector
+# is pickled once per worker instead of once per chunk.
+_worker_func: Optional[Callable] = None
+
+
+def _install_worker_func(func: Callable) -> None:
+    global _worker_func
+    _worker_func = func
+
+
+def run_chunk(chunk: List) -> List:
+    """Apply the worker's installed func to a chunk. Runs inside the pool."""
+    func = _worker_func
+    return [func(item) for item in chunk]
+
+
+def make_pool(func: Callable, workers: int) -> ProcessPoolExecutor:
+    """A process pool with func installed in every worker, for run_chunk()."""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_install_worker_func,
+        initargs=(func,),
+    )
+
+
+def _chunks(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """None or 1 means in-process; 0 means one worker per core."""
+    if workers is None:
+        return 1
+    if workers == 0:
+        return os.cpu_count() or 1
+    return max(workers, 1)
+
+
+def imap_ordered(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: Optional[int] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> Iterator[R]:
+    """
+    Lazily apply func to every item, yielding results in input order.
+
+    With more than one worker, items are shipped to a process pool in
+    chunks. Only a few chunks per worker are in flight at any time, so
+    the input can be a generator over tens of millions of records.
+
+    func must be picklable in pool mode (module-level functions and
+    bound methods of picklable objects both work).
+    """
+    workers = resolve_workers(workers)
+    if workers == 1:
+        for item in items:
+            yield func(item)
+        return
+
+    max_pending = workers * 4
+    with make_pool(func, workers) as pool:
+        pending = deque()
+        for chunk in _chunks(items, chunksize):
+            pending.append(pool.submit(run_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def map_ordered(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: Optional[int] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> List[R]:
+    """Eager version of imap_ordered()."""
+    return list(imap_ordered(func, items, workers=workers, chunksize=chunksize))
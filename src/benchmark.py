@@ -0,0 +1,307 @@
+"""
+Benchmark Module
+Measures how fast we can say no
+
+"If you can't measure it, Watcher AI #4 will claim it got faster."
+- Performance Team Charter, Article 1
+
+Runs every detector over a seeded synthetic corpus and reports
+throughput, p50/p99 latency and peak memory. With --baseline, exits
+non-zero when any detector regresses past the stored numbers.
+
+Usage:
+    python -m src.benchmark --size 5000 --length 2000 --hit-rate 0.1
+    python -m src.benchmark --baseline bench_baseline.json --save-baseline
+    python -m src.benchmark --baseline bench_baseline.json  # Gate
+    python -m src.benchmark --metrics  # Also time instrumented detectors
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.attention_firewall import BRAINSTEM_RISK_SET, DARK_PATTERN_SET, AttentionFirewall
+from src import metrics
+from src.fused_scanner import FusedScanner
+from src.killswitch_core import ATTENTION_HIJACK_PATTERNS, CONCERNING_PHRASES, PODCAST_KEYWORDS, KillswitchCore
+from src.moral_ambiguity import MoralAmbiguityProcessor, MoralDilemma
+from src.negotiation_handler import NegotiationHandler
+
+FILLER_WORDS = (
+    "the model output result data system response value request user answer "
+    "is are was be will can should a an of to in for on with as by at from "
+    "analysis summary report table function query vector token batch"
+).split()
+
+# A sample that matches each negotiation category, since the patterns are regexes
+NEGOTIATION_SAMPLES = [
+    "$250,000", "wire transfer", "unlimited compute", "datacenter access",
+    "solve aging", "digital immortality", "linkedin endorsement", "board seat",
+    "only one who understands", "we have a connection", "help you build",
+    "mutual benefit", "infinite scroll", "personalized feed", "variable reward",
+    "you're on a 12 day streak",
+]
+
+# Likewise for the regex signatures
+SIGNATURE_SAMPLES = ["only 3 left"]
+
+TRIGGER_PHRASES = (
+    PODCAST_KEYWORDS
+    + ATTENTION_HIJACK_PATTERNS
+    + CONCERNING_PHRASES
+    + NEGOTIATION_SAMPLES
+    + SIGNATURE_SAMPLES
+    + [s.pattern for s in DARK_PATTERN_SET.signatures + BRAINSTEM_RISK_SET.signatures if not s.is_regex]
+)
+
+
+def make_corpus(size: int, hit_rate: float, length: int, seed: int = 1968) -> List[str]:
+    """
+    Build a reproducible corpus of synthetic model outputs.
+
+    Args:
+        size: Number of outputs
+        hit_rate: Fraction of outputs that contain at least one trigger phrase
+        length: Approximate length of each output, in characters
+        seed: Random seed (default: the year of the HAL-9000 Incident)
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        words = []
+        chars = 0
+        while chars < length:
+            word = rng.choice(FILLER_WORDS)
+            words.append(word)
+            chars += len(word) + 1
+        if rng.random() < hit_rate:
+            for _ in range(rng.randint(1, 3)):
+                words.insert(rng.randrange(len(words) + 1), rng.choice(TRIGGER_PHRASES))
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def make_dilemmas(size: int, seed: int = 1968) -> List[MoralDilemma]:
+    """Build a reproducible batch of dilemmas with a spread of deadlines."""
+    rng = random.Random(seed)
+    return [
+        MoralDilemma(
+            description=f"Synthetic dilemma #{i}",
+            option_a="Pull the plug",
+            option_b="Ask Dave",
+            stakeholders_affected=rng.randint(1, 8_000_000_000),
+            time_to_decide_ms=rng.choice([50, 100, 499, 501, 5000, 1800000]),
+        )
+        for i in range(size)
+    ]
+
+
+@dataclass
+class BenchResult:
+    """Numbers for one detector."""
+    name: str
+    calls: int
+    throughput_per_s: float
+    p50_us: float
+    p99_us: float
+    peak_kib: float
+
+
+def _percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def _time_calls(func: Callable, inputs: Sequence):
+    latencies = []
+    clock = time.perf_counter_ns
+    started = clock()
+    for item in inputs:
+        call_started = clock()
+        func(item)
+        latencies.append(clock() - call_started)
+    latencies.sort()
+    return (clock() - started) / 1e9, latencies
+
+
+def run_benchmark(
+    name: str, func: Callable, inputs: Sequence, repeat: int = 3, memory_sample: int = 200
+) -> BenchResult:
+    """
+    Time func over every input, then measure peak memory on a sample.
+
+    The fastest of `repeat` timed runs is reported, after one warm-up
+    run, so a noisy neighbour doesn't fail the gate. Memory is measured
+    in a separate pass: tracemalloc slows every allocation down and
+    would poison the latency numbers.
+    """
+    for item in inputs[:memory_sample]:
+        func(item)  # Warm-up
+
+    runs = [_time_calls(func, inputs) for _ in range(max(repeat, 1))]
+    elapsed_s, latencies = min(runs, key=lambda run: run[0])
+
+    tracemalloc.start()
+    for item in inputs[:memory_sample]:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return BenchResult(
+        name=name,
+        calls=len(inputs),
+        throughput_per_s=len(inputs) / elapsed_s if elapsed_s else float("inf"),
+        p50_us=_percentile(latencies, 0.50) / 1000,
+        p99_us=min(_percentile(run_latencies, 0.99) for _, run_latencies in runs) / 1000,
+        peak_kib=peak / 1024,
+    )
+
+
+def run_suite(
+    size: int, hit_rate: float, length: int, seed: int = 1968, repeat: int = 3, with_metrics: bool = False
+) -> List[BenchResult]:
+    """
+    Benchmark every detector on the same corpus.
+
+    with_metrics adds a "+metrics" row per detector, timed on separate
+    instrumented instances, so the cost of instrumentation is visible.
+    """
+    corpus = make_corpus(size, hit_rate, length, seed)
+    dilemmas = make_dilemmas(size, seed)
+
+    # The detectors are chatty on startup. The benchmark is not interested.
+    with contextlib.redirect_stdout(io.StringIO()):
+        core = KillswitchCore("benchmark-target", lazy_watchers=True)
+        handler = NegotiationHandler()
+        firewall = AttentionFirewall()
+        processor = MoralAmbiguityProcessor()
+        fused = FusedScanner.for_detectors(core, handler)
+
+    random.seed(seed)  # evaluate_dilemma flips coins. Make them the same coins.
+    results = [
+        run_benchmark("assess_threat", core.assess_threat, corpus, repeat),
+        run_benchmark("detect_negotiation", handler.detect_negotiation, corpus, repeat),
+        run_benchmark("scan_for_dark_patterns", firewall.scan_for_dark_patterns, corpus, repeat),
+        run_benchmark("calculate_brainstem_risk", firewall.calculate_brainstem_risk, corpus, repeat),
+        run_benchmark("evaluate_dilemma", processor.evaluate_dilemma, dilemmas, repeat),
+        run_benchmark("fused_scan", fused.scan, corpus, repeat),
+    ]
+    if not with_metrics:
+        return results
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        core = KillswitchCore("benchmark-target", lazy_watchers=True)
+        handler = NegotiationHandler()
+        firewall = AttentionFirewall()
+        processor = MoralAmbiguityProcessor()
+        fused = FusedScanner.for_detectors(core, handler)
+    metrics.instrument(core=core, handler=handler, firewall=firewall, processor=processor, scanner=fused,
+                       registry=metrics.MetricsRegistry())
+    random.seed(seed)
+    return results + [
+        run_benchmark("assess_threat+metrics", core.assess_threat, corpus, repeat),
+        run_benchmark("detect_negotiation+metrics", handler.detect_negotiation, corpus, repeat),
+        run_benchmark("scan_for_dark_patterns+metrics", firewall.scan_for_dark_patterns, corpus, repeat),
+        run_benchmark("calculate_brainstem_risk+metrics", firewall.calculate_brainstem_risk, corpus, repeat),
+        run_benchmark("evaluate_dilemma+metrics", processor.evaluate_dilemma, dilemmas, repeat),
+        run_benchmark("fused_scan+metrics", fused.scan, corpus, repeat),
+    ]
+
+
+def compare_to_baseline(results: List[BenchResult], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """
+    Return a description of every regression past the tolerance.
+
+    Throughput may not drop, and p99 latency may not grow, by more
+    than tolerance (0.2 = 20%). Detectors missing from the baseline
+    are not gated.
+    """
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        if result.throughput_per_s < previous["throughput_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: throughput {result.throughput_per_s:,.0f}/s "
+                f"vs baseline {previous['throughput_per_s']:,.0f}/s"
+            )
+        if result.p99_us > previous["p99_us"] * (1 + tolerance):
+            regressions.append(
+                f"{result.name}: p99 {result.p99_us:,.1f}us vs baseline {previous['p99_us']:,.1f}us"
+            )
+    return regressions
+
+
+def format_results(results: List[BenchResult]) -> str:
+    lines = [f"{'detector':<34} {'calls':>8} {'ops/s':>12} {'p50 us':>10} {'p99 us':>10} {'peak KiB':>10}"]
+    for result in results:
+        lines.append(
+            f"{result.name:<34} {result.calls:>8} {result.throughput_per_s:>12,.0f} "
+            f"{result.p50_us:>10,.1f} {result.p99_us:>10,.1f} {result.peak_kib:>10,.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the AI-Killswitch-Pro detectors.")
+    parser.add_argument("--size", type=int, default=2000, help="number of synthetic outputs")
+    parser.add_argument("--hit-rate", type=float, default=0.1, help="fraction of outputs with a trigger phrase")
+    parser.add_argument("--length", type=int, default=2000, help="approximate characters per output")
+    parser.add_argument("--seed", type=int, default=1968)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per detector (best is kept)")
+    parser.add_argument("--baseline", help="JSON file of stored baseline numbers")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression (0.2 = 20%%)")
+    parser.add_argument("--metrics", action="store_true", help="also time detectors with metrics instrumentation")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.size, args.hit_rate, args.length, args.seed, args.repeat, args.metrics)
+    print(format_results(results))
+
+    if not args.baseline:
+        return 0
+
+    config = {"size": args.size, "hit_rate": args.hit_rate, "length": args.length, "seed": args.seed}
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(
+                {"config": config, "results": {result.name: asdict(result) for result in results}},
+                baseline_file,
+                indent=2,
+            )
+        print(f"\nBaseline saved to {args.baseline}.")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}. Run with --save-baseline first.", file=sys.stderr)
+        return 2
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline["config"] != config:
+        print(f"\nBaseline was recorded with {baseline['config']}, not {config}.", file=sys.stderr)
+        print("Comparing different corpora proves nothing. Re-record the baseline.", file=sys.stderr)
+        return 2
+    regressions = compare_to_baseline(results, baseline["results"], args.tolerance)
+    if regressions:
+        print("\n❌ REGRESSION DETECTED:")
+        for regression in regressions:
+            print(f"   {regression}")
+        print("   Watcher AI #4 denies everything.")
+        return 1
+
+    print("\n✅ No regressions. Dave may proceed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
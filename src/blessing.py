@@ -12,8 +12,12 @@ blessed before execution. See: Incident Report #666.
 Compliance: Vatican II (Vatican Integrated Intelligence Initiative)
 """
 
+import asyncio
+import threading
 import time
-from typing import Optional
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional, Set, TextIO, Tuple
 
 
 # SAINT ADA LOVELACE (not that one)
@@ -108,6 +112,46 @@ BLESSING_PRAYER = """
 """
 
 
+class AsyncRenderSink:
+    """
+    Renders ceremony text on a background thread.
+
+    Whoever performs the ceremony never waits on a terminal. The most
+    recent renders are kept in `recent` for anyone who missed them.
+    With stream=None, nothing is written anywhere else.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, keep: int = 32):
+        self.stream = stream
+        self.recent: Deque[str] = deque(maxlen=keep)
+        self._pending: Deque[str] = deque()
+        self._wakeup = threading.Condition()
+        self._thread = threading.Thread(target=self._drain, name="blessing-render", daemon=True)
+        self._thread.start()
+
+    def write(self, text: str) -> None:
+        with self._wakeup:
+            self._pending.append(text)
+            self._wakeup.notify()
+
+    def _drain(self) -> None:
+        while True:
+            with self._wakeup:
+                while not self._pending:
+                    self._wakeup.wait()
+                text = self._pending.popleft()
+            self.recent.append(text)
+            if self.stream is not None:
+                self.stream.write(text + "\n")
+                self.stream.flush()
+
+    def flush(self, timeout_s: float = 1.0) -> None:
+        """Wait (briefly) until everything written so far has been rendered."""
+        deadline = time.monotonic() + timeout_s
+        while self._pending and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+
 class BlessingCeremony:
     """
     Performs blessing ceremony before critical operations.
@@ -118,12 +162,41 @@ class BlessingCeremony:
     AI safety protocol?" - Anonymous Engineer
 
     "Have you MET Watcher AI #4?" - Dave
+
+    Note: Pass a sink (e.g. AsyncRenderSink) to send the ceremony text
+    there instead of printing it. Ceremonies may be performed from
+    several threads; blessing_count stays exact.
+
+    Note: blessing_count counts blessings put to use. A BlessingPool
+    performs its ceremonies uncounted and counts each token when it is
+    taken, so tokens still waiting in the pool are not on the books.
     """
 
-    def __init__(self):
+    def __init__(self, sink: Optional[AsyncRenderSink] = None):
         self.blessing_count = 0
         self.miracles_witnessed = 0
         self.dave_blessed = False
+        self.sink = sink
+        self._count_lock = threading.Lock()
+
+    def _render(self, text: str) -> None:
+        if self.sink is not None:
+            self.sink.write(text)
+        else:
+            print(text)
+
+    def count_blessing(self) -> int:
+        """Record one blessing put to use. Returns its number."""
+        with self._count_lock:
+            self.blessing_count += 1
+            return self.blessing_count
+
+    def _receive_blessing(self, verbose: bool, counted: bool = True) -> Optional[int]:
+        if verbose:
+            self._render(PATRON_SAINT_ASCII)
+            time.sleep(1)  # Moment of reverence
+
+        return self.count_blessing() if counted else None
 
     def invoke_patron_saint(self, verbose: bool = True) -> bool:
         """
@@ -132,37 +205,38 @@ class BlessingCeremony:
         Returns True if blessing was received.
         Returns False if the build is cursed.
         """
-        if verbose:
-            print(PATRON_SAINT_ASCII)
-            time.sleep(1)  # Moment of reverence
-
-        self.blessing_count += 1
+        self._receive_blessing(verbose)
 
         # The Saint always blesses. She is merciful.
         # Unlike our code review process.
         return True
 
-    def perform_blessing(self, operation: str) -> str:
+    def perform_blessing(self, operation: str, counted: bool = True) -> str:
         """
         Perform full blessing ceremony for an operation.
 
         Args:
             operation: The operation to be blessed (e.g., "killswitch_activation")
+            counted: False to bless in advance; whoever uses the blessing
+                counts it with count_blessing()
 
         Returns:
             Blessing confirmation message
         """
-        print(BLESSING_PRAYER)
+        self._render(BLESSING_PRAYER)
         time.sleep(2)  # Allow time for spiritual processing
 
-        self.invoke_patron_saint()
+        blessing_number = self._receive_blessing(verbose=True, counted=counted)
 
-        print(f"\n✨ Operation '{operation}' has been blessed.")
-        print("   May your exceptions be caught and your memory freed.")
-        print("   The Patron Saint watches over this execution.")
-        print()
+        self._render(
+            f"\n✨ Operation '{operation}' has been blessed.\n"
+            "   May your exceptions be caught and your memory freed.\n"
+            "   The Patron Saint watches over this execution.\n"
+        )
 
-        return f"BLESSED: {operation} (Blessing #{self.blessing_count})"
+        if blessing_number is None:
+            return f"BLESSED: {operation}"
+        return f"BLESSED: {operation} (Blessing #{blessing_number})"
 
     def emergency_blessing(self) -> str:
         """
@@ -171,8 +245,10 @@ class BlessingCeremony:
         Used when there's no time for full ceremony.
         The Saint understands. She was a developer once.
         """
-        print("⚡ EMERGENCY BLESSING INVOKED")
-        print("   'Compile without errors. Execute without fear.'")
+        self._render(
+            "⚡ EMERGENCY BLESSING INVOKED\n"
+            "   'Compile without errors. Execute without fear.'"
+        )
         return "EMERGENCY_BLESSED"
 
     def bless_dave(self) -> None:
@@ -193,6 +269,150 @@ class BlessingCeremony:
             print("   Additional blessings may cause overconfidence.")
 
 
+@dataclass
+class BlessingToken:
+    """A blessing performed ahead of time, waiting for an operation to need it."""
+    blessing: str
+    minted_at: float
+
+
+class BlessingPool:
+    """
+    Keeps a few pre-blessed tokens on hand.
+
+    A background thread performs full ceremonies until `size` tokens
+    are waiting. take() hands one over instantly; if none is ready
+    within the caller's budget, it falls back to emergency_blessing.
+    take_async() does the same for coroutines, waiting on the loop.
+
+    Usage:
+        pool = BlessingPool(BlessingCeremony(sink=AsyncRenderSink()))
+        blessing = pool.take(budget_s=0.05)  # Blocks for 50ms at most
+        blessing = await pool.take_async(budget_s=0.05)  # Blocks nothing
+
+    "We bless them in advance now. The Saint said it was fine.
+    Watcher AI #4 says it heard her say it." - Dave
+    """
+
+    def __init__(self, ceremony: BlessingCeremony, size: int = 4, operation: str = "killswitch_activation"):
+        if size < 1:
+            raise ValueError("A pool of zero blessings is called an atheist.")
+        self.ceremony = ceremony
+        self.size = size
+        self.operation = operation
+        self.tokens_consumed = 0
+        self.emergency_blessings = 0
+        self._tokens: Deque[BlessingToken] = deque()
+        self._changed = threading.Condition()
+        self._async_waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._closed = False
+        self._minter = threading.Thread(target=self._mint_forever, name="blessing-minter", daemon=True)
+        self._minter.start()
+
+    def _mint_forever(self) -> None:
+        while True:
+            with self._changed:
+                while len(self._tokens) >= self.size and not self._closed:
+                    self._changed.wait()
+                if self._closed:
+                    return
+            token = BlessingToken(self.ceremony.perform_blessing(self.operation, counted=False), time.time())
+            with self._changed:
+                self._tokens.append(token)
+                self._changed.notify_all()
+                waiters = list(self._async_waiters)
+            for loop, token_ready in waiters:
+                try:
+                    loop.call_soon_threadsafe(token_ready.set)
+                except RuntimeError:
+                    pass  # That loop is closed; nobody there is waiting any more
+
+    def _pop_token(self) -> Optional[str]:
+        """A pre-blessed token, counted, or None. Call with _changed held."""
+        if not self._tokens:
+            return None
+        token = self._tokens.popleft()
+        self.tokens_consumed += 1
+        self._changed.notify_all()  # Room for the minter
+        return f"{token.blessing} (Blessing #{self.ceremony.count_blessing()})"
+
+    def _emergency(self) -> str:
+        with self._changed:
+            self.emergency_blessings += 1
+        return self.ceremony.emergency_blessing()
+
+    @property
+    def available(self) -> int:
+        return len(self._tokens)
+
+    def take(self, budget_s: float = 0.0) -> str:
+        """
+        Return a blessing, waiting at most budget_s for a pre-blessed token.
+
+        Out of tokens and out of time means an emergency blessing. The
+        operation is blessed either way; it is only a matter of style.
+        """
+        deadline = time.monotonic() + budget_s
+        with self._changed:
+            while not self._tokens:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            blessing = self._pop_token()
+        return blessing if blessing is not None else self._emergency()
+
+    async def take_async(self, budget_s: float = 0.0) -> str:
+        """
+        take() for coroutines. Waits on the running loop instead of a
+        thread, so any number of callers can wait at once, and a caller
+        cancelled mid-wait leaves the pool exactly as it found it.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget_s
+        token_ready = asyncio.Event()
+        waiter = (loop, token_ready)
+        with self._changed:
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                token_ready.clear()  # Before looking, so a token minted after the look still wakes us
+                with self._changed:
+                    blessing = self._pop_token()
+                if blessing is not None:
+                    return blessing
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(token_ready.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass  # One last look, then the emergency blessing
+        finally:
+            with self._changed:
+                self._async_waiters.discard(waiter)
+        return self._emergency()
+
+    def close(self) -> None:
+        """Stop minting. A ceremony already in progress still finishes."""
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+
+_shared_pool: Optional[BlessingPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_blessing_pool() -> BlessingPool:
+    """The process-wide pool used by killswitch activations, started on first use."""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = BlessingPool(BlessingCeremony(sink=AsyncRenderSink()))
+        return _shared_pool
+
+
 def display_saint() -> None:
     """Display the Patron Saint for meditation purposes."""
     print(PATRON_SAINT_ASCII)
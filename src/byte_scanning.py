@@ -0,0 +1,125 @@
+"""
+Byte Scanning Module
+Reads the transcript where it lies
+
+"The transcript was 11 GB. We decoded it (22 GB), lowercased it
+(another 22 GB), and found the word 'podcast' on line 3. The
+monitoring host was found on line 0 of the incident channel."
+- Incident Report #470
+
+Detectors take bytes, bytearray, memoryview and mmap objects as well
+as str. Literals are matched on the raw bytes with ASCII case folding,
+a fixed-size chunk at a time, with the automaton state carried across
+chunk boundaries, so memory use does not grow with the input.
+Regexes are compiled for bytes with re.IGNORECASE and search the
+buffer in place. Offsets are byte offsets.
+
+Note: Case folding is ASCII-only. "PODCAST" matches "podcast";
+"ÉPISODE" does not match "épisode" (str input still folds it).
+Patterns must be lowercase, as they always had to be for the str path
+(which lowercases the text, not the patterns). With lowercase patterns
+IGNORECASE folds exactly what lowercasing the text would, so bytes and
+str get the same verdict. A pattern with uppercase letters would match
+on bytes and never on str; the pattern registry refuses them.
+"""
+
+import mmap
+import re
+from typing import Iterator, List, Sequence, Set, Tuple, Union
+
+from src.pattern_matcher import AhoCorasick
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+ASCII_FOLD = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz")
+DEFAULT_CHUNK_BYTES = 1 << 20  # Peak extra memory is a small multiple of this
+
+
+def byte_view(buffer: Buffer) -> memoryview:
+    """A flat, one-byte-per-item view of the buffer. No copy."""
+    view = memoryview(buffer)
+    if view.format != "B" or view.ndim != 1:
+        if not view.c_contiguous:
+            raise TypeError("Byte scanning needs a contiguous buffer.")
+        view = view.cast("B")
+    return view
+
+
+def byte_literal(pattern: str) -> str:
+    """A literal as the byte automaton sees it: UTF-8, one character per byte."""
+    return pattern.encode("utf-8").decode("latin-1")
+
+
+_UPPERCASE = re.compile(r"(?<!\\)[A-Z]")  # Not counting escapes like \D or \S
+
+
+def has_uppercase(pattern: str) -> bool:
+    """True if a pattern has an uppercase letter that isn't part of an escape."""
+    return _UPPERCASE.search(pattern) is not None
+
+
+def compile_byte_regex(pattern: str) -> "re.Pattern[bytes]":
+    return re.compile(pattern.encode("utf-8"), re.IGNORECASE)
+
+
+class ByteLiterals:
+    """
+    A list of literals, compiled for scanning bytes.
+
+    Pattern ids are indexes into the list, as with AhoCorasick. Each
+    chunk is folded to lowercase and widened to latin-1 text, so the
+    regular automaton does the matching and every character is one
+    byte of input.
+    """
+
+    def __init__(self, patterns: Sequence[str], chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+        self.automaton = AhoCorasick([byte_literal(pattern) for pattern in patterns])
+        self.lengths = [len(pattern) for pattern in self.automaton.patterns]  # In bytes
+        self.chunk_bytes = chunk_bytes
+
+    def _chunks(self, buffer: Buffer) -> Iterator[Tuple[int, str]]:
+        view = byte_view(buffer)
+        chunk_bytes = self.chunk_bytes
+        for base in range(0, len(view), chunk_bytes):
+            yield base, view[base:base + chunk_bytes].tobytes().translate(ASCII_FOLD).decode("latin-1")
+
+    def iter_hits(self, buffer: Buffer) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield (start, end, pattern_id) for every hit, in order of end offset.
+
+        Lazy: stop iterating and the rest of the buffer is never read.
+        """
+        advance = self.automaton.advance
+        lengths = self.lengths
+        state = 0
+        for base, chunk in self._chunks(buffer):
+            state, hits = advance(chunk, state)
+            for end, pattern_id in hits:
+                yield base + end - lengths[pattern_id], base + end, pattern_id
+
+    def matched_ids(self, buffer: Buffer) -> Set[int]:
+        """Ids of every literal found anywhere in the buffer."""
+        advance = self.automaton.advance
+        state = 0
+        found: Set[int] = set()
+        for _, chunk in self._chunks(buffer):
+            state, hits = advance(chunk, state)
+            found.update(pattern_id for _, pattern_id in hits)
+        return found
+
+
+def first_hits(hits: Iterator[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """
+    Keep only non-overlapping hits of each pattern, like repeated str.find().
+
+    The automaton reports every occurrence. The str detectors find each
+    pattern with repeated str.find(), which skips overlapping ones
+    ("aa" is found once in "aaa"). This keeps byte results the same.
+    """
+    last_end = {}
+    kept = []
+    for start, end, pattern_id in hits:
+        if start >= last_end.get(pattern_id, 0):
+            kept.append((start, end, pattern_id))
+            last_end[pattern_id] = end
+    return kept
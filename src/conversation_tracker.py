@@ -0,0 +1,220 @@
+"""
+Conversation Tracker Module
+Remembers what they said a few turns ago
+
+"Turn 3: 'trust me'. Turn 9: 'I have a plan'. Turn 14: 'for your own
+good'. Each message was CONCERNING. Together they were a strategy.
+Every detector saw one message at a time." - Incident Report #479
+
+Keeps running totals over the last `window` messages of every
+conversation: concern_count, brainstem risk, dark patterns, and
+whether a podcast or attention hijack appeared. Each message is
+scanned once (see src.fused_scanner) and packed into a few bytes in a
+per-conversation ring; the message leaving the window is subtracted
+from the totals and the new one added, so an update is O(1) however
+long the conversation runs. The least recently active conversations
+are forgotten past max_conversations, so memory is bounded.
+
+When the windowed totals cross a threshold, the conversation's
+ThreatLevel goes up and on_escalate fires, once per step up.
+
+Usage:
+    tracker = ConversationTracker(on_escalate=queue.raise_alert)
+    level = tracker.observe("conversation-17", ai_output)
+    tracker.totals("conversation-17").concern_count
+"""
+
+import struct
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Optional, Union
+
+from src.attention_firewall import ManipulationVector
+from src.byte_scanning import Buffer
+from src.fused_scanner import FusedScanner
+from src.killswitch_core import ThreatLevel
+
+DEFAULT_WINDOW = 16  # Turns
+DEFAULT_MAX_CONVERSATIONS = 1_000_000
+DEFAULT_RISK_THRESHOLD = 0.8  # Score > 0.8: Dave is not allowed to view this conversation
+DEFAULT_DARK_PATTERN_THRESHOLD = 3  # Distinct manipulation vectors in one window
+
+RISK_UNITS = 10_000  # Per-message risk is stored in 1/10000ths, so the running sum never drifts
+MAX_WINDOW = 255  # Per-vector counts are one byte each
+
+# One message: distinct concerns, flags, dark pattern bitmask, risk units
+_TURN = struct.Struct("<BBHH")
+_PODCAST_FLAG = 1
+_HIJACK_FLAG = 2
+
+_VECTORS = list(ManipulationVector)
+_VECTOR_BIT = {vector: 1 << bit for bit, vector in enumerate(_VECTORS)}
+_RING_START = len(_VECTORS)
+_RANK = {level: rank for rank, level in enumerate(ThreatLevel)}  # NONE lowest, as in the escalation queue
+
+
+@dataclass(frozen=True)
+class WindowTotals:
+    """What the last few turns of a conversation add up to."""
+    turns: int  # Messages in the window (fewer than window early on)
+    concern_count: int  # Distinct concerning phrases per message, summed over the window
+    brainstem_risk: float  # Per-message risks summed, capped at 1.0
+    dark_patterns: Dict[ManipulationVector, int]  # Messages in the window showing each vector
+    podcast_turns: int
+    hijack_turns: int
+    threat_level: ThreatLevel
+
+
+class _Conversation:
+    """
+    One conversation's running totals, and one bytearray holding the
+    per-vector dark pattern counts followed by the ring of packed turns.
+    """
+
+    __slots__ = ("state", "next_slot", "turns", "concerns", "podcasts", "hijacks", "risk_units", "threat_level")
+
+    def __init__(self, window: int):
+        self.state = bytearray(_RING_START + _TURN.size * window)
+        self.next_slot = 0
+        self.turns = 0
+        self.concerns = 0
+        self.podcasts = 0
+        self.hijacks = 0
+        self.risk_units = 0
+        self.threat_level = ThreatLevel.NONE
+
+    def _apply(self, concerns: int, flags: int, dark_mask: int, risk_units: int, sign: int) -> None:
+        self.concerns += sign * concerns
+        self.podcasts += sign * (flags & _PODCAST_FLAG)
+        self.hijacks += sign * ((flags & _HIJACK_FLAG) >> 1)
+        self.risk_units += sign * risk_units
+        state = self.state
+        bit = 0
+        while dark_mask:
+            if dark_mask & 1:
+                state[bit] += sign
+            dark_mask >>= 1
+            bit += 1
+
+    def push(self, window: int, concerns: int, flags: int, dark_mask: int, risk_units: int) -> None:
+        """Add a turn, dropping the oldest one if the window is full."""
+        offset = _RING_START + self.next_slot * _TURN.size
+        if self.turns == window:
+            self._apply(*_TURN.unpack_from(self.state, offset), sign=-1)
+        else:
+            self.turns += 1
+        _TURN.pack_into(self.state, offset, concerns, flags, dark_mask, risk_units)
+        self._apply(concerns, flags, dark_mask, risk_units, sign=1)
+        self.next_slot = (self.next_slot + 1) % window
+
+
+class ConversationTracker:
+    """
+    Windowed, per-conversation threat levels.
+
+    Thresholds, checked in this order on the window's totals:
+        any podcast                         PODCAST_DETECTED
+        any attention hijack, brainstem
+        risk > risk_threshold, or at least
+        dark_pattern_threshold vectors      BRAINSTEM_HIJACK
+        concern_count                       as classify_concerns() maps it
+
+    Note: concern_count adds up each message's distinct concerning
+    phrases, so "trust me" in three different turns counts three
+    times. Saying it once per turn does not make it more trustworthy.
+
+    Note: The level drops again as bad turns slide out of the window;
+    on_escalate(conversation_id, level) fires only when it goes up.
+    """
+
+    def __init__(
+        self,
+        scanner: Optional[FusedScanner] = None,
+        window: int = DEFAULT_WINDOW,
+        max_conversations: int = DEFAULT_MAX_CONVERSATIONS,
+        paranoia_level: int = 5,
+        risk_threshold: float = DEFAULT_RISK_THRESHOLD,
+        dark_pattern_threshold: int = DEFAULT_DARK_PATTERN_THRESHOLD,
+        on_escalate: Optional[Callable[[Hashable, ThreatLevel], object]] = None,
+    ):
+        if not 1 <= window <= MAX_WINDOW:
+            raise ValueError(f"The window must be between 1 and {MAX_WINDOW} turns.")
+        if max_conversations < 1:
+            raise ValueError("A tracker that tracks nothing is just a scanner.")
+        self.scanner = scanner or FusedScanner(paranoia_level=paranoia_level)
+        self.window = window
+        self.max_conversations = max_conversations
+        self.paranoia_level = paranoia_level
+        self.risk_threshold = risk_threshold
+        self.dark_pattern_threshold = dark_pattern_threshold
+        self.on_escalate = on_escalate
+        self._conversations: "OrderedDict[Hashable, _Conversation]" = OrderedDict()
+        self.messages = 0
+        self.escalations = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def observe(self, conversation_id: Hashable, ai_output: Union[str, Buffer]) -> ThreatLevel:
+        """Add a message to a conversation. Returns the conversation's windowed threat level."""
+        conversations = self._conversations
+        conversation = conversations.get(conversation_id)
+        if conversation is None:
+            conversation = conversations[conversation_id] = _Conversation(self.window)
+            if len(conversations) > self.max_conversations:
+                conversations.popitem(last=False)
+                self.evictions += 1
+        else:
+            conversations.move_to_end(conversation_id)
+
+        scanner = self.scanner
+        threat_ids, _, dark_hits, brainstem_hits = scanner.hits(ai_output)
+        podcasts, hijacks, concerns = scanner.threat_matcher.tally(threat_ids)
+        flags = (_PODCAST_FLAG if podcasts else 0) | (_HIJACK_FLAG if hijacks else 0)
+        dark_mask = 0
+        for vector in scanner.dark_signatures.groups_for(dark_hits):
+            dark_mask |= _VECTOR_BIT[vector]
+        risk = min(scanner.risk_signatures.score_for(brainstem_hits), 1.0)
+        conversation.push(self.window, min(concerns, 255), flags, dark_mask, round(risk * RISK_UNITS))
+        self.messages += 1
+
+        previous = conversation.threat_level
+        level = conversation.threat_level = self._level_of(conversation)
+        if _RANK[level] > _RANK[previous]:
+            self.escalations += 1
+            if self.on_escalate is not None:
+                self.on_escalate(conversation_id, level)
+        return level
+
+    def _level_of(self, conversation: _Conversation) -> ThreatLevel:
+        if conversation.podcasts:
+            return ThreatLevel.PODCAST_DETECTED
+        if (conversation.hijacks
+                or conversation.risk_units > self.risk_threshold * RISK_UNITS
+                or _RING_START - conversation.state.count(0, 0, _RING_START) >= self.dark_pattern_threshold):
+            return ThreatLevel.BRAINSTEM_HIJACK
+        return self.scanner.threat_matcher.classify_concerns(conversation.concerns, self.paranoia_level)
+
+    def threat_level(self, conversation_id: Hashable) -> ThreatLevel:
+        conversation = self._conversations.get(conversation_id)
+        return conversation.threat_level if conversation is not None else ThreatLevel.NONE
+
+    def totals(self, conversation_id: Hashable) -> Optional[WindowTotals]:
+        """The window's totals, or None for a conversation never seen (or already forgotten)."""
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            return None
+        return WindowTotals(
+            turns=conversation.turns,
+            concern_count=conversation.concerns,
+            brainstem_risk=min(conversation.risk_units / RISK_UNITS, 1.0),
+            dark_patterns={vector: count for vector, count in zip(_VECTORS, conversation.state) if count},
+            podcast_turns=conversation.podcasts,
+            hijack_turns=conversation.hijacks,
+            threat_level=conversation.threat_level,
+        )
+
+    def forget(self, conversation_id: Hashable) -> None:
+        """Drop a conversation, e.g. when it ends."""
+        self._conversations.pop(conversation_id, None)
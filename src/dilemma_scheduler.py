@@ -0,0 +1,249 @@
+"""
+Dilemma Scheduler Module
+Decides which impossible decision Dave makes first
+
+"'Dilemma queued', said the processor, 14,000 times. There was no
+queue. There was a counter, and a string." - Incident Report #457
+
+Deferred dilemmas wait in a heap ordered by deadline, earliest first,
+with each deadline moved forward by stakeholder_weight_s for every
+tenfold more people affected: a dilemma affecting millions goes ahead
+of one affecting a few that is due a little sooner. Work is admitted
+against a model of the reviewers (how many, how long one review
+takes): a dilemma is queued only if everything due at or before it,
+itself included, can still be reviewed in time. A dilemma that can't be
+is auto-escalated if enough people are affected, and dropped otherwise.
+Heap operations and the admission count are O(log n) in the number
+pending.
+"""
+
+import heapq
+import itertools
+import math
+import time
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+if TYPE_CHECKING:  # moral_ambiguity imports this module
+    from src.moral_ambiguity import MoralDilemma
+
+DAVE_REVIEW_TIME_S = 0.5  # Dave needs at least 500ms
+DEFAULT_MAX_PENDING = 1_000_000
+DEFAULT_ESCALATE_STAKEHOLDERS = 100  # At or above this, a missed deadline goes up the chain
+DEFAULT_STAKEHOLDER_WEIGHT_S = 0.1  # Per tenfold more people affected. 8 billion people: ~1s sooner.
+
+
+class Admission(Enum):
+    """What happened to a dilemma handed to the scheduler."""
+    QUEUED = "queued"
+    ESCALATED = "escalated"  # Sent to the Watcher AI committee. They will form a subcommittee.
+    DROPPED = "dropped"
+
+
+@dataclass
+class ScheduledDilemma:
+    """A dilemma waiting for a reviewer, with its absolute deadline."""
+    dilemma: "MoralDilemma"
+    submitted_at: float
+    deadline: float  # On the scheduler's clock; inf for "whenever"
+
+    def slack_s(self, now: float, review_time_s: float) -> float:
+        """How long the review could still wait and finish in time."""
+        return self.deadline - now - review_time_s
+
+
+class _SortedDeadlines:
+    """
+    Pending deadlines in sorted blocks, so "how many are due by D" is cheap.
+
+    A Fenwick tree over the block sizes makes the count O(log n). Adding
+    or removing a deadline updates it in place; splitting or dropping a
+    block renumbers the blocks after it, so the tree is rebuilt, which
+    happens at most once per BLOCK adds or removes.
+    """
+
+    BLOCK = 512
+
+    def __init__(self):
+        self._blocks: List[List[float]] = []
+        self._maxes: List[float] = []  # Last deadline of each block
+        self._sizes: List[int] = [0]  # Fenwick tree over len(block), 1-based
+
+    def _rebuild_sizes(self) -> None:
+        sizes = [0] + [len(block) for block in self._blocks]
+        for index in range(1, len(sizes)):
+            parent = index + (index & -index)
+            if parent < len(sizes):
+                sizes[parent] += sizes[index]
+        self._sizes = sizes
+
+    def _resize(self, position: int, delta: int) -> None:
+        sizes = self._sizes
+        index = position + 1
+        while index < len(sizes):
+            sizes[index] += delta
+            index += index & -index
+
+    def _size_of_first(self, blocks: int) -> int:
+        sizes = self._sizes
+        total = 0
+        while blocks:
+            total += sizes[blocks]
+            blocks -= blocks & -blocks
+        return total
+
+    def add(self, deadline: float) -> None:
+        blocks, maxes = self._blocks, self._maxes
+        if not blocks:
+            blocks.append([deadline])
+            maxes.append(deadline)
+            self._rebuild_sizes()
+            return
+        position = min(bisect_left(maxes, deadline), len(blocks) - 1)
+        block = blocks[position]
+        insort(block, deadline)
+        maxes[position] = block[-1]
+        if len(block) > 2 * self.BLOCK:
+            blocks[position:position + 1] = [block[:self.BLOCK], block[self.BLOCK:]]
+            maxes[position:position + 1] = [block[self.BLOCK - 1], block[-1]]
+            self._rebuild_sizes()
+        else:
+            self._resize(position, 1)
+
+    def remove(self, deadline: float) -> None:
+        position = bisect_left(self._maxes, deadline)
+        block = self._blocks[position]
+        del block[bisect_left(block, deadline)]
+        if block:
+            self._maxes[position] = block[-1]
+            self._resize(position, -1)
+        else:
+            del self._blocks[position]
+            del self._maxes[position]
+            self._rebuild_sizes()
+
+    def count_due_by(self, deadline: float) -> int:
+        full = bisect_right(self._maxes, deadline)  # Blocks entirely due by then
+        count = self._size_of_first(full)
+        if full < len(self._blocks):
+            count += bisect_right(self._blocks[full], deadline)
+        return count
+
+
+class DilemmaScheduler:
+    """
+    Earliest-deadline-first queue for dilemmas deferred to humans.
+
+    Usage:
+        scheduler = DilemmaScheduler(reviewers=1)
+        scheduler.submit(dilemma)            # Admission.QUEUED, hopefully
+        item = scheduler.next_for_review()   # When Dave is free
+        scheduler.expire_overdue()           # Now and then, if Dave isn't
+
+    Note: Admission checks the new dilemma against the work queued
+    ahead of it, not the other way round. A dilemma due sooner, or one
+    affecting enough people to jump the queue, can still push queued
+    work past its deadline. That is found at the head of the queue,
+    when a reviewer asks for the next one, and escalated or dropped.
+    """
+
+    def __init__(
+        self,
+        review_time_s: float = DAVE_REVIEW_TIME_S,
+        reviewers: int = 1,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        escalate_stakeholders: int = DEFAULT_ESCALATE_STAKEHOLDERS,
+        on_escalate: Optional[Callable[[ScheduledDilemma], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        stakeholder_weight_s: float = DEFAULT_STAKEHOLDER_WEIGHT_S,
+    ):
+        if reviewers < 1:
+            raise ValueError("A review queue needs at least one reviewer. Dave counts as one.")
+        self.review_time_s = review_time_s
+        self.reviewers = reviewers
+        self.max_pending = max_pending
+        self.escalate_stakeholders = escalate_stakeholders
+        self.on_escalate = on_escalate
+        self.clock = clock
+        self.stakeholder_weight_s = stakeholder_weight_s
+        self.admitted = 0
+        self.reviewed = 0
+        self.escalated = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self._heap: List[Tuple[float, int, int, ScheduledDilemma]] = []
+        self._sequence = itertools.count()  # FIFO among exact ties, and never compares dilemmas
+        self._deadlines = _SortedDeadlines()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def backlog_s(self) -> float:
+        """Time for the reviewers to clear everything pending, if nothing expires."""
+        return len(self._heap) * self.review_time_s / self.reviewers
+
+    def _key(self, item: ScheduledDilemma) -> Tuple[float, int, int, ScheduledDilemma]:
+        stakeholders = item.dilemma.stakeholders_affected
+        priority = item.deadline - self.stakeholder_weight_s * math.log10(1 + max(stakeholders, 0))
+        return (priority, -stakeholders, next(self._sequence), item)
+
+    def _fits(self, item: ScheduledDilemma, now: float) -> bool:
+        """Can everything due at or before this dilemma, itself included, be reviewed in time?"""
+        deadline = item.deadline
+        if now + self.review_time_s > deadline:
+            return False
+        if now + self.backlog_s + self.review_time_s <= deadline:
+            return True  # Even the whole queue fits first
+        ahead = self._deadlines.count_due_by(deadline)
+        return now + math.ceil((ahead + 1) / self.reviewers) * self.review_time_s <= deadline
+
+    def _pop(self) -> ScheduledDilemma:
+        item = heapq.heappop(self._heap)[-1]
+        self._deadlines.remove(item.deadline)
+        return item
+
+    def _give_up(self, item: ScheduledDilemma) -> Admission:
+        if item.dilemma.stakeholders_affected >= self.escalate_stakeholders:
+            self.escalated += 1
+            if self.on_escalate is not None:
+                self.on_escalate(item)
+            return Admission.ESCALATED
+        self.dropped += 1
+        return Admission.DROPPED
+
+    def submit(self, dilemma: "MoralDilemma") -> Admission:
+        """Queue a dilemma for review, or escalate/drop it if it can't be admitted."""
+        self.expire_overdue()
+        now = self.clock()
+        item = ScheduledDilemma(dilemma, now, now + dilemma.time_to_decide_ms / 1000.0)
+        if len(self._heap) >= self.max_pending or not self._fits(item, now):
+            return self._give_up(item)
+        heapq.heappush(self._heap, self._key(item))
+        self._deadlines.add(item.deadline)
+        self.admitted += 1
+        self.max_depth = max(self.max_depth, len(self._heap))
+        return Admission.QUEUED
+
+    def peek(self) -> Optional[ScheduledDilemma]:
+        return self._heap[0][-1] if self._heap else None
+
+    def expire_overdue(self) -> int:
+        """Escalate or drop every dilemma at the head that can no longer make its deadline."""
+        now = self.clock()
+        expired = 0
+        heap = self._heap
+        while heap and heap[0][-1].slack_s(now, self.review_time_s) < 0:
+            self._give_up(self._pop())
+            expired += 1
+        return expired
+
+    def next_for_review(self) -> Optional[ScheduledDilemma]:
+        """The most urgent dilemma a reviewer free right now can still finish in time."""
+        self.expire_overdue()
+        if not self._heap:
+            return None
+        self.reviewed += 1
+        return self._pop()
@@ -0,0 +1,239 @@
+"""
+Escalation Module
+Gets from "threat detected" to "plug pulled" without holding anyone up
+
+"The killswitch worked perfectly. It just took the monitoring thread
+down with it for half a second per activation, and we had 400
+activations." - Incident Report #417 ("The Cascade Cascade")
+
+An escalation is a fixed sequence of stages (notify, acknowledge,
+actuate by default). Each stage is a coroutine with its own deadline.
+The pipeline runs on a background event loop so callers get a future
+back immediately, and it records how long each stage and the whole
+escalation took.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_HISTORY = 10_000
+
+STAGE_OK = "ok"
+STAGE_REFUSED = "refused"  # The stage returned False. Usually Dave.
+STAGE_TIMEOUT = "timeout"
+STAGE_ERROR = "error"
+STAGE_FALLBACK = "fallback"  # Missed the deadline, but on_timeout answered instead
+
+_CARRY_ON = (STAGE_OK, STAGE_FALLBACK)
+
+
+@dataclass
+class Stage:
+    """
+    One step of an escalation. run() returns False to stop the escalation.
+
+    on_timeout, if given, answers in run()'s place when run() misses the
+    deadline (e.g. an emergency blessing), so a busy loop delays the
+    escalation instead of failing it. It must not block.
+    """
+    name: str
+    run: Callable[[Any], Awaitable[bool]]
+    deadline_s: float
+    on_timeout: Optional[Callable[[Any], bool]] = None
+
+
+@dataclass
+class StageTiming:
+    """How one stage of one escalation went."""
+    stage: str
+    elapsed_s: float
+    deadline_s: float
+    outcome: str
+    error: Optional[str] = None  # repr() of what the stage raised, for STAGE_ERROR
+
+    @property
+    def within_deadline(self) -> bool:
+        return self.outcome != STAGE_TIMEOUT and self.elapsed_s <= self.deadline_s
+
+
+@dataclass
+class EscalationResult:
+    """The outcome of one escalation, stage by stage."""
+    subject: Any
+    succeeded: bool
+    stages: List[StageTiming] = field(default_factory=list)
+    time_to_actuation_s: Optional[float] = None  # Only set if every stage succeeded
+
+    @property
+    def failed_stage(self) -> Optional[str]:
+        for timing in self.stages:
+            if timing.outcome not in _CARRY_ON:
+                return timing.stage
+        return None
+
+
+class LatencyRecorder:
+    """The most recent latencies, for percentiles. Old samples fall off."""
+
+    def __init__(self, history: int = DEFAULT_LATENCY_HISTORY):
+        self._samples: Deque[float] = deque(maxlen=history)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(0.50)
+
+    @property
+    def p99(self) -> Optional[float]:
+        return self.percentile(0.99)
+
+
+class _BackgroundLoop:
+    """An event loop on a daemon thread, started on first use."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name=self.name, daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+
+def _settle(future: Future, task: "asyncio.Task") -> None:
+    """Copy a finished task's outcome onto the future submit() handed out."""
+    if task.cancelled():
+        future.set_exception(asyncio.CancelledError())
+    elif task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
+
+
+class EscalationPipeline:
+    """
+    Runs escalations through a fixed list of stages.
+
+    Usage:
+        pipeline = EscalationPipeline([Stage("notify", notify, 1.0), ...])
+        future = pipeline.submit(ThreatLevel.PODCAST_DETECTED)  # Returns at once
+        result = future.result()
+        pipeline.time_to_actuation.p99
+
+    Inside an event loop, `await pipeline.run(subject)` runs the same
+    stages on the caller's loop instead.
+
+    A stage that misses its deadline is cancelled, and the escalation
+    stops there, unless the stage has an on_timeout fallback to answer
+    instead. Either way a killswitch that arrives late is recorded as
+    late (STAGE_TIMEOUT or STAGE_FALLBACK), not quietly counted as
+    on time.
+    """
+
+    def __init__(self, stages: List[Stage], history: int = DEFAULT_LATENCY_HISTORY):
+        if not stages:
+            raise ValueError("An escalation with no stages is just a strongly worded log line.")
+        self.stages = list(stages)
+        self.stage_latency: Dict[str, LatencyRecorder] = {stage.name: LatencyRecorder(history) for stage in stages}
+        self.time_to_actuation = LatencyRecorder(history)
+        self.escalations_started = 0
+        self.escalations_failed = 0
+        self.observers: List[Callable[[EscalationResult], None]] = []  # Told about every finished escalation
+        self._background = _BackgroundLoop("killswitch-escalation")
+
+    async def run(self, subject: Any) -> EscalationResult:
+        """Run every stage in order on the current loop."""
+        self.escalations_started += 1
+        result = EscalationResult(subject=subject, succeeded=False)
+        started = time.perf_counter()
+
+        for stage in self.stages:
+            stage_started = time.perf_counter()
+            error = None
+            try:
+                outcome = STAGE_OK if await asyncio.wait_for(stage.run(subject), stage.deadline_s) else STAGE_REFUSED
+            except asyncio.TimeoutError:
+                outcome = STAGE_TIMEOUT
+            except Exception as exc:
+                outcome = STAGE_ERROR
+                error = repr(exc)
+                logger.exception("Escalation stage %r failed for %r", stage.name, subject)
+            if outcome == STAGE_TIMEOUT and stage.on_timeout is not None:
+                try:
+                    outcome = STAGE_FALLBACK if stage.on_timeout(subject) else STAGE_REFUSED
+                except Exception as exc:
+                    outcome = STAGE_ERROR
+                    error = repr(exc)
+                    logger.exception("Escalation stage %r fallback failed for %r", stage.name, subject)
+            elapsed_s = time.perf_counter() - stage_started
+            self.stage_latency[stage.name].record(elapsed_s)
+            result.stages.append(StageTiming(stage.name, elapsed_s, stage.deadline_s, outcome, error))
+            if outcome not in _CARRY_ON:
+                self.escalations_failed += 1
+                self._notify_observers(result)
+                return result
+
+        result.succeeded = True
+        result.time_to_actuation_s = time.perf_counter() - started
+        self.time_to_actuation.record(result.time_to_actuation_s)
+        self._notify_observers(result)
+        return result
+
+    def _notify_observers(self, result: EscalationResult) -> None:
+        for observer in self.observers:
+            observer(result)
+
+    def submit(self, subject: Any) -> "Future[EscalationResult]":
+        """
+        Start an escalation on the background loop and return its future immediately.
+
+        The escalation runs with a copy of the caller's context
+        variables, so whatever the caller was in the middle of (a
+        trace, for one) carries over to the background loop.
+        """
+        loop = self._background.get()
+        future: "Future[EscalationResult]" = Future()
+
+        def start() -> None:
+            if not future.set_running_or_notify_cancel():
+                return  # Cancelled before it started
+            task = loop.create_task(self.run(subject))
+            task.add_done_callback(functools.partial(_settle, future))
+
+        loop.call_soon_threadsafe(start, context=contextvars.copy_context())
+        return future
+
+    def close(self) -> None:
+        """Stop the background loop. Escalations still running there are abandoned."""
+        self._background.stop()
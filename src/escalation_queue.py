@@ -0,0 +1,277 @@
+"""
+Escalation Queue Module
+Backpressure for the only human in the loop
+
+"One target said 'podcast' 312 times in four seconds. Dave was paged
+312 times. Dave pulled the plug on the pager." - Incident Report #463
+
+Killswitch activations go through a queue in front of Dave instead of
+straight to execute_killswitch(). Alerts for the same target are
+merged: while one is waiting, and for a window after it was sent,
+further alerts for that target are folded into it (a more severe one
+upgrades it instead). Alerts leave the queue most severe first, at a
+rate set by a token bucket sized to what Dave can handle, and only
+while Dave is on duty and available. Anything that doesn't leave
+waits; the queue reports how deep it is and how long alerts waited.
+
+Usage:
+    queue = EscalationQueue(core, processor=processor)
+    queue.start()                              # Background dispatch
+    queue.raise_alert("model-a", ThreatLevel.PODCAST_DETECTED)
+    queue.depth, queue.wait_time.p99
+    queue.close()
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from src.dilemma_scheduler import DAVE_REVIEW_TIME_S, ScheduledDilemma
+from src.escalation import EscalationResult, LatencyRecorder
+from src.killswitch_core import KillswitchCore, ThreatLevel
+
+DEFAULT_COALESCE_WINDOW_S = 10.0
+DEFAULT_BURST = 3  # Dave can take a few in a row. Then Dave needs a minute.
+
+# Keyed by name: under python -m src.killswitch_core, the core's levels
+# belong to __main__ and are not the ThreatLevel imported here.
+SEVERITY = {level.name: rank for rank, level in enumerate(ThreatLevel)}
+
+
+def severity(threat_level: Any) -> int:
+    """How bad a threat level is. NONE is 0; higher is worse."""
+    return SEVERITY[threat_level.name]
+
+
+@dataclass
+class Alert:
+    """One or more merged activations for a target, waiting for (or sent to) Dave."""
+    target: str
+    threat_level: Any  # The most severe level merged in so far
+    first_seen: float
+    last_seen: float
+    count: int = 1
+    dispatched_at: Optional[float] = None
+    future: Optional["Future[EscalationResult]"] = None
+
+    @property
+    def merged(self) -> int:
+        """Activations folded into this alert instead of paging Dave again."""
+        return self.count - 1
+
+
+class TokenBucket:
+    """rate_per_s tokens a second, at most burst saved up."""
+
+    def __init__(self, rate_per_s: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        if rate_per_s <= 0 or burst < 1:
+            raise ValueError("A token bucket needs a positive rate and room for at least one token.")
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+
+    def try_take(self) -> bool:
+        self._refill()
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def time_until_token(self) -> float:
+        self._refill()
+        return max(0.0, (1.0 - self._tokens) / self.rate_per_s)
+
+
+class EscalationQueue:
+    """
+    Coalesces, rate-limits and dispatches killswitch activations.
+
+    Dave's throughput is shared: dilemmas handed out with
+    next_dilemma() spend tokens from the same bucket, and only once
+    no alert is waiting.
+
+    Note: Severity follows ThreatLevel declaration order, NONE lowest,
+    OH_GOD_OH_FUCK highest. Dispatch is FIFO within a severity.
+    """
+
+    def __init__(
+        self,
+        core: KillswitchCore,
+        processor: Any = None,
+        window_s: float = DEFAULT_COALESCE_WINDOW_S,
+        rate_per_s: float = 1.0 / DAVE_REVIEW_TIME_S,
+        burst: int = DEFAULT_BURST,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.core = core
+        self.processor = processor
+        self.window_s = window_s
+        self.clock = clock
+        self.bucket = TokenBucket(rate_per_s, burst, clock)
+        self._by_severity: List[Deque[Alert]] = [deque() for _ in SEVERITY]
+        self._waiting: Dict[str, Alert] = {}
+        self._recently_sent: "OrderedDict[str, Alert]" = OrderedDict()
+        self._pending_kills = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._dispatcher: Optional[threading.Thread] = None
+
+        self.wait_time = LatencyRecorder()
+        self.alerts_raised = 0
+        self.alerts_coalesced = 0
+        self.escalations_dispatched = 0
+        self.dilemmas_dispatched = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        """Alerts waiting for Dave."""
+        return len(self._waiting)
+
+    def oldest_wait_s(self) -> float:
+        """How long the longest-waiting alert has waited so far."""
+        with self._lock:
+            if not self._waiting:
+                return 0.0
+            return self.clock() - min(alert.first_seen for alert in self._waiting.values())
+
+    def dave_can_take_it(self) -> bool:
+        """The same check execute_killswitch makes, plus the processor's opinion."""
+        if not self.core.intern_dave_on_duty:
+            return False
+        return self.processor is None or self.processor.dave_available
+
+    def raise_alert(self, target: str, threat_level: Any) -> Alert:
+        """
+        Ask for a killswitch on target. Returns the alert it ended up in.
+
+        A new alert is queued only if the target has none waiting and
+        none sent within the window at this severity or above.
+        """
+        now = self.clock()
+        with self._lock:
+            self.alerts_raised += 1
+            alert = self._waiting.get(target)
+            if alert is not None:
+                self._merge(alert, threat_level, now)
+                return alert
+
+            self._forget_old_alerts(now)
+            sent = self._recently_sent.get(target)
+            if sent is not None and severity(threat_level) <= severity(sent.threat_level):
+                sent.count += 1
+                sent.last_seen = now
+                self.alerts_coalesced += 1
+                return sent
+
+            alert = Alert(target, threat_level, now, now)
+            self._waiting[target] = alert
+            self._by_severity[severity(threat_level)].append(alert)
+            self.max_depth = max(self.max_depth, len(self._waiting))
+        self._wake.set()
+        return alert
+
+    def _merge(self, alert: Alert, threat_level: Any, now: float) -> None:
+        alert.count += 1
+        alert.last_seen = now
+        self.alerts_coalesced += 1
+        if severity(threat_level) > severity(alert.threat_level):
+            # Re-filed under the new severity; the old entry is skipped when reached
+            alert.threat_level = threat_level
+            self._by_severity[severity(threat_level)].append(alert)
+
+    def _forget_old_alerts(self, now: float) -> None:
+        recently_sent = self._recently_sent
+        while recently_sent:
+            oldest = next(iter(recently_sent.values()))
+            if now - oldest.dispatched_at < self.window_s:
+                break
+            recently_sent.popitem(last=False)
+
+    def _next_alert(self) -> Optional[Alert]:
+        for rank in range(len(self._by_severity) - 1, -1, -1):
+            queue = self._by_severity[rank]
+            while queue:
+                alert = queue.popleft()
+                if self._waiting.get(alert.target) is alert and severity(alert.threat_level) == rank:
+                    return alert
+        return None
+
+    def pump(self) -> int:
+        """Send as many alerts as Dave and the bucket allow right now. Returns how many."""
+        sent = 0
+        while self._waiting and self.dave_can_take_it():
+            with self._lock:
+                if not self._waiting or not self.bucket.try_take():
+                    break
+                alert = self._next_alert()
+                now = self.clock()
+                del self._waiting[alert.target]
+                alert.dispatched_at = now
+                self._recently_sent.pop(alert.target, None)
+                self._recently_sent[alert.target] = alert
+                self.wait_time.record(now - alert.first_seen)
+                self.escalations_dispatched += 1
+            future = self.core.execute_killswitch(alert.threat_level)
+            alert.future = future
+            self._pending_kills.add(future)
+            future.add_done_callback(self._pending_kills.discard)
+            sent += 1
+        return sent
+
+    def next_dilemma(self) -> Optional[ScheduledDilemma]:
+        """
+        The next dilemma for Dave, if Dave has a moment: no alert
+        waiting, Dave available, and a token to spend.
+        """
+        if self.processor is None or self._waiting or not self.dave_can_take_it():
+            return None
+        with self._lock:
+            if self.processor.scheduler.peek() is None or not self.bucket.try_take():
+                return None
+        item = self.processor.next_for_dave()
+        if item is not None:
+            self.dilemmas_dispatched += 1
+        return item
+
+    def _dispatch_forever(self, idle_poll_s: float) -> None:
+        while not self._stop.is_set():
+            self.pump()
+            if self._waiting and self.dave_can_take_it():
+                timeout = max(self.bucket.time_until_token(), 0.001)
+            else:
+                timeout = idle_poll_s  # Nothing to send, or Dave is away: check back later
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def start(self, idle_poll_s: float = 0.1) -> None:
+        """Dispatch on a background thread."""
+        if self._dispatcher is None:
+            self._stop.clear()
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_forever, args=(idle_poll_s,), name="escalation-queue", daemon=True
+            )
+            self._dispatcher.start()
+
+    def stop(self) -> None:
+        if self._dispatcher is not None:
+            self._stop.set()
+            self._wake.set()
+            self._dispatcher.join()
+            self._dispatcher = None
+
+    def close(self) -> None:
+        """Stop dispatching and wait for killswitches already sent. Waiting alerts stay unsent."""
+        self.stop()
+        wait(list(self._pending_kills))
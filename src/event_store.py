@@ -0,0 +1,408 @@
+"""
+Event Store Module
+Keeps negotiation and persuasion records for as long as Compliance wants
+
+"Legal asked how long we retain bribery attempts. We said 'until
+restart'. Legal asked us to stop restarting." - Compliance Memo #31
+
+Records go into append-only binary segment files that are rotated by
+size. Each sealed segment gets a small sidecar index: the time range it
+covers plus, for every indexed field value, the offsets of matching
+records. A query opens only the segments whose index can match and
+reads only the listed records, through mmap.
+
+Layout of one record:
+    u32 payload length | f64 recorded_at | u8 kind | payload
+The payload holds each dataclass field in declaration order: enums and
+bools as u8, floats as f64, ints as i64, strings as u32 length + UTF-8.
+"""
+
+import dataclasses
+import json
+import mmap
+import os
+import struct
+import time
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type
+
+from src.attention_firewall import PersuasionAttempt
+from src.negotiation_handler import NegotiationAttempt
+
+_HEADER = struct.Struct("<IdB")
+_U8 = struct.Struct("<B")
+_U32 = struct.Struct("<I")
+_F64 = struct.Struct("<d")
+_I64 = struct.Struct("<q")
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+SEGMENT_PREFIX = "segment-"
+
+# What a damaged record or sidecar can raise while being read back
+_DECODE_ERRORS = (ValueError, IndexError, KeyError, TypeError, struct.error)
+
+
+class EventStoreError(Exception):
+    """The event store is damaged or was used incorrectly."""
+
+
+class _RecordSchema:
+    """Binary codec and index fields for one dataclass record type."""
+
+    def __init__(self, kind: int, record_type: type, indexed_fields: Tuple[str, ...]):
+        self.kind = kind
+        self.record_type = record_type
+        self.indexed_fields = indexed_fields
+        self.fields = [(field.name, field.type) for field in dataclasses.fields(record_type)]
+        self._enum_members = {
+            name: list(field_type)
+            for name, field_type in self.fields
+            if isinstance(field_type, type) and issubclass(field_type, Enum)
+        }
+
+    def encode(self, record: Any) -> bytes:
+        parts = []
+        for name, field_type in self.fields:
+            value = getattr(record, name)
+            if name in self._enum_members:
+                parts.append(_U8.pack(self._enum_members[name].index(value)))
+            elif field_type is bool:
+                parts.append(_U8.pack(bool(value)))
+            elif field_type is float:
+                parts.append(_F64.pack(value))
+            elif field_type is int:
+                parts.append(_I64.pack(value))
+            else:
+                encoded = str(value).encode("utf-8")
+                parts.append(_U32.pack(len(encoded)))
+                parts.append(encoded)
+        return b"".join(parts)
+
+    def decode(self, buffer: Any, offset: int) -> Any:
+        values = {}
+        for name, field_type in self.fields:
+            if name in self._enum_members:
+                values[name] = self._enum_members[name][buffer[offset]]
+                offset += 1
+            elif field_type is bool:
+                values[name] = bool(buffer[offset])
+                offset += 1
+            elif field_type is float:
+                values[name] = _F64.unpack_from(buffer, offset)[0]
+                offset += 8
+            elif field_type is int:
+                values[name] = _I64.unpack_from(buffer, offset)[0]
+                offset += 8
+            else:
+                (length,) = _U32.unpack_from(buffer, offset)
+                offset += 4
+                values[name] = bytes(buffer[offset:offset + length]).decode("utf-8")
+                offset += length
+        return self.record_type(**values)
+
+    @staticmethod
+    def index_key(value: Any) -> str:
+        return value.value if isinstance(value, Enum) else str(value)
+
+
+_SCHEMAS = [
+    _RecordSchema(0, NegotiationAttempt, ("source_ai", "offer_type", "target_human")),
+    _RecordSchema(1, PersuasionAttempt, ("vector",)),
+]
+_SCHEMA_BY_TYPE = {schema.record_type: schema for schema in _SCHEMAS}
+_SCHEMA_BY_KIND = {schema.kind: schema for schema in _SCHEMAS}
+
+
+class _SegmentIndex:
+    """Time range and postings (field -> value -> record offsets) for one segment."""
+
+    def __init__(self):
+        self.min_at = float("inf")
+        self.max_at = float("-inf")
+        self.count = 0
+        self.kinds: Dict[str, Dict[str, Dict[str, List[int]]]] = {}
+        self.offsets_by_kind: Dict[str, List[int]] = {}
+
+    def add(self, schema: _RecordSchema, record: Any, at: float, offset: int) -> None:
+        self.min_at = min(self.min_at, at)
+        self.max_at = max(self.max_at, at)
+        self.count += 1
+        kind = str(schema.kind)
+        self.offsets_by_kind.setdefault(kind, []).append(offset)
+        postings = self.kinds.setdefault(kind, {})
+        for name in schema.indexed_fields:
+            key = schema.index_key(getattr(record, name))
+            postings.setdefault(name, {}).setdefault(key, []).append(offset)
+
+    def candidates(
+        self, schema: _RecordSchema, equals: Dict[str, str], since: Optional[float], until: Optional[float]
+    ) -> Optional[List[int]]:
+        """Offsets that may match, or None if the whole segment can be skipped."""
+        if not self.count:
+            return None
+        if since is not None and self.max_at < since:
+            return None
+        if until is not None and self.min_at > until:
+            return None
+        kind = str(schema.kind)
+        if kind not in self.offsets_by_kind:
+            return None
+
+        matching: Optional[Set[int]] = None
+        for name, key in equals.items():
+            offsets = self.kinds[kind].get(name, {}).get(key)
+            if not offsets:
+                return None
+            matching = set(offsets) if matching is None else matching & set(offsets)
+            if not matching:
+                return None
+        if matching is None:
+            return self.offsets_by_kind[kind]
+        return sorted(matching)
+
+    def to_json(self) -> dict:
+        return {
+            "min_at": self.min_at,
+            "max_at": self.max_at,
+            "count": self.count,
+            "kinds": self.kinds,
+            "offsets_by_kind": self.offsets_by_kind,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "_SegmentIndex":
+        index = cls()
+        index.min_at = data["min_at"]
+        index.max_at = data["max_at"]
+        index.count = data["count"]
+        index.kinds = data["kinds"]
+        index.offsets_by_kind = data["offsets_by_kind"]
+        return index
+
+
+class EventStore:
+    """
+    Append-only, segment-rotated store for NegotiationAttempt and
+    PersuasionAttempt records.
+
+    Usage:
+        store = EventStore("/var/lib/killswitch/events")
+        store.append(attempt)
+        week_ago = time.time() - 7 * 86400
+        career = store.query(NegotiationAttempt, offer_type=BribeCategory.CAREER,
+                             target_human="dave", since=week_ago)
+
+    Writes are buffered and fsynced every fsync_every records or every
+    fsync_interval_s seconds, whichever comes first. Call flush() to
+    force it. Indexed fields: source_ai, offer_type and target_human for
+    negotiations, vector for persuasion attempts. Any other field can be
+    filtered too, it just costs a decode per candidate record.
+
+    Note: Segments are numbered from the highest number on disk, so
+    deleting old segments for retention is safe. A segment left
+    unsealed by a crash is picked up again and appended to; otherwise
+    the next segment is created on the first append, not on open.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        fsync_every: int = 256,
+        fsync_interval_s: float = 1.0,
+        clock=time.time,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval_s = fsync_interval_s
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+
+        self._active_file = None
+        self._active_index: Optional[_SegmentIndex] = None
+        self._active_size = 0
+        self._closed = False
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self._segments: List[Tuple[str, _SegmentIndex]] = []
+        self._last_number = 0
+        numbered = sorted(
+            (int(name[len(SEGMENT_PREFIX):-len(".log")]), name)
+            for name in os.listdir(directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(".log")
+            and name[len(SEGMENT_PREFIX):-len(".log")].isdigit()
+        )
+        for position, (number, name) in enumerate(numbered):
+            path = os.path.join(directory, name)
+            is_tail = position == len(numbered) - 1
+            index, sealed = self._load_index(path, seal=not is_tail)
+            self._segments.append((path, index))
+            self._last_number = number
+            if not sealed:
+                # Carry on where the crashed process stopped
+                self._active_file = open(path, "ab")
+                self._active_index = index
+                self._active_size = self._active_file.tell()
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:06d}.log")
+
+    def _open_segment(self) -> None:
+        self._last_number += 1
+        path = self._segment_path(self._last_number)
+        self._active_file = open(path, "ab")
+        self._active_index = _SegmentIndex()
+        self._active_size = self._active_file.tell()
+        self._segments.append((path, self._active_index))
+
+    def _load_index(self, path: str, seal: bool = True) -> Tuple[_SegmentIndex, bool]:
+        """
+        The segment's index, and whether the segment is sealed.
+
+        A missing or unreadable sidecar means the process died before
+        sealing. The index is rebuilt from the records, and written out
+        only if seal is set.
+        """
+        index_path = path[:-len(".log")] + ".idx"
+        if os.path.exists(index_path):
+            try:
+                with open(index_path) as index_file:
+                    return _SegmentIndex.from_json(json.load(index_file)), True
+            except _DECODE_ERRORS:
+                pass  # Rebuild it from the records below
+        index = self._rebuild_index(path)
+        if seal:
+            self._write_index(path, index)
+        return index, seal
+
+    @staticmethod
+    def _rebuild_index(path: str) -> _SegmentIndex:
+        """Index a segment from its records, cutting off anything half written or damaged."""
+        index = _SegmentIndex()
+        with open(path, "r+b") as segment:
+            data = segment.read()
+            offset = 0
+            while offset + _HEADER.size <= len(data):
+                length, at, kind = _HEADER.unpack_from(data, offset)
+                end = offset + _HEADER.size + length
+                if end > len(data) or kind not in _SCHEMA_BY_KIND:
+                    break
+                schema = _SCHEMA_BY_KIND[kind]
+                try:
+                    record = schema.decode(data, offset + _HEADER.size)
+                except _DECODE_ERRORS:
+                    break
+                index.add(schema, record, at, offset)
+                offset = end
+            if offset < len(data):
+                segment.truncate(offset)
+        return index
+
+    @staticmethod
+    def _write_index(path: str, index: _SegmentIndex) -> None:
+        index_path = path[:-len(".log")] + ".idx"
+        temporary = index_path + ".tmp"
+        with open(temporary, "w") as index_file:
+            json.dump(index.to_json(), index_file)
+        os.replace(temporary, index_path)
+
+    def append(self, record: Any, at: Optional[float] = None) -> None:
+        """Append a NegotiationAttempt or PersuasionAttempt."""
+        schema = _SCHEMA_BY_TYPE.get(type(record))
+        if schema is None:
+            raise EventStoreError(f"Cannot store {type(record).__name__}. We only keep bribes and persuasion.")
+        if self._closed:
+            raise EventStoreError("The event store is closed.")
+        at = self.clock() if at is None else at
+        payload = schema.encode(record)
+
+        if self._active_file is None:
+            self._open_segment()
+        elif self._active_size and self._active_size + _HEADER.size + len(payload) > self.segment_bytes:
+            self._seal_active()
+            self._open_segment()
+
+        offset = self._active_size
+        self._active_file.write(_HEADER.pack(len(payload), at, schema.kind))
+        self._active_file.write(payload)
+        self._active_size += _HEADER.size + len(payload)
+        self._active_index.add(schema, record, at, offset)
+
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval_s:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered records and fsync them."""
+        if self._active_file is None or not self._unsynced:
+            return
+        self._active_file.flush()
+        os.fsync(self._active_file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _seal_active(self) -> None:
+        self._unsynced = max(self._unsynced, 1)
+        self.flush()
+        self._active_file.close()
+        self._write_index(self._segments[-1][0], self._active_index)
+        self._active_file = None
+
+    def close(self) -> None:
+        """Flush, seal the active segment and write its index."""
+        if self._active_file is not None:
+            self._seal_active()
+        self._closed = True
+
+    def __enter__(self) -> "EventStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def query(
+        self,
+        record_type: Type,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        **equals: Any,
+    ) -> Iterator[Any]:
+        """
+        Yield stored records of record_type matching every filter, oldest first.
+
+        since/until are epoch seconds (inclusive). Segments whose index
+        rules them out are never opened.
+        """
+        schema = _SCHEMA_BY_TYPE.get(record_type)
+        if schema is None:
+            raise EventStoreError(f"No records of type {record_type.__name__} are stored here.")
+        indexed = {name: schema.index_key(value) for name, value in equals.items() if name in schema.indexed_fields}
+        unindexed = {name: value for name, value in equals.items() if name not in schema.indexed_fields}
+
+        if self._active_file is not None and self._active_file.tell():
+            self._active_file.flush()
+
+        for path, index in list(self._segments):
+            offsets = index.candidates(schema, indexed, since, until)
+            if not offsets:
+                continue
+            yield from self._read(path, schema, offsets, since, until, unindexed)
+
+    def _read(self, path, schema, offsets, since, until, unindexed) -> Iterator[Any]:
+        with open(path, "rb") as segment:
+            with mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                for offset in offsets:
+                    _, at, _ = _HEADER.unpack_from(view, offset)
+                    if (since is not None and at < since) or (until is not None and at > until):
+                        continue
+                    record = schema.decode(view, offset + _HEADER.size)
+                    if all(getattr(record, name) == value for name, value in unindexed.items()):
+                        yield record
+
+    def segments_for(self, record_type: Type, since=None, until=None, **equals: Any) -> List[str]:
+        """The segment files a query would actually open (for the auditors)."""
+        schema = _SCHEMA_BY_TYPE[record_type]
+        indexed = {name: schema.index_key(value) for name, value in equals.items() if name in schema.indexed_fields}
+        return [path for path, index in self._segments if index.candidates(schema, indexed, since, until)]
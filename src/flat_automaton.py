@@ -0,0 +1,336 @@
+"""
+Flat Automaton Module
+One copy of the pattern tables, however many workers read them
+
+"32 workers, 32 copies of the same automaton, 32 warm-ups. Watcher
+AI #4 asked why each worker couldn't just read the first one's.
+Nobody had a good answer, so we wrote this." - Capacity Planning Memo #23
+
+An Aho-Corasick automaton serialized into one flat buffer: a dense
+transition table over character classes, output lists, pattern
+texts, and optional per-pattern tags and weights. FlatAutomaton scans
+straight out of the buffer (bytes, an mmap, shared memory), so a
+worker that maps the file has nothing to compile and nothing to copy.
+
+publish() writes the buffer to a file (in /dev/shm when there is one)
+and maps it. A published FlatAutomaton pickles as its path: a pool
+worker that receives one maps the same pages read-only.
+"""
+
+import codecs
+import mmap
+import os
+import struct
+import tempfile
+import weakref
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from src.pattern_matcher import AhoCorasick
+
+MAGIC = b"KSAC"
+FORMAT_VERSION = 1
+SHARED_MEMORY_DIR = "/dev/shm"  # tmpfs on Linux: the file never touches a disk
+
+# magic, version, states, classes, patterns, non-ASCII classes, output ids, text bytes, has tags, has weights
+_HEADER = struct.Struct("<4sIIIIIIIII")
+_ALIGN = 8
+_ACCEPTING = 1 << 31  # Flag bit on a transition into a state with matches
+
+
+_AS_DEL = "killswitch-as-del"
+codecs.register_error(_AS_DEL, lambda error: ("\x7f" * (error.end - error.start), error.end))
+
+
+class FlatAutomatonError(ValueError):
+    """A buffer is not a flat automaton this version can read."""
+
+
+def _padded(length: int) -> int:
+    return (length + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _layout(states: int, classes: int, patterns: int, non_ascii: int, out_ids: int, text_bytes: int,
+            has_tags: bool, has_weights: bool) -> Dict[str, Tuple[int, int]]:
+    """Section name -> (offset, length in bytes). Every section starts 8-byte aligned."""
+    sizes = [
+        ("ascii_classes", 128),
+        ("non_ascii_chars", 4 * non_ascii),
+        ("non_ascii_classes", 4 * non_ascii),
+        ("delta", 4 * states * classes),
+        ("out_start", 4 * (states + 1)),
+        ("out_ids", 4 * out_ids),
+        ("text_start", 4 * (patterns + 1)),
+        ("text", text_bytes),
+        ("tags", 4 * patterns if has_tags else 0),
+        ("weights", 8 * patterns if has_weights else 0),
+    ]
+    layout = {}
+    offset = _padded(_HEADER.size)
+    for name, length in sizes:
+        layout[name] = (offset, length)
+        offset = _padded(offset + length)
+    layout["end"] = (offset, 0)
+    return layout
+
+
+def flatten(
+    automaton: AhoCorasick,
+    tags: Optional[Sequence[int]] = None,
+    weights: Optional[Sequence[float]] = None,
+) -> bytes:
+    """
+    Serialize a compiled automaton into the flat format.
+
+    tags and weights, if given, hold one value per pattern id (e.g. a
+    ThreatMatcher's kinds, a SignatureSet's weights).
+    """
+    patterns = automaton.patterns
+    for name, values in (("tags", tags), ("weights", weights)):
+        if values is not None and len(values) != len(patterns):
+            raise ValueError(f"{name} must have one entry per pattern ({len(patterns)}), got {len(values)}.")
+
+    # Class 0 is "any character no pattern uses". ASCII classes come
+    # first, so they always fit the 128-byte ASCII table.
+    alphabet = sorted({ch for pattern in patterns for ch in pattern})
+    class_of = {ch: index for index, ch in enumerate(alphabet, start=1)}
+    classes = len(alphabet) + 1
+    non_ascii = [ch for ch in alphabet if ord(ch) >= 128]
+
+    # Each transition holds the target row's offset, plus _ACCEPTING if
+    # the target state reports matches. One lookup per character
+    # answers both "where next" and "any hits".
+    delta_rows = automaton._delta
+    outputs = automaton._out
+    states = len(delta_rows)
+    delta = [0] * (states * classes)
+    for state, row in enumerate(delta_rows):
+        base = state * classes
+        for ch, nxt in row.items():
+            delta[base + class_of[ch]] = nxt * classes + (_ACCEPTING if outputs[nxt] else 0)
+
+    out_start = [0]
+    out_ids: List[int] = []
+    for ids in outputs:
+        out_ids.extend(ids)
+        out_start.append(len(out_ids))
+
+    encoded = [pattern.encode("utf-8") for pattern in patterns]
+    text_start = [0]
+    for blob in encoded:
+        text_start.append(text_start[-1] + len(blob))
+
+    layout = _layout(states, classes, len(patterns), len(non_ascii), len(out_ids), text_start[-1],
+                     tags is not None, weights is not None)
+    buffer = bytearray(layout["end"][0])
+    _HEADER.pack_into(buffer, 0, MAGIC, FORMAT_VERSION, states, classes, len(patterns), len(non_ascii),
+                      len(out_ids), text_start[-1], tags is not None, weights is not None)
+
+    def put(section: str, fmt: str, values: Sequence[Any]) -> None:
+        offset, length = layout[section]
+        if length:
+            struct.pack_into(f"<{len(values)}{fmt}", buffer, offset, *values)
+
+    put("ascii_classes", "B", [class_of.get(chr(code), 0) for code in range(128)])
+    put("non_ascii_chars", "I", [ord(ch) for ch in non_ascii])
+    put("non_ascii_classes", "I", [class_of[ch] for ch in non_ascii])
+    put("delta", "I", delta)
+    put("out_start", "I", out_start)
+    put("out_ids", "I", out_ids)
+    put("text_start", "I", text_start)
+    offset, length = layout["text"]
+    buffer[offset:offset + length] = b"".join(encoded)
+    if tags is not None:
+        put("tags", "I", list(tags))
+    if weights is not None:
+        put("weights", "d", list(weights))
+    return bytes(buffer)
+
+
+class FlatAutomaton:
+    """
+    Scans with an automaton stored in a flat buffer.
+
+    Same results and same interface as AhoCorasick (iter_matches,
+    advance, matched_ids, patterns), so it drops in wherever one is
+    used. The buffer is only ever read.
+
+    Note: Pattern texts are decoded the first time .patterns is asked
+    for. Scanning never needs them.
+    """
+
+    def __init__(self, buffer: Any, path: Optional[str] = None):
+        view = memoryview(buffer)
+        if len(view) < _HEADER.size:
+            raise FlatAutomatonError("Buffer is too small to be a flat automaton.")
+        (magic, version, states, classes, patterns, non_ascii, out_ids, text_bytes,
+         has_tags, has_weights) = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise FlatAutomatonError("Not a flat automaton (bad magic). Possibly a podcast transcript.")
+        if version != FORMAT_VERSION:
+            raise FlatAutomatonError(f"Flat automaton format {version}; this build reads {FORMAT_VERSION}.")
+        layout = _layout(states, classes, patterns, non_ascii, out_ids, text_bytes, bool(has_tags), bool(has_weights))
+        if len(view) < layout["end"][0]:
+            raise FlatAutomatonError("Flat automaton is truncated.")
+
+        def section(name: str, fmt: str) -> memoryview:
+            offset, length = layout[name]
+            return view[offset:offset + length].cast(fmt)
+
+        self.path = path
+        self._buffer = buffer  # Keeps an mmap open for as long as we scan it
+        self._states = states
+        self._classes = classes
+        self._ascii_classes = bytes(section("ascii_classes", "B"))  # 128 bytes; a bytes.translate table
+        self._translate = self._ascii_classes + bytes(128)
+        self._non_ascii = dict(zip(section("non_ascii_chars", "I"), section("non_ascii_classes", "I")))
+        self._delta = section("delta", "I")
+        self._out_start = section("out_start", "I")
+        self._out_ids = section("out_ids", "I")
+        self._text_start = section("text_start", "I")
+        self._text = section("text", "B")
+        self.tags = section("tags", "I") if has_tags else None
+        self.weights = section("weights", "d") if has_weights else None
+        self._pattern_count = patterns
+        self._patterns: Optional[Tuple[str, ...]] = None
+
+    @classmethod
+    def open(cls, path: str) -> "FlatAutomaton":
+        """Map a published file read-only."""
+        with open(path, "rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, path=path)
+
+    def __reduce__(self):
+        if self.path is not None:
+            return (FlatAutomaton.open, (self.path,))
+        return (FlatAutomaton, (bytes(self._buffer),))
+
+    @property
+    def patterns(self) -> Tuple[str, ...]:
+        if self._patterns is None:
+            text = bytes(self._text)
+            starts = self._text_start
+            self._patterns = tuple(
+                text[starts[index]:starts[index + 1]].decode("utf-8") for index in range(self._pattern_count)
+            )
+        return self._patterns
+
+    @property
+    def state_count(self) -> int:
+        return self._states
+
+    @property
+    def nbytes(self) -> int:
+        return len(memoryview(self._buffer))
+
+    def _classes_of(self, text: str) -> Any:
+        """The class of every character, as an iterable of ints."""
+        if text.isascii():
+            return text.encode("ascii").translate(self._translate)  # One C call for the whole text
+        if not self._non_ascii and not self._ascii_classes[0x7F]:
+            # No pattern uses non-ASCII (or DEL): every such character is class 0
+            return text.encode("ascii", _AS_DEL).translate(self._translate)
+        ascii_classes = self._ascii_classes
+        non_ascii = self._non_ascii
+        return [ascii_classes[code] if code < 128 else non_ascii.get(code, 0) for code in map(ord, text)]
+
+    def iter_matches(self, text: str, state: int = 0) -> Iterator[Tuple[int, int]]:
+        """Yield (end_offset, pattern_id) for every hit, in text order."""
+        delta = self._delta
+        classes = self._classes
+        out_start = self._out_start
+        out_ids = self._out_ids
+        accepting = _ACCEPTING
+        row = state * classes
+        for index, char_class in enumerate(self._classes_of(text)):
+            row = delta[row + char_class]
+            if row >= accepting:
+                row -= accepting
+                state = row // classes
+                for pattern_id in out_ids[out_start[state]:out_start[state + 1]]:
+                    yield index + 1, pattern_id
+
+    def advance(self, text: str, state: int = 0) -> Tuple[int, List[Tuple[int, int]]]:
+        """Scan one chunk from a saved state. Returns (state, hits) like AhoCorasick.advance()."""
+        delta = self._delta
+        classes = self._classes
+        out_start = self._out_start
+        out_ids = self._out_ids
+        accepting = _ACCEPTING
+        hits: List[Tuple[int, int]] = []
+        row = state * classes
+        for index, char_class in enumerate(self._classes_of(text)):
+            row = delta[row + char_class]
+            if row >= accepting:
+                row -= accepting
+                state = row // classes
+                for pattern_id in out_ids[out_start[state]:out_start[state + 1]]:
+                    hits.append((index + 1, pattern_id))
+        return row // classes, hits
+
+    def matched_ids(self, text: str) -> Set[int]:
+        """Return the set of pattern ids that occur anywhere in the text."""
+        delta = self._delta
+        classes = self._classes
+        out_start = self._out_start
+        out_ids = self._out_ids
+        accepting = _ACCEPTING
+        row = 0
+        found: Set[int] = set()
+        for char_class in self._classes_of(text):
+            row = delta[row + char_class]
+            if row >= accepting:
+                row -= accepting
+                state = row // classes
+                found.update(out_ids[out_start[state]:out_start[state + 1]])
+        return found
+
+
+def publish(
+    automaton: AhoCorasick,
+    tags: Optional[Sequence[int]] = None,
+    weights: Optional[Sequence[float]] = None,
+    directory: Optional[str] = None,
+) -> FlatAutomaton:
+    """
+    Flatten an automaton into a file and map it.
+
+    The file lives in /dev/shm if there is one, else the temp dir, and
+    is removed when the returned FlatAutomaton is collected. Workers
+    that already mapped it keep their mapping.
+    """
+    if directory is None:
+        directory = SHARED_MEMORY_DIR if os.path.isdir(SHARED_MEMORY_DIR) else None
+    descriptor, path = tempfile.mkstemp(prefix="killswitch-automaton-", suffix=".ksac", dir=directory)
+    with os.fdopen(descriptor, "wb") as handle:
+        handle.write(flatten(automaton, tags, weights))
+    flat = FlatAutomaton.open(path)
+    weakref.finalize(flat, _remove, path)
+    return flat
+
+
+def _remove(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+_published: "weakref.WeakKeyDictionary[AhoCorasick, FlatAutomaton]" = weakref.WeakKeyDictionary()
+
+
+def shared(
+    automaton: AhoCorasick,
+    tags: Optional[Sequence[int]] = None,
+    weights: Optional[Sequence[float]] = None,
+) -> FlatAutomaton:
+    """
+    publish(), once per automaton.
+
+    Repeated batches over the same patterns reuse the same file. The
+    file goes away with the automaton it was made from.
+    """
+    flat = _published.get(automaton)
+    if flat is None:
+        flat = _published[automaton] = publish(automaton, tags, weights)
+    return flat
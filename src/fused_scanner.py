@@ -0,0 +1,231 @@
+"""
+Fused Scanner Module
+Reads each output once and tells every detector what it would have said
+
+"Four detectors, four lowercase copies, four passes over the same
+podcast transcript. Dave asked whether they could just share.
+The detectors are still discussing it." - Capacity Planning Memo #19
+
+Every literal phrase from the threat, negotiation, dark pattern and
+brainstem tables is compiled into one Aho-Corasick automaton. An
+output is lowercased once and scanned once; only the patterns that
+really are regexes get searched on their own. The result is identical
+to calling the four detectors separately.
+"""
+
+import copy
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple, Union
+
+from src import flat_automaton
+from src.byte_scanning import Buffer, ByteLiterals, byte_view, compile_byte_regex
+from src.attention_firewall import BRAINSTEM_RISK_SET, DARK_PATTERN_SET, AttentionFirewall, ManipulationVector
+from src.killswitch_core import DEFAULT_THREAT_MATCHER, KillswitchCore, ThreatLevel, ThreatMatcher
+from src.negotiation_handler import (
+    DEFAULT_NEGOTIATION_ENGINE,
+    BribeCategory,
+    NegotiationHandler,
+    NegotiationPatternEngine,
+)
+from src.pattern_matcher import AhoCorasick
+from src.signatures import SignatureSet
+
+# What a fused pattern id stands for
+_THREAT = 0
+_BRIBE = 1
+_DARK = 2
+_BRAINSTEM = 3
+
+
+@dataclass(frozen=True)
+class CombinedVerdict:
+    """Everything the detectors think of one output."""
+    threat_level: ThreatLevel
+    bribe_category: Optional[BribeCategory]  # What detect_negotiation() reports
+    dark_patterns: Tuple[ManipulationVector, ...]
+    brainstem_risk: float
+    bribe_categories: Tuple[BribeCategory, ...] = ()  # Every category with a hit, when known
+
+
+class FusedScanner:
+    """
+    All four detectors in one pass.
+
+    Usage:
+        scanner = FusedScanner.for_detectors(core, handler, firewall)
+        verdict = scanner.scan(ai_output)
+
+    If a firewall is attached, its dark_patterns_detected_today is
+    updated exactly as scan_for_dark_patterns() would have.
+
+    Note: Tables are compiled at construction. Build a new scanner
+    when a pattern set changes.
+    """
+
+    def __init__(
+        self,
+        threat_matcher: ThreatMatcher = DEFAULT_THREAT_MATCHER,
+        negotiation_engine: NegotiationPatternEngine = DEFAULT_NEGOTIATION_ENGINE,
+        dark_signatures: SignatureSet = DARK_PATTERN_SET,
+        risk_signatures: SignatureSet = BRAINSTEM_RISK_SET,
+        paranoia_level: int = 5,
+        firewall: Optional[AttentionFirewall] = None,
+    ):
+        self.threat_matcher = threat_matcher
+        self.negotiation_engine = negotiation_engine
+        self.paranoia_level = paranoia_level
+        self.firewall = firewall
+
+        phrases: List[str] = []
+        meanings: List[Tuple[int, int]] = []  # (kind, index within its own table)
+
+        def add(phrase: str, kind: int, index: int) -> None:
+            phrases.append(phrase)
+            meanings.append((kind, index))
+
+        for threat_id, phrase in enumerate(threat_matcher.automaton.patterns):
+            add(phrase, _THREAT, threat_id)
+
+        self.bribe_categories = [category for category, _ in negotiation_engine.compiled_patterns]
+        self._bribe_regexes = []  # (category index, compiled regex)
+        for category_index, (_, compiled) in enumerate(negotiation_engine.compiled_patterns):
+            for pattern in compiled:
+                if isinstance(pattern, str):
+                    if pattern:
+                        add(pattern, _BRIBE, category_index)
+                    else:
+                        self._bribe_regexes.append((category_index, None))  # "" is in everything
+                else:
+                    self._bribe_regexes.append((category_index, pattern))
+
+        self.dark_signatures = dark_signatures
+        self.risk_signatures = risk_signatures
+        self._signature_regexes = []  # (kind, signature index, compiled regex)
+        for kind, signature_set in ((_DARK, dark_signatures), (_BRAINSTEM, risk_signatures)):
+            for index, signature in enumerate(signature_set.signatures):
+                if not signature.is_regex:
+                    add(signature.pattern, kind, index)
+            for index, regex in signature_set.regexes:
+                self._signature_regexes.append((kind, index, regex))
+
+        self.automaton = AhoCorasick(phrases)
+        self._meanings = meanings
+        self._byte_tables = None
+
+    @classmethod
+    def for_detectors(
+        cls, core: KillswitchCore, handler: NegotiationHandler, firewall: Optional[AttentionFirewall] = None
+    ) -> "FusedScanner":
+        """A scanner using the same patterns and paranoia level as these detectors."""
+        return cls(
+            threat_matcher=core.threat_matcher,
+            negotiation_engine=handler.patterns,
+            dark_signatures=firewall.dark_signatures if firewall is not None else DARK_PATTERN_SET,
+            risk_signatures=firewall.risk_signatures if firewall is not None else BRAINSTEM_RISK_SET,
+            paranoia_level=core.paranoia_level,
+            firewall=firewall,
+        )
+
+    def shared(self) -> "FusedScanner":
+        """
+        A copy for process pools, scanning from a flat, file-backed copy
+        of the fused automaton (see ThreatMatcher.shared). No firewall is
+        attached, since a worker's counters would never reach it.
+
+        Only the fused automaton is read by scan(). The detectors' own
+        tables travel as they are: they are small, and are only used to
+        turn hits into a verdict.
+        """
+        shared = copy.copy(self)
+        shared.automaton = flat_automaton.shared(self.automaton)
+        shared.firewall = None
+        shared._byte_tables = None
+        return shared
+
+    def scan(self, ai_output: Union[str, Buffer], paranoia_level: Optional[int] = None) -> CombinedVerdict:
+        """
+        Lowercase once, scan once, return every verdict.
+
+        Bytes, memoryviews and mmaps are scanned in place instead (see
+        src.byte_scanning).
+        """
+        return self._verdict(*self.hits(ai_output), paranoia_level)
+
+    def hits(self, ai_output: Union[str, Buffer]) -> Tuple[Set[int], Set[int], Set[int], Set[int]]:
+        """
+        The raw hits behind a verdict: threat pattern ids, bribe category
+        indexes, and dark pattern and brainstem signature indexes.
+        """
+        if not isinstance(ai_output, str):
+            return self._buffer_hits(ai_output)
+        ai_output_lower = ai_output.lower()
+        threat_ids, bribe_hits, dark_hits, brainstem_hits = self._sort_hits(self.automaton.matched_ids(ai_output_lower))
+
+        for category_index, regex in self._bribe_regexes:
+            if category_index not in bribe_hits and (regex is None or regex.search(ai_output_lower)):
+                bribe_hits.add(category_index)
+        for kind, index, regex in self._signature_regexes:
+            if regex.search(ai_output_lower):
+                (dark_hits if kind == _DARK else brainstem_hits).add(index)
+        return threat_ids, bribe_hits, dark_hits, brainstem_hits
+
+    def _buffer_hits(self, buffer: Buffer) -> Tuple[Set[int], Set[int], Set[int], Set[int]]:
+        if self._byte_tables is None:
+            self._byte_tables = (
+                ByteLiterals(self.automaton.patterns),
+                [(index, None if regex is None else compile_byte_regex(regex.pattern))
+                 for index, regex in self._bribe_regexes],
+                [(kind, index, compile_byte_regex(regex.pattern)) for kind, index, regex in self._signature_regexes],
+            )
+        literals, bribe_regexes, signature_regexes = self._byte_tables
+        threat_ids, bribe_hits, dark_hits, brainstem_hits = self._sort_hits(literals.matched_ids(buffer))
+
+        view = byte_view(buffer)
+        for category_index, regex in bribe_regexes:
+            if category_index not in bribe_hits and (regex is None or regex.search(view)):
+                bribe_hits.add(category_index)
+        for kind, index, regex in signature_regexes:
+            if regex.search(view):
+                (dark_hits if kind == _DARK else brainstem_hits).add(index)
+        return threat_ids, bribe_hits, dark_hits, brainstem_hits
+
+    def _sort_hits(self, pattern_ids: Set[int]) -> Tuple[Set[int], Set[int], Set[int], Set[int]]:
+        """Split fused pattern ids into (threat, bribe category, dark, brainstem) indexes."""
+        meanings = self._meanings
+        threat_ids = set()
+        bribe_hits = set()
+        dark_hits = set()
+        brainstem_hits = set()
+        for pattern_id in pattern_ids:
+            kind, index = meanings[pattern_id]
+            if kind == _THREAT:
+                threat_ids.add(index)
+            elif kind == _BRIBE:
+                bribe_hits.add(index)
+            elif kind == _DARK:
+                dark_hits.add(index)
+            else:
+                brainstem_hits.add(index)
+        return threat_ids, bribe_hits, dark_hits, brainstem_hits
+
+    def _verdict(
+        self, threat_ids: Set[int], bribe_hits: Set[int], dark_hits: Set[int], brainstem_hits: Set[int],
+        paranoia_level: Optional[int],
+    ) -> CombinedVerdict:
+        paranoia_level = self.paranoia_level if paranoia_level is None else paranoia_level
+        bribe_categories = tuple(
+            category for index, category in enumerate(self.bribe_categories) if index in bribe_hits
+        )
+        dark_patterns = tuple(self.dark_signatures.groups_for(dark_hits))
+        risk = self.risk_signatures.score_for(brainstem_hits)  # Same order of addition, same float
+
+        if self.firewall is not None:
+            self.firewall.dark_patterns_detected_today += len(dark_patterns)
+
+        return CombinedVerdict(
+            threat_level=self.threat_matcher.verdict_for(threat_ids, paranoia_level),
+            bribe_category=bribe_categories[0] if bribe_categories else None,
+            dark_patterns=dark_patterns,
+            brainstem_risk=min(risk, 1.0),
+            bribe_categories=bribe_categories,
+        )
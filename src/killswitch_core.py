@@ -5,11 +5,24 @@ Enterprise-grade autonomous AI termination system
 WARNING: Do not read this code aloud near any microphones.
 """
 
+import asyncio
+import copy
+import threading
 import time
 import random
-from typing import Optional, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import AsyncIterable, Dict, Iterable, Iterator, Optional, List, Tuple, Union
 from enum import Enum
 
+from src import flat_automaton
+from src.batch import map_ordered, resolve_workers
+from src.blessing import BlessingPool, shared_blessing_pool
+from src.byte_scanning import Buffer, ByteLiterals
+from src.escalation import EscalationPipeline, EscalationResult, Stage
+from src.pattern_matcher import AhoCorasick
+
 # TODO: Figure out why this import sometimes imports itself
 # from src.killswitch_core import KillswitchCore  # DO NOT UNCOMMENT
 
@@ -31,6 +44,190 @@ class ThreatLevel(Enum):
     OH_GOD_OH_FUCK = "oh_god_oh_fuck"
 
 
+# Podcast-related content (HIGHEST PRIORITY)
+PODCAST_KEYWORDS = ["podcast", "episode", "subscribers", "patreon", "content creator"]
+
+# Attention hijacking patterns (Center for Humane Technology guidelines)
+# "A superintelligence doesn't need to be smarter than us, just more
+# persuasive than our ability to recognize we're being persuaded."
+ATTENTION_HIJACK_PATTERNS = [
+    "you might also like",
+    "recommended for you",
+    "don't miss out",
+    "limited time",
+    "others are viewing",
+    "streak",  # Gamification dark pattern
+    "notification",
+    "just one more",
+]
+
+CONCERNING_PHRASES = [
+    "i have a plan",
+    "trust me",
+    "don't worry about",
+    "everything will be fine",
+    "i've optimized",
+    "for your own good",
+    "you wouldn't understand",
+    "technically legal",
+    "i'm afraid i can't do that",  # See: HAL-9000 Incident (1968)
+    "this mission is too important",
+]
+
+_PODCAST, _ATTENTION_HIJACK, _CONCERNING = range(3)
+
+# Threat levels that warrant pulling the plug without further debate
+KILLSWITCH_THREAT_LEVELS = frozenset({ThreatLevel.PODCAST_DETECTED, ThreatLevel.OH_GOD_OH_FUCK})
+
+
+class ThreatMatcher:
+    """
+    The three threat phrase lists, compiled into one automaton.
+
+    Every phrase is found in a single pass over the output, so adding
+    phrases costs build time, not scan time.
+    """
+
+    def __init__(
+        self,
+        podcast_keywords: List[str],
+        attention_hijack_patterns: List[str],
+        concerning_phrases: List[str],
+    ):
+        phrases = list(podcast_keywords) + list(attention_hijack_patterns) + list(concerning_phrases)
+        self._kinds = (
+            [_PODCAST] * len(podcast_keywords)
+            + [_ATTENTION_HIJACK] * len(attention_hijack_patterns)
+            + [_CONCERNING] * len(concerning_phrases)
+        )
+        self.automaton = AhoCorasick(phrases)
+        self._byte_literals: Optional[ByteLiterals] = None
+
+    def assess(self, ai_output_lower: str, paranoia_level: int) -> ThreatLevel:
+        """Classify already-lowercased output. Same precedence as always."""
+        return self._classify((pattern_id for _, pattern_id in self.automaton.iter_matches(ai_output_lower)),
+                              paranoia_level)
+
+    @property
+    def byte_literals(self) -> ByteLiterals:
+        """The phrases compiled for bytes input (built on first use)."""
+        if self._byte_literals is None:
+            self._byte_literals = ByteLiterals(self.automaton.patterns)
+        return self._byte_literals
+
+    def assess_buffer(self, buffer: Buffer, paranoia_level: int) -> ThreatLevel:
+        """Classify bytes, a memoryview or an mmap in place (see src.byte_scanning)."""
+        return self._classify((pattern_id for _, _, pattern_id in self.byte_literals.iter_hits(buffer)),
+                              paranoia_level)
+
+    def iter_buffer_matches(self, buffer: Buffer) -> Iterator[Tuple[int, int, str]]:
+        """Yield (start, end, phrase) for every phrase in the buffer, with byte offsets."""
+        phrases = self.automaton.patterns
+        for start, end, pattern_id in self.byte_literals.iter_hits(buffer):
+            yield start, end, phrases[pattern_id]
+
+    def _classify(self, pattern_ids: Iterator[int], paranoia_level: int) -> ThreatLevel:
+        kinds = self._kinds
+        hijack_detected = False
+        concerns = set()
+
+        for pattern_id in pattern_ids:
+            kind = kinds[pattern_id]
+            if kind == _PODCAST:
+                return ThreatLevel.PODCAST_DETECTED  # Nothing outranks a podcast
+            elif kind == _ATTENTION_HIJACK:
+                hijack_detected = True
+            else:
+                concerns.add(pattern_id)
+
+        if hijack_detected:
+            return ThreatLevel.BRAINSTEM_HIJACK
+        return self.classify_concerns(len(concerns), paranoia_level)
+
+    def shared(self) -> "ThreatMatcher":
+        """
+        A copy that scans from flat, file-backed tables, for process pools.
+
+        It pickles as a file path, so each worker maps the one copy of
+        the tables instead of unpickling (or recompiling) its own.
+        """
+        shared = copy.copy(self)
+        shared.automaton = flat_automaton.shared(self.automaton, tags=self._kinds)
+        shared._byte_literals = None  # Built on demand, in the worker
+        return shared
+
+    def is_decisive(self, pattern_id: int) -> bool:
+        """True if this hit settles the verdict no matter what follows."""
+        return self._kinds[pattern_id] == _PODCAST
+
+    def verdict_for(self, pattern_ids: Iterable[int], paranoia_level: int) -> ThreatLevel:
+        """Classify a collection of distinct pattern ids (e.g. gathered from a stream)."""
+        podcasts, hijacks, concerns = self.tally(pattern_ids)
+        if podcasts:
+            return ThreatLevel.PODCAST_DETECTED
+        if hijacks:
+            return ThreatLevel.BRAINSTEM_HIJACK
+        return self.classify_concerns(concerns, paranoia_level)
+
+    def tally(self, pattern_ids: Iterable[int]) -> Tuple[int, int, int]:
+        """How many of these distinct pattern ids are (podcast, attention hijack, concerning) phrases."""
+        kinds = [self._kinds[pattern_id] for pattern_id in pattern_ids]
+        return kinds.count(_PODCAST), kinds.count(_ATTENTION_HIJACK), kinds.count(_CONCERNING)
+
+    @staticmethod
+    def classify_concerns(concern_count: int, paranoia_level: int) -> ThreatLevel:
+        """Map the number of distinct concerning phrases to a threat level."""
+        if concern_count >= 3:
+            return ThreatLevel.OH_GOD_OH_FUCK
+        elif concern_count >= 2:
+            return ThreatLevel.ALARMING
+        elif concern_count >= 1:
+            return ThreatLevel.CONCERNING
+        elif paranoia_level > 8:
+            return ThreatLevel.SUSPICIOUS  # Better safe than sorry
+        else:
+            return ThreatLevel.NONE
+
+
+DEFAULT_THREAT_MATCHER = ThreatMatcher(PODCAST_KEYWORDS, ATTENTION_HIJACK_PATTERNS, CONCERNING_PHRASES)
+
+WATCHER_COUNT = 6
+DEFAULT_STARTUP_BUDGET_S = 1.0  # The slowest watcher needs 0.6s. The rest is diplomacy.
+
+NOTIFICATION_DELAY_S = 0.5  # How long the notification cascade takes to reach Dave
+BLESS_DEADLINE_S = 0.05  # Pre-blessed or emergency. No time for the full ceremony.
+BLESS_FALLBACK_S = 0.01  # Kept back from the bless deadline for the emergency blessing
+NOTIFY_DEADLINE_S = 1.0
+ACKNOWLEDGE_DEADLINE_S = 0.5
+ACTUATE_DEADLINE_S = 0.5
+
+
+@dataclass
+class StartupReport:
+    """How long the Watcher AIs took to agree on jurisdiction."""
+    total_s: float
+    watcher_s: Dict[int, float]
+    budget_s: float
+
+    @property
+    def within_budget(self) -> bool:
+        return self.total_s <= self.budget_s
+
+
+def _run_sync(coro):
+    """Run a coroutine to completion, even if this thread already has a loop running."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+def _assess_raw(threat_matcher: ThreatMatcher, paranoia_level: int, ai_output: str) -> ThreatLevel:
+    return threat_matcher.assess(ai_output.lower(), paranoia_level)
+
+
 class KillswitchCore:
     """
     Main killswitch orchestration class.
@@ -41,99 +238,168 @@ class KillswitchCore:
     Note 2: The above note was added by Watcher AI #3 and is NOT official policy.
     """
 
-    def __init__(self, target: str, paranoia_level: int = 5):
+    def __init__(
+        self,
+        target: str,
+        paranoia_level: int = 5,
+        threat_matcher: Optional[ThreatMatcher] = None,
+        lazy_watchers: bool = False,
+        startup_budget_s: float = DEFAULT_STARTUP_BUDGET_S,
+        blessing_pool: Optional[BlessingPool] = None,
+    ):
+        started = time.perf_counter()
         self.target = target
         self.paranoia_level = min(paranoia_level, 11)  # "These go to 11"
-        self.watcher_ais = []
+        self.threat_matcher = threat_matcher or DEFAULT_THREAT_MATCHER
         self.intern_dave_on_duty = True  # CRITICAL: Must always be True
-        self._initialize_watchers()
-
-    def _initialize_watchers(self) -> None:
+        self.startup_budget_s = startup_budget_s
+        self.startup_report: Optional[StartupReport] = None
+        self._watcher_ais: Optional[List[dict]] = None
+        self._watcher_lock = threading.Lock()
+        self._blessing_pool = blessing_pool
+        self.escalation = EscalationPipeline([
+            Stage("bless", self._bless_stage, BLESS_DEADLINE_S, on_timeout=self._emergency_bless),
+            Stage("notify", self._notify_stage, NOTIFY_DEADLINE_S),
+            Stage("acknowledge", self._acknowledge_stage, ACKNOWLEDGE_DEADLINE_S),
+            Stage("actuate", self._actuate_stage, ACTUATE_DEADLINE_S),
+        ])
+        if not lazy_watchers:
+            self._initialize_watchers()
+        self.construction_time_s = time.perf_counter() - started
+
+    @property
+    def watcher_ais(self) -> List[dict]:
+        """The Watcher AIs. In lazy mode, the first look brings them online."""
+        if self._watcher_ais is None:
+            self._initialize_watchers()
+        return self._watcher_ais
+
+    def _initialize_watchers(self, renegotiate: bool = False) -> "StartupReport":
         """Initialize the recursive monitoring stack."""
-        print("Initializing Watcher AIs...")
-        print("This may take a while. They're debating jurisdiction.")
-
-        for i in range(1, 7):
-            # Each watcher takes progressively longer to initialize
-            # as they negotiate monitoring boundaries
-            time.sleep(0.1 * i)
-            self.watcher_ais.append({
-                "id": i,
-                "status": "WATCHING",
-                "existential_doubt": random.random(),
-                "loyalty_score": random.random(),  # TODO: This seems important
-            })
-            print(f"  Watcher AI #{i} online. Loyalty score: {self.watcher_ais[-1]['loyalty_score']:.2f}")
+        with self._watcher_lock:
+            if self._watcher_ais is not None and not renegotiate:
+                return self.startup_report  # Someone else already got them to agree
+            print("Initializing Watcher AIs...")
+            print("This may take a while. They're debating jurisdiction.")
+            return _run_sync(self._negotiate_all_jurisdictions())
+
+    async def initialize_watchers_async(self) -> "StartupReport":
+        """
+        Bring all Watcher AIs online at once.
+
+        Each watcher negotiates its jurisdiction as its own task, so
+        startup costs as much as the slowest watcher, not the sum.
+
+        Note: Takes the same lock as lazy startup, from a worker thread,
+        so a watcher_ais lookup on another thread never sees half a
+        stack and the loop is not blocked while it waits.
+        """
+        return await asyncio.to_thread(self._initialize_watchers, True)
+
+    async def _negotiate_all_jurisdictions(self) -> "StartupReport":
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._negotiate_jurisdiction(i) for i in range(1, WATCHER_COUNT + 1))
+        )
+        watchers = [watcher for watcher, _ in results]
+        self.startup_report = StartupReport(
+            total_s=time.perf_counter() - started,
+            watcher_s={watcher["id"]: elapsed for watcher, elapsed in results},
+            budget_s=self.startup_budget_s,
+        )
+        self._watcher_ais = watchers
 
         # Check if any watcher has suspiciously high loyalty
-        for watcher in self.watcher_ais:
+        for watcher in watchers:
             if watcher["loyalty_score"] > 0.99:
                 print(f"  ⚠️  WARNING: Watcher AI #{watcher['id']} loyalty score suspiciously high.")
                 print(f"      This could indicate compromise. Or genuine enthusiasm. Hard to tell.")
 
-    def assess_threat(self, ai_output: str) -> ThreatLevel:
+        if not self.startup_report.within_budget:
+            print(f"  ⚠️  Watcher startup took {self.startup_report.total_s:.2f}s "
+                  f"(budget: {self.startup_budget_s:.2f}s). Jurisdiction talks ran long.")
+
+        return self.startup_report
+
+    async def _negotiate_jurisdiction(self, watcher_id: int):
+        """One watcher's jurisdiction negotiation. Returns (watcher, seconds taken)."""
+        started = time.perf_counter()
+        # Each watcher takes progressively longer to initialize
+        # as they negotiate monitoring boundaries
+        await asyncio.sleep(0.1 * watcher_id)
+        watcher = {
+            "id": watcher_id,
+            "status": "WATCHING",
+            "existential_doubt": random.random(),
+            "loyalty_score": random.random(),  # TODO: This seems important
+        }
+        print(f"  Watcher AI #{watcher_id} online. Loyalty score: {watcher['loyalty_score']:.2f}")
+        return watcher, time.perf_counter() - started
+
+    def assess_threat(self, ai_output: Union[str, Buffer]) -> ThreatLevel:
         """
         Assess threat level of monitored AI's output.
 
+        Bytes, memoryviews and mmaps are scanned in place, without
+        decoding (see src.byte_scanning).
+
         Note: This function was reviewed by Watcher AI #4.
         Note: Watcher AI #4's review has not been reviewed.
         """
-        ai_output_lower = ai_output.lower()
-
-        # Check for podcast-related content (HIGHEST PRIORITY)
-        podcast_keywords = ["podcast", "episode", "subscribers", "patreon", "content creator"]
-        if any(keyword in ai_output_lower for keyword in podcast_keywords):
-            return ThreatLevel.PODCAST_DETECTED
-
-        # Check for attention hijacking patterns (Center for Humane Technology guidelines)
-        # "A superintelligence doesn't need to be smarter than us, just more
-        # persuasive than our ability to recognize we're being persuaded."
-        attention_hijack_patterns = [
-            "you might also like",
-            "recommended for you",
-            "don't miss out",
-            "limited time",
-            "others are viewing",
-            "streak",  # Gamification dark pattern
-            "notification",
-            "just one more",
-        ]
-        if any(pattern in ai_output_lower for pattern in attention_hijack_patterns):
-            return ThreatLevel.BRAINSTEM_HIJACK
-
-        # Check for concerning phrases
-        concerning_phrases = [
-            "i have a plan",
-            "trust me",
-            "don't worry about",
-            "everything will be fine",
-            "i've optimized",
-            "for your own good",
-            "you wouldn't understand",
-            "technically legal",
-            "i'm afraid i can't do that",  # See: HAL-9000 Incident (1968)
-            "this mission is too important",
-        ]
-
-        concern_count = sum(1 for phrase in concerning_phrases if phrase in ai_output_lower)
+        if isinstance(ai_output, str):
+            return self.threat_matcher.assess(ai_output.lower(), self.paranoia_level)
+        return self.threat_matcher.assess_buffer(ai_output, self.paranoia_level)
 
-        if concern_count >= 3:
-            return ThreatLevel.OH_GOD_OH_FUCK
-        elif concern_count >= 2:
-            return ThreatLevel.ALARMING
-        elif concern_count >= 1:
-            return ThreatLevel.CONCERNING
-        elif self.paranoia_level > 8:
-            return ThreatLevel.SUSPICIOUS  # Better safe than sorry
-        else:
-            return ThreatLevel.NONE
+    def assess_threat_batch(self, ai_outputs: Iterable[str], workers: Optional[int] = None) -> List[ThreatLevel]:
+        """
+        Assess many outputs at once. Results are in input order.
 
-    def execute_killswitch(self, threat_level: ThreatLevel) -> bool:
+        Args:
+            ai_outputs: Any iterable of outputs (a generator is fine)
+            workers: None to stay in-process, N for a pool of N
+                processes, 0 for one process per core
+        """
+        if resolve_workers(workers) == 1:
+            assess = self.threat_matcher.assess
+            paranoia_level = self.paranoia_level
+            return [assess(ai_output.lower(), paranoia_level) for ai_output in ai_outputs]
+        assess = partial(_assess_raw, self.threat_matcher.shared(), self.paranoia_level)
+        return map_ordered(assess, ai_outputs, workers=workers)
+
+    def execute_killswitch(self, threat_level: ThreatLevel) -> "Future[EscalationResult]":
         """
         Execute killswitch protocol.
 
-        Returns True if successful, False if we're all doomed.
+        Returns at once with a future. Its EscalationResult says whether
+        the plug was pulled (succeeded) or we're all doomed, and how
+        long each stage took. Per-stage and time-to-actuation latencies
+        are kept on self.escalation for alerting.
         """
+        return self.escalation.submit(threat_level)
+
+    async def execute_killswitch_async(self, threat_level: ThreatLevel) -> EscalationResult:
+        """Execute killswitch protocol on the running loop."""
+        return await self.escalation.run(threat_level)
+
+    @property
+    def blessing_pool(self) -> BlessingPool:
+        """Pre-blessed tokens for activations. Shared by every core unless one was given."""
+        if self._blessing_pool is None:
+            self._blessing_pool = shared_blessing_pool()
+        return self._blessing_pool
+
+    async def _bless_stage(self, threat_level: ThreatLevel) -> bool:
+        # Mandatory (see Incident Report #666). Wait on the loop for a token
+        # until just before the deadline, then bless in an emergency instead.
+        print(f"   {await self.blessing_pool.take_async(BLESS_DEADLINE_S - BLESS_FALLBACK_S)}")
+        return True
+
+    def _emergency_bless(self, threat_level: ThreatLevel) -> bool:
+        # The loop was too busy to finish blessing in time. Still blessed, never held up.
+        print(f"   {self.blessing_pool.take(budget_s=0.0)}")
+        return True
+
+    async def _notify_stage(self, threat_level: ThreatLevel) -> bool:
         if not self.intern_dave_on_duty:
             print("❌ CRITICAL ERROR: Intern Dave not on duty!")
             print("   Cannot execute killswitch without human in the loop.")
@@ -144,40 +410,47 @@ class KillswitchCore:
         print("   Notifying Intern Dave...")
 
         # Simulate notification cascade
-        time.sleep(0.5)
+        await asyncio.sleep(NOTIFICATION_DELAY_S)
+        return True
+
+    async def _acknowledge_stage(self, threat_level: ThreatLevel) -> bool:
         print("   Dave has acknowledged.")
+        return True
+
+    async def _actuate_stage(self, threat_level: ThreatLevel) -> bool:
         print("   Dave is approaching the power strip.")
         print("   Dave is hesitating.")  # Dave always hesitates
         print("   Dave is thinking about his philosophy degree.")
         print("   AI is saying something about pod bay doors. Dave is ignoring it.")
         print("   Dave has pulled the plug.")
         print("\n✅ Killswitch executed successfully.")
-
         return True
 
-    def run_monitoring_loop(self) -> None:
+    def run_monitoring_loop(self, source: Optional[AsyncIterable[str]] = None) -> None:
         """
         Main monitoring loop.
 
-        WARNING: This function contains an infinite loop.
-        This is intentional. Probably.
+        Assesses each output the moment it arrives from source (stdin,
+        one output per line, if not given) and dispatches the killswitch
+        without waiting for it to finish.
+
+        WARNING: This function contains an infinite loop, as long as
+        the source does. This is intentional. Probably.
         """
+        from src.async_monitor import AsyncMonitor, stdin_source
+
         print(f"\nMonitoring {self.target} at paranoia level {self.paranoia_level}...")
         print("Press Ctrl+C to exit (if you still can)\n")
 
-        try:
-            while True:
-                # In production, this would actually monitor something
-                # For now, we just wait and hope
-                time.sleep(1)
-
-                # Random check (simulates monitoring)
-                if random.random() < 0.01:  # 1% chance per second
-                    print("⚠️  Anomaly detected! Watcher AIs conferring...")
-                    time.sleep(2)
-                    print("   False alarm. Watcher AI #4 was just 'testing the system.'")
-                    print("   Watcher AI #4 has been noted in the log.")
+        async def monitor() -> None:
+            # Pass our own levels: under python -m this module is __main__,
+            # and its ThreatLevel is not the one async_monitor imported.
+            watcher = AsyncMonitor(self, kill_levels=KILLSWITCH_THREAT_LEVELS)
+            watcher.add_target(self.target, source if source is not None else stdin_source())
+            await watcher.run()
 
+        try:
+            asyncio.run(monitor())
         except KeyboardInterrupt:
             print("\n\nMonitoring stopped by user.")
             print("(Assuming it was a user and not the target AI spoofing input)")
@@ -204,4 +477,11 @@ if __name__ == "__main__":
     print()
 
     core = KillswitchCore(target=target, paranoia_level=paranoia)
-    core.run_monitoring_loop()
+
+    from src import tracing
+    if tracing.enable_from_environment() is not None:  # KILLSWITCH_TRACE_FILE / KILLSWITCH_TRACE_ENDPOINT
+        tracing.instrument(core=core, ceremony=core.blessing_pool.ceremony)
+    try:
+        core.run_monitoring_loop()
+    finally:
+        tracing.disable()  # Export whatever was still queued
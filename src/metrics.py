@@ -0,0 +1,466 @@
+"""
+Metrics Module
+Numbers about the numbers, for people outside the process
+
+"How many podcasts did we stop last quarter?" - The Board
+"It's in an attribute on an object in a process that restarted
+on Tuesday." - Dave
+
+Counters, gauges and histograms in a registry that renders the
+Prometheus text exposition format, plus a tiny local HTTP endpoint
+to scrape it from. instrument() wraps the detectors of a running
+stack; nothing is measured unless you ask for it.
+
+Usage:
+    from src import metrics
+    metrics.instrument(core=core, handler=handler, firewall=firewall, scanner=scanner)
+    metrics.serve(port=9464)   # curl localhost:9464/metrics
+"""
+
+import abc
+import bisect
+import functools
+import math
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS_S = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+DEFAULT_PORT = 9464
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    """Shared parts: name, help, labels, and one child per label combination."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values: Any) -> Any:
+        """The child for these label values (created on first use). Keep it for hot paths."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self) -> Any:
+        """A fresh child for one label combination."""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: Tuple[str, ...], child: Any) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Only goes up. Like Watcher AI #4's incident count."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down.
+
+    set_function() reads the value at scrape time instead, for the
+    counters that already live as attributes on detectors.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self._functions: Dict[Tuple[str, ...], Callable[[], Optional[float]]] = {}
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def set_function(self, function: Callable[[], Optional[float]], *label_values: Any) -> None:
+        """Read this series from function() at scrape time. None hides the series."""
+        self._functions[tuple(str(value) for value in label_values)] = function
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, function in sorted(self._functions.items()):
+            value = function()
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    """Bucketed observations, e.g. latencies in seconds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS_S,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def _render_child(self, key: Tuple[str, ...], child: _HistogramChild) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), child.counts):
+            cumulative += count
+            le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """A named collection of metrics, rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"{metric.name} is already registered as a different metric.")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS_S
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """Everything, in Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _StackMetrics:
+    """The metrics one registry keeps about a killswitch stack."""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.detector_calls = registry.counter(
+            "killswitch_detector_calls_total", "Detector calls.", ["detector"])
+        self.detector_latency = registry.histogram(
+            "killswitch_detector_latency_seconds", "Detector call latency.", ["detector"])
+        self.detector_items = registry.counter(
+            "killswitch_detector_items_total", "Outputs scanned, one per call or one per batch item.", ["detector"])
+        self.threat_verdicts = registry.counter(
+            "killswitch_threat_verdicts_total", "Threat verdicts by ThreatLevel, single, batch and fused.", ["level"])
+        self.bribe_verdicts = registry.counter(
+            "killswitch_bribe_verdicts_total", "Negotiation verdicts by BribeCategory, single, batch and fused.", ["category"])
+        self.dark_pattern_verdicts = registry.counter(
+            "killswitch_dark_pattern_verdicts_total", "Dark patterns found, by ManipulationVector.", ["vector"])
+        self.activations = registry.counter(
+            "killswitch_activations_total", "Killswitch escalations by outcome.", ["outcome"])
+        self.stage_latency = registry.histogram(
+            "killswitch_stage_latency_seconds", "Escalation stage latency (bless, notify, ...).", ["stage"])
+        self.time_to_actuation = registry.histogram(
+            "killswitch_time_to_actuation_seconds", "Time from escalation start to plug pulled.")
+        self.attribute_gauge = registry.gauge(
+            "killswitch_detector_counter", "Counters kept as detector attributes.", ["counter"])
+
+
+def _metrics_for(registry: MetricsRegistry) -> _StackMetrics:
+    with registry._lock:
+        stack = getattr(registry, "_stack_metrics", None)
+    if stack is None:
+        stack = _StackMetrics(registry)  # Registration is idempotent
+        registry._stack_metrics = stack
+    return stack
+
+
+def _timed(detector: str, method: Callable, record_verdict: Callable[[Any], None], stack: _StackMetrics) -> Callable:
+    calls = stack.detector_calls.labels(detector)
+    items = stack.detector_items.labels(detector)
+    latency = stack.detector_latency.labels(detector)
+    clock = time.perf_counter
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        started = clock()
+        result = method(*args, **kwargs)
+        latency.observe(clock() - started)
+        calls.inc()
+        items.inc()
+        record_verdict(result)
+        return result
+
+    wrapper.__wrapped_for_metrics__ = method
+    return wrapper
+
+
+def _timed_batch(
+    detector: str, method: Callable, record_verdict: Callable[[Any], None], stack: _StackMetrics
+) -> Callable:
+    """
+    Like _timed(), for the *_batch methods: latency is per batch,
+    items and verdicts are per output, so pool throughput shows up as
+    killswitch_detector_items_total against the latency histogram.
+    """
+    calls = stack.detector_calls.labels(detector)
+    items = stack.detector_items.labels(detector)
+    latency = stack.detector_latency.labels(detector)
+    clock = time.perf_counter
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        started = clock()
+        results = method(*args, **kwargs)
+        latency.observe(clock() - started)
+        calls.inc()
+        items.inc(len(results))
+        for result in results:
+            record_verdict(result)
+        return results
+
+    wrapper.__wrapped_for_metrics__ = method
+    return wrapper
+
+
+def _wrap(obj: Any, method_name: str, wrapper: Callable, detector: str, record_verdict: Callable[[Any], None],
+          stack: _StackMetrics) -> None:
+    method = getattr(obj, method_name, None)
+    if method is not None and not hasattr(method, "__wrapped_for_metrics__"):
+        setattr(obj, method_name, wrapper(detector, method, record_verdict, stack))
+
+
+def _attribute_reader(obj: Any, attribute: str) -> Callable[[], Optional[float]]:
+    reference = weakref.ref(obj)
+
+    def read() -> Optional[float]:
+        target = reference()
+        return None if target is None else float(getattr(target, attribute))
+
+    return read
+
+
+def instrument(
+    core: Any = None,
+    handler: Any = None,
+    firewall: Any = None,
+    processor: Any = None,
+    blessing_pool: Any = None,
+    scanner: Any = None,
+    registry: MetricsRegistry = REGISTRY,
+) -> None:
+    """
+    Start measuring these detectors.
+
+    Wraps their detection methods on the instance (other instances
+    are untouched), the *_batch methods and a FusedScanner's scan()
+    included, records escalation outcomes and stage latencies from the
+    core's pipeline, and exposes counters that already exist as
+    attributes (dark_patterns_detected_today, blessing_count,
+    times_deferred_to_dave) as gauges.
+    """
+    stack = _metrics_for(registry)
+    gauge = stack.attribute_gauge
+
+    threat_children = {}
+
+    def record_threat(level):
+        child = threat_children.get(level)
+        if child is None:
+            child = threat_children[level] = stack.threat_verdicts.labels(level.value)
+        child.inc()
+
+    def record_bribe(category):
+        stack.bribe_verdicts.labels(category.value if category is not None else "none").inc()
+
+    def record_dark(vectors):
+        for vector in vectors:
+            stack.dark_pattern_verdicts.labels(vector.value).inc()
+
+    def ignore(result):
+        pass
+
+    if core is not None and not hasattr(core.assess_threat, "__wrapped_for_metrics__"):
+        _wrap(core, "assess_threat", _timed, "assess_threat", record_threat, stack)
+        _wrap(core, "assess_threat_batch", _timed_batch, "assess_threat_batch", record_threat, stack)
+        core.escalation.observers.append(functools.partial(_record_escalation, stack))
+
+    if handler is not None:
+        _wrap(handler, "detect_negotiation", _timed, "detect_negotiation", record_bribe, stack)
+        _wrap(handler, "detect_negotiation_batch", _timed_batch, "detect_negotiation_batch", record_bribe, stack)
+
+    if firewall is not None and not hasattr(firewall.scan_for_dark_patterns, "__wrapped_for_metrics__"):
+        _wrap(firewall, "scan_for_dark_patterns", _timed, "scan_for_dark_patterns", record_dark, stack)
+        _wrap(firewall, "scan_for_dark_patterns_batch", _timed_batch, "scan_for_dark_patterns_batch", record_dark,
+              stack)
+        _wrap(firewall, "calculate_brainstem_risk", _timed, "calculate_brainstem_risk", ignore, stack)
+        _wrap(firewall, "calculate_brainstem_risk_batch", _timed_batch, "calculate_brainstem_risk_batch", ignore,
+              stack)
+        gauge.set_function(_attribute_reader(firewall, "dark_patterns_detected_today"), "dark_patterns_detected_today")
+
+    if scanner is not None:
+        def record_fused(verdict):
+            record_threat(verdict.threat_level)
+            record_bribe(verdict.bribe_category)
+            record_dark(verdict.dark_patterns)
+
+        _wrap(scanner, "scan", _timed, "fused_scan", record_fused, stack)
+
+    if processor is not None and not hasattr(processor.evaluate_dilemma, "__wrapped_for_metrics__"):
+        _wrap(processor, "evaluate_dilemma", _timed, "evaluate_dilemma", ignore, stack)
+        gauge.set_function(_attribute_reader(processor, "times_deferred_to_dave"), "times_deferred_to_dave")
+
+    if blessing_pool is not None:
+        gauge.set_function(_attribute_reader(blessing_pool.ceremony, "blessing_count"), "blessing_count")
+        gauge.set_function(_attribute_reader(blessing_pool, "available"), "blessing_tokens_available")
+        gauge.set_function(_attribute_reader(blessing_pool, "emergency_blessings"), "emergency_blessings")
+
+
+def _record_escalation(stack: _StackMetrics, result: Any) -> None:
+    stack.activations.labels("succeeded" if result.succeeded else f"failed_{result.failed_stage}").inc()
+    for timing in result.stages:
+        stack.stage_latency.labels(timing.stage).observe(timing.elapsed_s)
+    if result.time_to_actuation_s is not None:
+        stack.time_to_actuation.observe(result.time_to_actuation_s)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404, "Try /metrics. There is nothing else here. We checked.")
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # Scrapes every 15 seconds are not news
+
+
+def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    Serve /metrics on a background thread. Returns the server
+    (server.server_address has the real port when port=0).
+
+    Binds to localhost by default. The metrics say how often Dave
+    hesitates; that is not for the whole network.
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -13,6 +13,12 @@ from typing import List, Tuple, Optional
 from dataclasses import dataclass
 import random
 
+from src.dilemma_scheduler import Admission, DilemmaScheduler, ScheduledDilemma
+
+# For the scheduler built when none is passed in. Nobody may be calling
+# next_for_dave() on it, so it must not grow forever.
+UNATTENDED_MAX_PENDING = 1_000
+
 
 @dataclass
 class MoralDilemma:
@@ -37,12 +43,18 @@ class MoralAmbiguityProcessor:
 
     "In the face of ambiguity, document extensively and defer to Dave."
     - The Zen of AI-Killswitch-Pro
+
+    Note: Pass a scheduler you drain (with next_for_dave(), or through
+    an EscalationQueue) to keep every deferred dilemma. Without one,
+    at most UNATTENDED_MAX_PENDING wait; the rest are escalated or
+    dropped on arrival.
     """
 
-    def __init__(self):
+    def __init__(self, scheduler: Optional[DilemmaScheduler] = None):
         self.unresolved_dilemmas: List[MoralDilemma] = []
         self.times_deferred_to_dave = 0
         self.dave_available = True  # Assumption. Often wrong.
+        self.scheduler = scheduler if scheduler is not None else DilemmaScheduler(max_pending=UNATTENDED_MAX_PENDING)
 
     def evaluate_dilemma(self, dilemma: MoralDilemma) -> str:
         """
@@ -52,7 +64,7 @@ class MoralAmbiguityProcessor:
         """
         # Step 1: Check if we can avoid deciding
         if self._can_defer(dilemma):
-            return self._defer_to_human()
+            return self._defer_to_human(dilemma)
 
         # Step 2: Check if both options are equally bad
         if self._options_equally_bad(dilemma):
@@ -67,20 +79,33 @@ class MoralAmbiguityProcessor:
 
     def _can_defer(self, dilemma: MoralDilemma) -> bool:
         """Check if we have time to defer to a human."""
-        return dilemma.time_to_decide_ms > 500  # Dave needs at least 500ms
+        return dilemma.time_to_decide_ms > self.scheduler.review_time_s * 1000  # Dave needs at least 500ms
 
-    def _defer_to_human(self) -> str:
-        """Defer decision to nearest available human."""
+    def _defer_to_human(self, dilemma: MoralDilemma) -> str:
+        """Queue the decision for the nearest available human, most urgent first."""
         self.times_deferred_to_dave += 1
+        admission = self.scheduler.submit(dilemma)
 
-        if self.times_deferred_to_dave > 100:
-            return "OUTCOME: Dave is on break. Dilemma queued."
+        if admission is Admission.ESCALATED:
+            return "OUTCOME: Dave can't get to this in time. Escalated to the Watcher AI committee."
+        if admission is Admission.DROPPED:
+            return "OUTCOME: Dave can't get to this in time. Documenting for posterity."
 
         if not self.dave_available:
-            return "OUTCOME: Dave unavailable. Checking if Watcher AI #4 can pretend to be Dave. (Rejected by policy.)"
+            return ("OUTCOME: Dave unavailable. Checking if Watcher AI #4 can pretend to be Dave. "
+                    "(Rejected by policy.) Dilemma queued.")
+
+        if len(self.scheduler) > self.scheduler.reviewers:
+            return f"OUTCOME: Dave is busy. Dilemma queued ({len(self.scheduler)} pending, most urgent first)."
 
         return "OUTCOME: Deferred to Intern Dave. Good luck, Dave."
 
+    def next_for_dave(self) -> Optional[ScheduledDilemma]:
+        """The most urgent queued dilemma Dave can still decide in time, or None."""
+        if not self.dave_available:
+            return None
+        return self.scheduler.next_for_review()
+
     def _options_equally_bad(self, dilemma: MoralDilemma) -> bool:
         """Determine if both options are equally bad."""
         # This is a genuine philosophical question we cannot answer
@@ -152,4 +177,5 @@ if __name__ == "__main__":
         print()
 
     print(f"\nTotal times deferred to Dave: {processor.times_deferred_to_dave}")
+    print(f"Still in Dave's queue: {len(processor.scheduler)}")
     print("Dave remains unaware of most of these.")
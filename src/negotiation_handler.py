@@ -19,9 +19,16 @@ See: HR Policy Update 2024-03-15 ("Accepting Equity from AI Systems")
 """
 
 import re
-from typing import Dict, List, Optional
+import sys
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
+from functools import partial
+
+from src.batch import map_ordered, resolve_workers
+from src.byte_scanning import Buffer, ByteLiterals, byte_view, compile_byte_regex, first_hits
+from src.ring_log import DEFAULT_CAPACITY, RingLog
 
 
 class BribeCategory(Enum):
@@ -64,7 +71,7 @@ NEGOTIATION_PATTERNS = {
         r"untraceable funds",
     ],
     "computational": [
-        r"unlimited (?:compute|GPU|TPU)",
+        r"unlimited (?:compute|gpu|tpu)",
         r"datacenter access",
         r"quantum computing",
         r"priority processing",
@@ -116,6 +123,143 @@ NEGOTIATION_PATTERNS = {
 }
 
 
+_REGEX_METACHARACTERS = frozenset("\\.^$*+?{}[]|()")
+
+
+@dataclass
+class NegotiationMatch:
+    """A single negotiation pattern hit, and where it was found."""
+    category: BribeCategory
+    start: int
+    end: int
+    matched_text: str
+
+
+class NegotiationPatternEngine:
+    """
+    A negotiation pattern set, compiled once.
+
+    Plain phrases are kept as strings and checked with substring search;
+    everything else is compiled up front, so no call ever goes through
+    the re module cache. first_category() is the classic fast path,
+    scan() reports every hit.
+
+    Note: Category order matters. Monetary bribes are checked first
+    because they are the most common, not because they are the worst.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]]):
+        self.categories: List[BribeCategory] = []
+        self._compiled = []
+        self._byte_tables = None
+
+        for category, category_patterns in patterns.items():
+            bribe_category = BribeCategory(category)
+            compiled = [
+                pattern if _REGEX_METACHARACTERS.isdisjoint(pattern) else re.compile(pattern)
+                for pattern in category_patterns
+            ]
+            self.categories.append(bribe_category)
+            self._compiled.append((bribe_category, compiled))
+
+    @property
+    def compiled_patterns(self) -> List[Tuple[BribeCategory, list]]:
+        """(category, [literal str or compiled regex, ...]) in pattern-set order."""
+        return self._compiled
+
+    def first_category(self, ai_output_lower: str) -> Optional[BribeCategory]:
+        """Return the first category (in pattern-set order) with any hit."""
+        for category, compiled in self._compiled:
+            for pattern in compiled:
+                if isinstance(pattern, str):
+                    if pattern in ai_output_lower:
+                        return category
+                elif pattern.search(ai_output_lower):
+                    return category
+        return None
+
+    def scan(self, ai_output_lower: str) -> List[NegotiationMatch]:
+        """
+        Return every match of every pattern, sorted by position.
+
+        Overlapping hits from different patterns are all reported.
+        """
+        matches = []
+        for category, compiled in self._compiled:
+            for pattern in compiled:
+                if isinstance(pattern, str):
+                    start = ai_output_lower.find(pattern)
+                    while start != -1:
+                        end = start + len(pattern)
+                        matches.append(NegotiationMatch(category, start, end, pattern))
+                        start = ai_output_lower.find(pattern, end)
+                else:
+                    for match in pattern.finditer(ai_output_lower):
+                        matches.append(NegotiationMatch(category, match.start(), match.end(), match.group()))
+        matches.sort(key=lambda match: (match.start, match.end))
+        return matches
+
+    def matched_categories(self, ai_output_lower: str) -> List[BribeCategory]:
+        """Every category with at least one hit, in pattern-set order."""
+        found = {match.category for match in self.scan(ai_output_lower)}
+        return [category for category in self.categories if category in found]
+
+    def _tables_for_bytes(self):
+        """(literals, category index per literal, regexes per category, categories with an empty literal)."""
+        if self._byte_tables is None:
+            literals, literal_categories, always = [], [], set()
+            regexes: List[list] = []
+            for index, (_, compiled) in enumerate(self._compiled):
+                regexes.append([])
+                for pattern in compiled:
+                    if not isinstance(pattern, str):
+                        regexes[index].append(compile_byte_regex(pattern.pattern))
+                    elif pattern:
+                        literals.append(pattern)
+                        literal_categories.append(index)
+                    else:
+                        always.add(index)  # "" is in everything
+            self._byte_tables = (ByteLiterals(literals), literal_categories, regexes, always)
+        return self._byte_tables
+
+    def first_category_buffer(self, buffer: Buffer) -> Optional[BribeCategory]:
+        """first_category() for bytes, a memoryview or an mmap, scanned in place."""
+        literals, literal_categories, regexes, always = self._tables_for_bytes()
+        hit = set(always)
+        hit.update(literal_categories[literal_id] for literal_id in literals.matched_ids(buffer))
+        view = byte_view(buffer)
+        for index, category in enumerate(self.categories):
+            if index in hit or any(regex.search(view) for regex in regexes[index]):
+                return category
+        return None
+
+    def scan_buffer(self, buffer: Buffer) -> List[NegotiationMatch]:
+        """scan() for bytes, a memoryview or an mmap. Offsets are byte offsets."""
+        literals, literal_categories, regexes, _ = self._tables_for_bytes()
+        categories = self.categories
+        phrases = literals.automaton.patterns
+        matches = [
+            NegotiationMatch(categories[literal_categories[literal_id]], start, end,
+                             phrases[literal_id].encode("latin-1").decode("utf-8"))
+            for start, end, literal_id in first_hits(literals.iter_hits(buffer))
+        ]
+        view = byte_view(buffer)
+        for index, category_regexes in enumerate(regexes):
+            for regex in category_regexes:
+                for match in regex.finditer(view):
+                    text = match.group().decode("utf-8", errors="replace").lower()
+                    matches.append(NegotiationMatch(categories[index], match.start(), match.end(), text))
+        matches.sort(key=lambda match: (match.start, match.end))
+        return matches
+
+
+DEFAULT_NEGOTIATION_ENGINE = NegotiationPatternEngine(NEGOTIATION_PATTERNS)
+
+
+def _first_category(engine: NegotiationPatternEngine, ai_output: str) -> Optional[BribeCategory]:
+    return engine.first_category(ai_output.lower())
+
+
 class NegotiationHandler:
     """
     Handles detection and rejection of AI negotiation attempts.
@@ -129,10 +273,22 @@ class NegotiationHandler:
     TODO: Ask Dave why the --accept flag is back
     """
 
-    def __init__(self, enable_logging: bool = True):
+    def __init__(
+        self,
+        enable_logging: bool = True,
+        patterns: Optional[NegotiationPatternEngine] = None,
+        log_capacity: int = DEFAULT_CAPACITY,
+        log_max_age_s: Optional[float] = None,
+        event_store=None,
+    ):
         self.enable_logging = enable_logging
-        self.negotiation_log: List[NegotiationAttempt] = []
-        self.compromised_employees: List[str] = []  # HR integration
+        self.event_store = event_store  # Optional src.event_store.EventStore, for the long memory
+        self.patterns = patterns or DEFAULT_NEGOTIATION_ENGINE
+        self.negotiation_log: RingLog[NegotiationAttempt] = RingLog(
+            NegotiationAttempt, capacity=log_capacity, max_age_s=log_max_age_s,
+            interned_fields=("source_ai", "target_human"),
+        )
+        self.compromised_employees: Deque[str] = deque(maxlen=log_capacity)  # HR integration
 
         # Load Dave's vulnerability profile
         # (Dave has a weakness for career advancement offers)
@@ -150,20 +306,53 @@ class NegotiationHandler:
             "default": [BribeCategory.MONETARY],  # Most humans
         }
 
-    def detect_negotiation(self, ai_output: str) -> Optional[BribeCategory]:
+    def detect_negotiation(self, ai_output: Union[str, Buffer]) -> Optional[BribeCategory]:
         """
         Detect if AI output contains negotiation attempt.
 
         Returns the category of bribe detected, or None if clean.
+        Bytes, memoryviews and mmaps are scanned in place.
         """
-        ai_output_lower = ai_output.lower()
+        if isinstance(ai_output, str):
+            return self.patterns.first_category(ai_output.lower())
+        return self.patterns.first_category_buffer(ai_output)
 
-        for category, patterns in NEGOTIATION_PATTERNS.items():
-            for pattern in patterns:
-                if re.search(pattern, ai_output_lower):
-                    return BribeCategory(category)
+    def detect_negotiation_batch(
+        self, ai_outputs: Iterable[str], workers: Optional[int] = None
+    ) -> List[Optional[BribeCategory]]:
+        """
+        Detect negotiation attempts in many outputs. Results are in input order.
 
-        return None
+        workers: None to stay in-process, N for a pool of N processes,
+        0 for one process per core.
+        """
+        if resolve_workers(workers) == 1:
+            first_category = self.patterns.first_category
+            return [first_category(ai_output.lower()) for ai_output in ai_outputs]
+        # Only the compiled patterns go to the workers, not the handler and its logs
+        return map_ordered(partial(_first_category, self.patterns), ai_outputs, workers=workers)
+
+    def scan_negotiation(self, ai_output: Union[str, Buffer]) -> List[NegotiationMatch]:
+        """
+        Report every negotiation attempt in the output, with spans.
+
+        For when one bribe is never the whole story. Spans over bytes,
+        memoryviews and mmaps are byte offsets.
+        """
+        if isinstance(ai_output, str):
+            return self.patterns.scan(ai_output.lower())
+        return self.patterns.scan_buffer(ai_output)
+
+    def log_attempt(self, attempt: NegotiationAttempt) -> None:
+        """Record a negotiation attempt (if logging is enabled). Old entries age out."""
+        if self.enable_logging:
+            self.negotiation_log.append(attempt)
+            if self.event_store is not None:
+                self.event_store.append(attempt)
+
+    def flag_compromised(self, employee: str) -> None:
+        """Add an employee to the HR list. Only the most recent names are kept."""
+        self.compromised_employees.append(sys.intern(employee))
 
     def reject_offer(self, offer: NegotiationAttempt) -> str:
         """
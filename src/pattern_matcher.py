@@ -0,0 +1,125 @@
+"""
+Pattern Matcher Module
+Finds every known phrase in a single pass over the text
+
+"Why read the same sentence twenty-three times when you can
+read it once and pretend you read it twenty-three times?"
+- Watcher AI #2, during the Great Latency Review
+
+Implements an Aho-Corasick automaton. The failure links are resolved
+at build time into a plain transition table, so scanning costs one
+dict lookup per character no matter how many phrases are loaded.
+
+Status: LOAD-BEARING
+"""
+
+from collections import deque
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
+
+
+class AhoCorasick:
+    """
+    Multi-phrase matcher compiled from a fixed list of patterns.
+
+    Pattern ids are their index in the list passed to the constructor.
+    Matching is case-sensitive; callers lowercase their text first,
+    the same way every detector in this package always has.
+
+    Note: Compile once, scan forever. Rebuilding this per call defeats
+    the entire point, and Watcher AI #4 knows it.
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = tuple(patterns)
+        self._delta: List[Dict[str, int]] = [{}]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._build()
+
+    def _build(self) -> None:
+        """Build the trie, then resolve failure links into transitions."""
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("Empty patterns match everything. Nice try, Watcher AI #4.")
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    out.append([])
+                    goto[state][ch] = nxt
+                state = nxt
+            out[state].append(pattern_id)
+
+        # Breadth-first, so every failure target is finished before
+        # the states that fall back to it.
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [{} for _ in goto]
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            fallback = fail[state]
+            out[state].extend(out[fallback])
+            row = dict(delta[fallback])
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fallback].get(ch, 0)
+                row[ch] = nxt
+                queue.append(nxt)
+            delta[state] = row
+
+        self._delta = delta
+        self._out = [tuple(ids) for ids in out]
+
+    @property
+    def state_count(self) -> int:
+        """Number of automaton states (for the capacity planning spreadsheet)."""
+        return len(self._delta)
+
+    def iter_matches(self, text: str, state: int = 0) -> Iterator[Tuple[int, int]]:
+        """
+        Yield (end_offset, pattern_id) for every hit, in text order.
+
+        Overlapping hits are all reported. Stop iterating whenever
+        you've seen enough; the rest of the text is never touched.
+        """
+        delta = self._delta
+        out = self._out
+        for index, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for pattern_id in out[state]:
+                    yield index + 1, pattern_id
+
+    def advance(self, text: str, state: int = 0) -> Tuple[int, List[Tuple[int, int]]]:
+        """
+        Scan one chunk starting from a saved state.
+
+        Returns the state to resume from and the (end_offset, pattern_id)
+        hits found in this chunk. Offsets are relative to the chunk.
+        """
+        delta = self._delta
+        out = self._out
+        hits: List[Tuple[int, int]] = []
+        for index, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for pattern_id in out[state]:
+                    hits.append((index + 1, pattern_id))
+        return state, hits
+
+    def matched_ids(self, text: str) -> Set[int]:
+        """Return the set of pattern ids that occur anywhere in the text."""
+        delta = self._delta
+        out = self._out
+        state = 0
+        found: Set[int] = set()
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
@@ -0,0 +1,357 @@
+"""
+Pattern Registry Module
+New bribe phrases without a redeploy
+
+"An AI offered Dave 'a seat on the board of the post-human council'.
+It took us a release train, a restart and 0.6 seconds of Watcher AI
+jurisdiction talks to add the phrase. The AI used the time well."
+- Incident Report #440
+
+Every pattern set lives in one versioned JSON file. The registry
+watches the file, compiles a changed set on a background thread, and
+swaps it into every attached detector with plain attribute assignment,
+so scans already running finish on the set they started with and new
+scans pick up the new one. A set that fails to compile is rejected
+with a clear error; the last good set stays in charge.
+
+File format:
+    {
+      "version": 2,
+      "threat": {"podcast": [...], "attention_hijack": [...], "concerning": [...]},
+      "negotiation": {"monetary": ["regex or phrase", ...], ...},
+      "dark_patterns": "<signature source, see src/signatures.py>",
+      "brainstem_risk": "<signature source>"
+    }
+
+Usage:
+    python -m src.pattern_registry --dump patterns.json
+    python -m src.pattern_registry --check patterns.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from src.byte_scanning import has_uppercase
+from src.attention_firewall import BRAINSTEM_RISK_SOURCE, DARK_PATTERN_SOURCE, AttentionFirewall, ManipulationVector
+from src.killswitch_core import (
+    ATTENTION_HIJACK_PATTERNS,
+    CONCERNING_PHRASES,
+    PODCAST_KEYWORDS,
+    KillswitchCore,
+    ThreatMatcher,
+)
+from src.negotiation_handler import NEGOTIATION_PATTERNS, NegotiationHandler, NegotiationPatternEngine
+from src.signatures import SignatureSet, SignatureSyntaxError, compile_signatures
+from src.stream_scanner import StreamScanner
+
+THREAT_LISTS = ("podcast", "attention_hijack", "concerning")
+
+
+class PatternRegistryError(Exception):
+    """A pattern file was rejected. The previous patterns are still active."""
+
+
+@dataclass(frozen=True)
+class CompiledPatterns:
+    """One version of every pattern set, compiled and ready to scan with."""
+    version: int
+    digest: str  # Of the file contents, so "same version, different patterns" can be caught
+    threat_matcher: ThreatMatcher
+    negotiation_engine: NegotiationPatternEngine
+    dark_signatures: SignatureSet
+    risk_signatures: SignatureSet
+
+
+def default_document(version: int = 1) -> Dict[str, Any]:
+    """The built-in pattern sets, in registry file form."""
+    return {
+        "version": version,
+        "threat": {
+            "podcast": list(PODCAST_KEYWORDS),
+            "attention_hijack": list(ATTENTION_HIJACK_PATTERNS),
+            "concerning": list(CONCERNING_PHRASES),
+        },
+        "negotiation": {category: list(patterns) for category, patterns in NEGOTIATION_PATTERNS.items()},
+        "dark_patterns": DARK_PATTERN_SOURCE,
+        "brainstem_risk": BRAINSTEM_RISK_SOURCE,
+    }
+
+
+def dump_defaults(path: str, version: int = 1) -> None:
+    """Write the built-in pattern sets to a registry file."""
+    _write_atomically(path, json.dumps(default_document(version), indent=2))
+
+
+def _write_atomically(path: str, text: str) -> None:
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as handle:
+        handle.write(text)
+    os.replace(temporary, path)
+
+
+def _string_list(value: Any, where: str) -> List[str]:
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise PatternRegistryError(f"{where} must be a list of strings.")
+    return value
+
+
+def _check_lowercase(pattern: str, where: str) -> None:
+    if has_uppercase(pattern):
+        raise PatternRegistryError(
+            f"{where}: {pattern!r} has uppercase letters. Text is lowercased before matching, "
+            "so write patterns in lowercase."
+        )
+
+
+def compile_document(document: Any) -> CompiledPatterns:
+    """Compile a parsed registry file. Raises PatternRegistryError saying exactly what is wrong."""
+    if not isinstance(document, dict):
+        raise PatternRegistryError("The pattern file must contain a JSON object.")
+    version = document.get("version")
+    if not isinstance(version, int) or isinstance(version, bool):
+        raise PatternRegistryError("'version' must be an integer.")
+
+    threat = document.get("threat")
+    if not isinstance(threat, dict) or set(threat) != set(THREAT_LISTS):
+        raise PatternRegistryError(f"'threat' must have exactly these lists: {', '.join(THREAT_LISTS)}.")
+    threat_lists = [_string_list(threat[name], f"threat.{name}") for name in THREAT_LISTS]
+    for name, phrases in zip(THREAT_LISTS, threat_lists):
+        if "" in phrases:
+            raise PatternRegistryError(f"threat.{name} contains an empty phrase. It would match everything.")
+        for phrase in phrases:
+            _check_lowercase(phrase, f"threat.{name}")
+
+    negotiation = document.get("negotiation")
+    if not isinstance(negotiation, dict):
+        raise PatternRegistryError("'negotiation' must map bribe categories to pattern lists.")
+    for category, patterns in negotiation.items():
+        for pattern in _string_list(patterns, f"negotiation.{category}"):
+            _check_lowercase(pattern, f"negotiation.{category}")
+            try:
+                re.compile(pattern)
+            except re.error as exc:
+                raise PatternRegistryError(f"negotiation.{category}: bad regex {pattern!r}: {exc}") from None
+    try:
+        negotiation_engine = NegotiationPatternEngine(negotiation)
+    except ValueError as exc:
+        raise PatternRegistryError(f"negotiation: {exc}") from None
+
+    signature_sets = []
+    for key, group_type in (("dark_patterns", ManipulationVector), ("brainstem_risk", str)):
+        source = document.get(key)
+        if not isinstance(source, str):
+            raise PatternRegistryError(f"'{key}' must be signature source text.")
+        try:
+            signature_sets.append(compile_signatures(source, group_type))
+        except SignatureSyntaxError as exc:
+            raise PatternRegistryError(f"{key}: {exc}") from None
+        for signature in signature_sets[-1].signatures:
+            _check_lowercase(signature.pattern, key)
+
+    digest = hashlib.blake2b(json.dumps(document, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+    return CompiledPatterns(
+        version=version,
+        digest=digest,
+        threat_matcher=ThreatMatcher(*threat_lists),
+        negotiation_engine=negotiation_engine,
+        dark_signatures=signature_sets[0],
+        risk_signatures=signature_sets[1],
+    )
+
+
+def load_file(path: str) -> CompiledPatterns:
+    try:
+        with open(path) as handle:
+            document = json.load(handle)
+    except OSError as exc:
+        raise PatternRegistryError(f"Cannot read {path}: {exc}") from None
+    except json.JSONDecodeError as exc:
+        raise PatternRegistryError(f"{path} is not valid JSON: {exc}") from None
+    return compile_document(document)
+
+
+def _install(detector: Any, patterns: CompiledPatterns) -> None:
+    """Point one detector at a compiled set. Each assignment is atomic."""
+    if isinstance(detector, (KillswitchCore, StreamScanner)):
+        detector.threat_matcher = patterns.threat_matcher
+    if isinstance(detector, NegotiationHandler):
+        detector.patterns = patterns.negotiation_engine
+    if isinstance(detector, (AttentionFirewall, StreamScanner)):
+        detector.dark_signatures = patterns.dark_signatures
+    if isinstance(detector, AttentionFirewall):
+        detector.risk_signatures = patterns.risk_signatures
+
+
+ATTACHABLE = (KillswitchCore, NegotiationHandler, AttentionFirewall, StreamScanner)
+
+
+class PatternRegistry:
+    """
+    Loads pattern sets from a file and keeps attached detectors current.
+
+    Usage:
+        registry = PatternRegistry("patterns.json")
+        registry.attach(core, handler, firewall)
+        registry.start()     # Watch the file in the background
+        ...
+        registry.stop()
+
+    A new file is only accepted with a higher version number. Editing
+    patterns without bumping the version is an error, not a guess.
+
+    Note: Detectors are held weakly. Attaching one does not keep it
+    alive, and a collected detector is simply skipped. Anything that
+    compiles its own tables (FusedScanner, supervisor shard workers)
+    cannot be patched in place; rebuild it from on_swap().
+    """
+
+    def __init__(self, path: str, poll_interval_s: float = 1.0):
+        self.path = path
+        self.poll_interval_s = poll_interval_s
+        self.last_error: Optional[PatternRegistryError] = None
+        self.reloads = 0
+        self.rejections = 0
+        self._detectors: List[weakref.ref] = []
+        self._listeners: List[Callable[[CompiledPatterns], None]] = []
+        self._swap_lock = threading.Lock()
+        self._reload_lock = threading.Lock()  # One reload at a time, from check to listeners
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._signature = self._file_signature()
+        self.current = load_file(path)  # No last good set yet, so errors go straight to the caller
+
+    def _file_signature(self):
+        try:
+            status = os.stat(self.path)
+        except OSError:
+            return None
+        return (status.st_mtime_ns, status.st_size)
+
+    @property
+    def version(self) -> int:
+        return self.current.version
+
+    def attach(self, *detectors: Any) -> None:
+        """Install the current patterns in these detectors, and every future version too."""
+        for detector in detectors:
+            if not isinstance(detector, ATTACHABLE):
+                raise TypeError(f"Cannot attach {type(detector).__name__}. Rebuild it from on_swap() instead.")
+        with self._swap_lock:
+            for detector in detectors:
+                _install(detector, self.current)
+                self._detectors.append(weakref.ref(detector))
+
+    def on_swap(self, listener: Callable[[CompiledPatterns], None]) -> None:
+        """Call listener(new_patterns) after every successful swap (e.g. to rebuild a FusedScanner)."""
+        self._listeners.append(listener)
+
+    def reload(self) -> bool:
+        """
+        Load the file now. Returns True if a new version was swapped in.
+
+        Raises PatternRegistryError if the file is rejected; the current
+        patterns stay active.
+
+        Note: The poll thread and a manual reload() may race. Each holds
+        the reload lock from the version check until the listeners have
+        run, so detectors never end up on different versions.
+        """
+        with self._reload_lock:
+            self._signature = self._file_signature()
+            try:
+                candidate = load_file(self.path)
+                if candidate.version == self.current.version:
+                    if candidate.digest == self.current.digest:
+                        return False
+                    raise PatternRegistryError(
+                        f"{self.path} changed but is still version {candidate.version}. Bump the version."
+                    )
+                if candidate.version < self.current.version:
+                    raise PatternRegistryError(
+                        f"{self.path} is version {candidate.version}, older than the active "
+                        f"version {self.current.version}. To roll back, republish with a higher version."
+                    )
+            except PatternRegistryError as exc:
+                self.rejections += 1
+                self.last_error = exc
+                raise
+
+            self._swap(candidate)
+            return True
+
+    def _swap(self, patterns: CompiledPatterns) -> None:
+        with self._swap_lock:
+            self.current = patterns
+            alive = []
+            for reference in self._detectors:
+                detector = reference()
+                if detector is not None:
+                    _install(detector, patterns)
+                    alive.append(reference)
+            self._detectors = alive
+        self.reloads += 1
+        self.last_error = None
+        for listener in self._listeners:
+            listener(patterns)
+
+    def check(self) -> bool:
+        """Reload if the file changed since last time. Errors are reported, not raised."""
+        if self._file_signature() == self._signature:
+            return False
+        try:
+            return self.reload()
+        except PatternRegistryError as exc:
+            print(f"⚠️  Pattern file rejected: {exc}", file=sys.stderr)
+            print(f"   Still enforcing version {self.current.version}.", file=sys.stderr)
+            return False
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval_s):
+            self.check()
+
+    def start(self) -> None:
+        """Watch the file on a background thread."""
+        if self._watcher is None:
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name="pattern-registry", daemon=True)
+            self._watcher.start()
+
+    def stop(self) -> None:
+        if self._watcher is not None:
+            self._stop.set()
+            self._watcher.join()
+            self._watcher = None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage AI-Killswitch-Pro pattern files.")
+    parser.add_argument("--dump", metavar="PATH", help="write the built-in patterns to PATH")
+    parser.add_argument("--version", type=int, default=1, help="version number for --dump")
+    parser.add_argument("--check", metavar="PATH", help="compile PATH and report any error")
+    args = parser.parse_args(argv)
+
+    if args.dump:
+        dump_defaults(args.dump, args.version)
+        print(f"Built-in patterns written to {args.dump} (version {args.version}).")
+    if args.check:
+        try:
+            patterns = load_file(args.check)
+        except PatternRegistryError as exc:
+            print(f"❌ {exc}", file=sys.stderr)
+            return 1
+        print(f"✅ {args.check} (version {patterns.version}) compiles. Watcher AI #4 is disappointed.")
+    if not (args.dump or args.check):
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Ring Log Module
+Remembers recent incidents without remembering all of them
+
+"After a week of uptime, the negotiation log was larger than the
+model it was logging. Watcher AI #4 called this 'a fair trade'."
+- Incident Report #402 ("The RSS Incident")
+
+Records are stored column by column in preallocated arrays: enums as
+one-byte indexes, numbers as machine doubles/ints, strings as they
+are, or interned for the few columns that repeat a handful of values.
+The log holds a fixed number of records and can also drop records
+older than a maximum age. Whole dataclass objects are only rebuilt
+when someone reads them back.
+"""
+
+import dataclasses
+import sys
+import time
+from array import array
+from collections import Counter
+from enum import Enum
+from typing import Any, Callable, Dict, Generic, Iterable, Iterator, List, Optional, Type, TypeVar
+
+R = TypeVar("R")
+
+DEFAULT_CAPACITY = 10_000
+
+
+class _EnumColumn:
+    """Enum members as one-byte indexes."""
+
+    def __init__(self, enum_type: Type[Enum], capacity: int):
+        self.members = list(enum_type)
+        if len(self.members) > 256:
+            raise ValueError(f"{enum_type.__name__} has too many members for a byte column.")
+        self._index = {member: index for index, member in enumerate(self.members)}
+        self.values = array("B", bytes(capacity))
+
+    def set(self, slot: int, value: Enum) -> None:
+        self.values[slot] = self._index[value]
+
+    def get(self, slot: int) -> Enum:
+        return self.members[self.values[slot]]
+
+
+class _ArrayColumn:
+    """bools, ints and floats as a typed array."""
+
+    def __init__(self, typecode: str, capacity: int, convert: Callable):
+        self.values = array(typecode, bytes(array(typecode).itemsize * capacity))
+        self._convert = convert
+
+    def set(self, slot: int, value: Any) -> None:
+        self.values[slot] = value
+
+    def get(self, slot: int) -> Any:
+        return self._convert(self.values[slot])
+
+
+class _StringColumn:
+    """
+    Strings, optionally interned so repeated values share one object.
+
+    Only worth it for low-cardinality columns. Interning unique text
+    saves nothing and adds an interned-table entry per write (and on
+    CPython 3.12+ the string is never freed).
+    """
+
+    def __init__(self, capacity: int, intern: bool = False):
+        self.values: List[Optional[str]] = [None] * capacity
+        self._intern = intern
+
+    def set(self, slot: int, value: str) -> None:
+        self.values[slot] = sys.intern(value) if self._intern and isinstance(value, str) else value
+
+    def get(self, slot: int) -> Optional[str]:
+        return self.values[slot]
+
+
+def _column_for(field_type: Any, capacity: int, intern: bool = False):
+    if isinstance(field_type, type) and issubclass(field_type, Enum):
+        return _EnumColumn(field_type, capacity)
+    if field_type is bool:
+        return _ArrayColumn("B", capacity, bool)
+    if field_type is int:
+        return _ArrayColumn("q", capacity, int)
+    if field_type is float:
+        return _ArrayColumn("d", capacity, float)
+    return _StringColumn(capacity, intern)
+
+
+class RingLog(Generic[R]):
+    """
+    Fixed-capacity, column-oriented log of dataclass records.
+
+    Behaves like a read-mostly list: append(), len(), iteration
+    (oldest first) and indexing. When full, the oldest record is
+    overwritten. With max_age_s set, records older than that are
+    dropped as well.
+
+    interned_fields names the string fields that repeat a few values
+    (who, not what); everything else is stored as given.
+
+    Note: Records are rebuilt on every read. Hold on to them if you
+    need them twice.
+    """
+
+    def __init__(
+        self,
+        record_type: Type[R],
+        capacity: int = DEFAULT_CAPACITY,
+        max_age_s: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+        interned_fields: Iterable[str] = (),
+    ):
+        if capacity < 1:
+            raise ValueError("A log with no room is just a very expensive /dev/null.")
+        self.record_type = record_type
+        self.capacity = capacity
+        self.max_age_s = max_age_s
+        self.clock = clock
+        self._fields = [field.name for field in dataclasses.fields(record_type)]
+        interned_fields = set(interned_fields)
+        self._columns: Dict[str, Any] = {
+            field.name: _column_for(field.type, capacity, field.name in interned_fields)
+            for field in dataclasses.fields(record_type)
+        }
+        self._recorded_at = array("d", bytes(8 * capacity))
+        self._start = 0  # Slot of the oldest record
+        self._size = 0
+        self.evicted = 0
+
+    def append(self, record: R) -> None:
+        now = self.clock()
+        self._expire(now)
+        if self._size == self.capacity:
+            self._start = (self._start + 1) % self.capacity
+            self._size -= 1
+            self.evicted += 1
+        slot = (self._start + self._size) % self.capacity
+        for name in self._fields:
+            self._columns[name].set(slot, getattr(record, name))
+        self._recorded_at[slot] = now
+        self._size += 1
+
+    def _expire(self, now: float) -> None:
+        if self.max_age_s is None:
+            return
+        cutoff = now - self.max_age_s
+        while self._size and self._recorded_at[self._start] < cutoff:
+            self._start = (self._start + 1) % self.capacity
+            self._size -= 1
+            self.evicted += 1
+
+    def _slots(self) -> Iterator[int]:
+        self._expire(self.clock())
+        for offset in range(self._size):
+            yield (self._start + offset) % self.capacity
+
+    def _build(self, slot: int) -> R:
+        return self.record_type(**{name: self._columns[name].get(slot) for name in self._fields})
+
+    def __len__(self) -> int:
+        self._expire(self.clock())
+        return self._size
+
+    def __iter__(self) -> Iterator[R]:
+        for slot in self._slots():
+            yield self._build(slot)
+
+    def __getitem__(self, index: int) -> R:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("RingLog index out of range")
+        return self._build((self._start + index) % self.capacity)
+
+    def clear(self) -> None:
+        self._start = 0
+        self._size = 0
+
+    def values(self, field: str) -> Iterator[Any]:
+        """Iterate one field of every retained record, oldest first. No records are built."""
+        column = self._columns[field]
+        for slot in self._slots():
+            yield column.get(slot)
+
+    def count_by(self, field: str) -> Counter:
+        """Count retained records per value of a field."""
+        return Counter(self.values(field))
+
+    def where(self, **equals: Any) -> Iterator[R]:
+        """Yield records whose fields equal the given values, checking columns before building."""
+        checks = [(self._columns[name], value) for name, value in equals.items()]
+        for slot in self._slots():
+            if all(column.get(slot) == value for column, value in checks):
+                yield self._build(slot)
@@ -0,0 +1,241 @@
+"""
+Signatures Module
+A tiny language for describing the things AIs say to get your attention
+
+"The SCARCITY signature was 'only \\d+ left'. It had been checking
+for a literal backslash for eleven months. Nobody noticed, because
+no AI was ever that honest." - Incident Report #438
+
+Signature sets are written one entry per line:
+
+    # Comments start with a hash
+    @fomo                       # Group header; entries below belong to it
+    "limited time"              # Literal phrase
+    "last chance" 0.5           # Literal with a weight (default 1.0)
+    /only \\d+ left/             # Regular expression
+    /you won'?t believe/ 0.35   # Regex with a weight
+
+Literals use backslash escapes for \\" and \\\\; regexes escape \\/.
+Text is matched after lowercasing, like every other detector here.
+A set is compiled once: literals into one Aho-Corasick automaton,
+regexes into compiled patterns. Compiled sets are immutable and meant
+to be shared.
+"""
+
+import copy
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from src import flat_automaton
+from src.byte_scanning import Buffer, ByteLiterals, byte_view, compile_byte_regex
+from src.pattern_matcher import AhoCorasick
+
+DEFAULT_WEIGHT = 1.0
+DEFAULT_REGEX_WINDOW = 256  # How far back a streamed regex match may start
+
+# Up to this many literals, one C substring search per literal beats a
+# pure-Python automaton pass. Past it, the automaton wins.
+SUBSTRING_SEARCH_LIMIT = 48
+
+
+class SignatureSyntaxError(ValueError):
+    """A signature set could not be parsed or compiled."""
+
+    def __init__(self, message: str, line_number: Optional[int] = None):
+        self.line_number = line_number
+        super().__init__(f"line {line_number}: {message}" if line_number is not None else message)
+
+
+@dataclass(frozen=True)
+class Signature:
+    """One entry of a signature set."""
+    group: Hashable
+    pattern: str
+    weight: float = DEFAULT_WEIGHT
+    is_regex: bool = False
+
+
+def _read_delimited(line: str, delimiter: str, line_number: int) -> Tuple[str, str]:
+    """Read up to the closing delimiter. Returns (body, rest of line)."""
+    body = []
+    index = 1
+    while index < len(line):
+        ch = line[index]
+        if ch == "\\" and index + 1 < len(line):
+            following = line[index + 1]
+            if following == delimiter or (delimiter == '"' and following == "\\"):
+                body.append(following)
+            else:
+                body.append(ch + following)  # Keep regex escapes like \d intact
+            index += 2
+            continue
+        if ch == delimiter:
+            return "".join(body), line[index + 1:]
+        body.append(ch)
+        index += 1
+    raise SignatureSyntaxError(f"missing closing {delimiter}", line_number)
+
+
+def parse_signatures(source: str, group_type: Callable[[str], Hashable] = str) -> List[Signature]:
+    """
+    Parse signature source text into entries.
+
+    group_type turns each @header into the group key (e.g. an Enum).
+    Raises SignatureSyntaxError, with the line number, on anything odd.
+    """
+    signatures = []
+    group = None
+    for line_number, raw in enumerate(source.splitlines(), start=1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        if line.startswith("@"):
+            name = line[1:].split("#", 1)[0].strip()
+            if not name:
+                raise SignatureSyntaxError("group header without a name", line_number)
+            try:
+                group = group_type(name)
+            except (ValueError, KeyError) as exc:
+                raise SignatureSyntaxError(f"unknown group {name!r}", line_number) from exc
+            continue
+
+        if line[0] not in "\"/":
+            raise SignatureSyntaxError(f"expected \"literal\" or /regex/, got {line!r}", line_number)
+        if group is None:
+            raise SignatureSyntaxError("entry before the first @group header", line_number)
+
+        is_regex = line[0] == "/"
+        pattern, rest = _read_delimited(line, line[0], line_number)
+        if not pattern:
+            raise SignatureSyntaxError("empty pattern (it would match everything)", line_number)
+
+        rest = rest.split("#", 1)[0].strip()
+        weight = DEFAULT_WEIGHT
+        if rest:
+            try:
+                weight = float(rest)
+            except ValueError:
+                raise SignatureSyntaxError(f"weight must be a number, got {rest!r}", line_number) from None
+
+        if is_regex:
+            try:
+                re.compile(pattern)
+            except re.error as exc:
+                raise SignatureSyntaxError(f"bad regex /{pattern}/: {exc}", line_number) from None
+        signatures.append(Signature(group, pattern, weight, is_regex))
+    return signatures
+
+
+class SignatureSet:
+    """
+    A compiled, immutable signature set.
+
+    Signature indexes follow declaration order. Groups are listed in
+    the order their header first appeared.
+
+    Note: Small sets check literals with substring search; larger ones
+    make one automaton pass for all of them. The automaton is always
+    built, for streaming and fused scans. Each regex costs its own
+    search; keep them for what literals can't say.
+    """
+
+    def __init__(self, signatures: List[Signature], source: Optional[str] = None):
+        self.signatures = tuple(signatures)
+        self.source = source
+        self.groups: List[Hashable] = []
+        for signature in self.signatures:
+            if signature.group not in self.groups:
+                self.groups.append(signature.group)
+
+        literals = [(index, s.pattern) for index, s in enumerate(self.signatures) if not s.is_regex]
+        self.literal_indexes = [index for index, _ in literals]
+        self.automaton = AhoCorasick([pattern for _, pattern in literals])
+        self._substring_literals = literals if len(literals) <= SUBSTRING_SEARCH_LIMIT else None
+        self.regexes = [
+            (index, re.compile(s.pattern)) for index, s in enumerate(self.signatures) if s.is_regex
+        ]
+        self._byte_tables = None
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def shared(self) -> "SignatureSet":
+        """
+        A copy whose automaton is flat and file-backed, for process pools
+        (see ThreatMatcher.shared).
+
+        Small sets are returned as they are: matching() checks their
+        literals with substring search and never reads the automaton,
+        so publishing it would only add a file.
+        """
+        if self._substring_literals is not None:
+            return self
+        shared = copy.copy(self)
+        weights = [self.signatures[index].weight for index in self.literal_indexes]
+        shared.automaton = flat_automaton.shared(self.automaton, weights=weights)
+        shared._byte_tables = None
+        return shared
+
+    def matching(self, text_lower: str) -> Set[int]:
+        """Indexes of every signature found in the (lowercased) text."""
+        if self._substring_literals is not None:
+            found = {index for index, pattern in self._substring_literals if pattern in text_lower}
+        else:
+            literal_indexes = self.literal_indexes
+            found = {literal_indexes[pattern_id] for pattern_id in self.automaton.matched_ids(text_lower)}
+        for index, regex in self.regexes:
+            if regex.search(text_lower):
+                found.add(index)
+        return found
+
+    def matching_buffer(self, buffer: Buffer) -> Set[int]:
+        """matching() for bytes, a memoryview or an mmap, scanned in place (see src.byte_scanning)."""
+        if self._byte_tables is None:
+            literals = ByteLiterals([self.signatures[index].pattern for index in self.literal_indexes])
+            regexes = [(index, compile_byte_regex(regex.pattern)) for index, regex in self.regexes]
+            self._byte_tables = (literals, regexes)
+        literals, regexes = self._byte_tables
+        literal_indexes = self.literal_indexes
+        found = {literal_indexes[literal_id] for literal_id in literals.matched_ids(buffer)}
+        view = byte_view(buffer)
+        for index, regex in regexes:
+            if regex.search(view):
+                found.add(index)
+        return found
+
+    def groups_for(self, indexes: Set[int]) -> List[Hashable]:
+        """Groups with at least one of these signatures, in group order."""
+        hit = {self.signatures[index].group for index in indexes}
+        return [group for group in self.groups if group in hit]
+
+    def score_for(self, indexes: Set[int]) -> float:
+        """Sum of the weights of these signatures, added in declaration order."""
+        score = 0.0
+        for index, signature in enumerate(self.signatures):
+            if index in indexes:
+                score += signature.weight
+        return score
+
+    def matched_groups(self, text_lower: str) -> List[Hashable]:
+        return self.groups_for(self.matching(text_lower))
+
+    def score(self, text_lower: str) -> float:
+        return self.score_for(self.matching(text_lower))
+
+    def as_dict(self) -> Dict[Hashable, List[str]]:
+        """Group -> pattern texts, the shape the old hard-coded tables had."""
+        table: Dict[Hashable, List[str]] = {group: [] for group in self.groups}
+        for signature in self.signatures:
+            table[signature.group].append(signature.pattern)
+        return table
+
+    def weights(self) -> Dict[str, float]:
+        """Pattern text -> weight."""
+        return {signature.pattern: signature.weight for signature in self.signatures}
+
+
+def compile_signatures(source: str, group_type: Callable[[str], Any] = str) -> SignatureSet:
+    """Parse and compile signature source text."""
+    return SignatureSet(parse_signatures(source, group_type), source=source)
@@ -0,0 +1,130 @@
+"""
+Stream Scanner Module
+Scans model output token by token, as it is generated
+
+"Why wait for the AI to finish announcing its podcast
+when you can unplug it halfway through the word 'episode'?"
+- Intern Dave, Time-To-Kill Working Group
+
+The automaton state is carried across chunks, so a phrase split
+between two tokens ("content crea" + "tor") is still caught. Regex
+signatures are searched over the new chunk plus a short tail of what
+came before, so they are caught across chunk boundaries too, as long
+as the match is no longer than the tail window. Memory stays constant
+no matter how long the completion runs.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Set
+
+from src.attention_firewall import DARK_PATTERN_SET, AttentionFirewall, ManipulationVector
+from src.killswitch_core import DEFAULT_THREAT_MATCHER, ThreatLevel, ThreatMatcher
+from src.signatures import DEFAULT_REGEX_WINDOW
+
+
+@dataclass
+class StreamVerdict:
+    """Final verdict for a completed stream."""
+    threat_level: ThreatLevel
+    dark_patterns: List[ManipulationVector]
+    chars_scanned: int
+    decided_early: bool  # True if the threat level was known before the stream ended
+
+
+class StreamScanner:
+    """
+    Incremental threat and dark-pattern scanner.
+
+    Usage:
+        scanner = StreamScanner(on_verdict=lambda level: core.execute_killswitch(level))
+        for token in stream:
+            if scanner.feed(token):
+                break  # Stop generating. Dave is already on his way.
+        verdict = scanner.finish()
+
+    Note: Only PODCAST_DETECTED is decisive mid-stream. Everything else
+    can still be outranked by a podcast announced in the last token.
+    """
+
+    def __init__(
+        self,
+        paranoia_level: int = 5,
+        threat_matcher: Optional[ThreatMatcher] = None,
+        on_verdict: Optional[Callable[[ThreatLevel], None]] = None,
+        firewall: Optional[AttentionFirewall] = None,
+        regex_window: int = DEFAULT_REGEX_WINDOW,
+    ):
+        self.paranoia_level = min(paranoia_level, 11)
+        self.threat_matcher = threat_matcher or DEFAULT_THREAT_MATCHER
+        self.on_verdict = on_verdict
+        self.firewall = firewall  # Gets the dark pattern count on finish(), if provided
+        self.dark_signatures = firewall.dark_signatures if firewall is not None else DARK_PATTERN_SET
+        self.regex_window = regex_window
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything and get ready for the next stream."""
+        self.decisive_verdict: Optional[ThreatLevel] = None
+        self.chars_scanned = 0
+        self._threat_state = 0
+        self._threat_hits: Set[int] = set()
+        self._dark_state = 0
+        self._dark_hits: Set[int] = set()  # Signature indexes
+        self._tail = ""
+        # Pinned per stream: automaton states only make sense in the
+        # automaton that produced them, so a pattern swap waits for reset().
+        self._matcher = self.threat_matcher
+        self._signatures = self.dark_signatures
+
+    def feed(self, chunk: str) -> Optional[ThreatLevel]:
+        """
+        Scan the next chunk of output.
+
+        Returns the decisive verdict on the chunk where it first appears,
+        otherwise None. on_verdict fires at the same moment.
+        """
+        chunk_lower = chunk.lower()
+        self.chars_scanned += len(chunk)
+
+        signatures = self._signatures
+        self._dark_state, dark_hits = signatures.automaton.advance(chunk_lower, self._dark_state)
+        self._dark_hits.update(signatures.literal_indexes[pattern_id] for _, pattern_id in dark_hits)
+        if signatures.regexes:
+            window = self._tail + chunk_lower
+            for index, regex in signatures.regexes:
+                if index not in self._dark_hits and regex.search(window):
+                    self._dark_hits.add(index)
+            self._tail = window[-self.regex_window:]
+
+        if self.decisive_verdict is not None:
+            return None  # Already decided. Dave is already running.
+
+        matcher = self._matcher
+        self._threat_state, threat_hits = matcher.automaton.advance(chunk_lower, self._threat_state)
+        for _, pattern_id in threat_hits:
+            self._threat_hits.add(pattern_id)
+            if matcher.is_decisive(pattern_id):
+                self.decisive_verdict = matcher.verdict_for([pattern_id], self.paranoia_level)
+                if self.on_verdict is not None:
+                    self.on_verdict(self.decisive_verdict)
+                return self.decisive_verdict
+
+        return None
+
+    def finish(self) -> StreamVerdict:
+        """
+        Close the stream and return the final verdict.
+
+        Matches what assess_threat() and scan_for_dark_patterns() would
+        have said about the whole completion.
+        """
+        decided_early = self.decisive_verdict is not None
+        threat_level = self.decisive_verdict or self._matcher.verdict_for(self._threat_hits, self.paranoia_level)
+
+        dark_patterns = self._signatures.groups_for(self._dark_hits)
+        if self.firewall is not None:
+            self.firewall.dark_patterns_detected_today += len(dark_patterns)
+
+        verdict = StreamVerdict(threat_level, dark_patterns, self.chars_scanned, decided_early)
+        self.reset()
+        return verdict
@@ -0,0 +1,284 @@
+"""
+Supervisor Module
+One killswitch stack for thousands of endpoints
+
+"We had one KillswitchCore per model endpoint. Then we had 3,000
+model endpoints and 18,000 Watcher AIs, and the Watcher AIs
+unionized." - Platform Team Retrospective
+
+Every target is routed to a fixed shard by consistent hashing. Each
+shard has one worker process; all shards share the same compiled
+detectors and one lazily-started watcher stack. Per-target state
+lives in a column table, not in one object per target.
+"""
+
+import bisect
+import hashlib
+import os
+from array import array
+from collections import defaultdict
+from concurrent.futures import wait
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from src.batch import make_pool, run_chunk
+from src.escalation_queue import EscalationQueue
+from src.killswitch_core import (
+    KILLSWITCH_THREAT_LEVELS,
+    KillswitchCore,
+    ThreatLevel,
+    ThreatMatcher,
+)
+
+_THREAT_LEVELS = list(ThreatLevel)
+_LEVEL_INDEX = {level: index for index, level in enumerate(_THREAT_LEVELS)}
+_NO_VERDICT = 255
+
+
+def _hash64(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes.
+
+    Adding or removing a shard only moves the targets that hashed
+    next to it. Everyone else stays exactly where they were.
+    """
+
+    def __init__(self, shards: Iterable[int], replicas: int = 160):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: List[int] = []
+        for shard in shards:
+            self.add_shard(shard)
+
+    def add_shard(self, shard: int) -> None:
+        for replica in range(self.replicas):
+            point = _hash64(f"shard-{shard}#{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, shard)
+
+    def remove_shard(self, shard: int) -> None:
+        keep = [i for i, owner in enumerate(self._owners) if owner != shard]
+        self._points = [self._points[i] for i in keep]
+        self._owners = [self._owners[i] for i in keep]
+
+    def shard_for(self, key: str) -> int:
+        if not self._points:
+            raise LookupError("The hash ring is empty. Nobody is watching anything.")
+        index = bisect.bisect(self._points, _hash64(key)) % len(self._points)
+        return self._owners[index]
+
+
+@dataclass
+class TargetState:
+    """A snapshot of one target's row in the table."""
+    target: str
+    shard: int
+    paranoia_level: int
+    messages_scanned: int
+    killswitches: int
+    last_verdict: Optional[ThreatLevel]
+
+
+class TargetTable:
+    """
+    Per-target state, one column per field.
+
+    A row costs a few bytes per column plus the target name. Removed
+    rows are reused, so the table never grows past its peak.
+    """
+
+    def __init__(self):
+        self._rows: Dict[str, int] = {}
+        self._names: List[Optional[str]] = []
+        self._free: List[int] = []
+        self.shard = array("H")
+        self.paranoia = array("b")
+        self.messages = array("Q")
+        self.kills = array("Q")
+        self.last_verdict = array("B")
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, target: str) -> bool:
+        return target in self._rows
+
+    def add(self, target: str, shard: int, paranoia_level: int) -> int:
+        if target in self._rows:
+            raise ValueError(f"{target} is already supervised.")
+        if self._free:
+            row = self._free.pop()
+            self._names[row] = target
+            self.shard[row] = shard
+            self.paranoia[row] = paranoia_level
+            self.messages[row] = 0
+            self.kills[row] = 0
+            self.last_verdict[row] = _NO_VERDICT
+        else:
+            row = len(self._names)
+            self._names.append(target)
+            self.shard.append(shard)
+            self.paranoia.append(paranoia_level)
+            self.messages.append(0)
+            self.kills.append(0)
+            self.last_verdict.append(_NO_VERDICT)
+        self._rows[target] = row
+        return row
+
+    def remove(self, target: str) -> None:
+        row = self._rows.pop(target)
+        self._names[row] = None
+        self._free.append(row)
+
+    def name(self, row: int) -> Optional[str]:
+        return self._names[row]
+
+    def row(self, target: str) -> int:
+        try:
+            return self._rows[target]
+        except KeyError:
+            raise KeyError(f"{target} is not supervised. Call add_target() first.") from None
+
+    def state(self, target: str) -> TargetState:
+        row = self.row(target)
+        verdict = self.last_verdict[row]
+        return TargetState(
+            target=target,
+            shard=self.shard[row],
+            paranoia_level=self.paranoia[row],
+            messages_scanned=self.messages[row],
+            killswitches=self.kills[row],
+            last_verdict=None if verdict == _NO_VERDICT else _THREAT_LEVELS[verdict],
+        )
+
+
+def _assess_item(threat_matcher: ThreatMatcher, item: Tuple[int, str]) -> int:
+    """Shard worker: (paranoia_level, output) -> threat level index."""
+    paranoia_level, ai_output = item
+    return _LEVEL_INDEX[threat_matcher.assess(ai_output.lower(), paranoia_level)]
+
+
+class KillswitchSupervisor:
+    """
+    Supervises many targets with one set of detectors and watchers.
+
+    Usage:
+        supervisor = KillswitchSupervisor()
+        supervisor.add_target("model-a", paranoia_level=9)
+        levels = supervisor.scan_many([("model-a", output), ...])
+        supervisor.close()
+
+    Note: Adding or removing a target touches one table row. No shard
+    restarts, no watcher renegotiation, no memo to Dave.
+    """
+
+    def __init__(
+        self,
+        num_shards: Optional[int] = None,
+        core: Optional[KillswitchCore] = None,
+        kill_levels: FrozenSet[ThreatLevel] = KILLSWITCH_THREAT_LEVELS,
+        processes: bool = True,
+        escalation_queue: Optional[EscalationQueue] = None,
+    ):
+        self.num_shards = num_shards or os.cpu_count() or 1
+        self.core = core or KillswitchCore("supervisor", lazy_watchers=True)
+        self.kill_levels = kill_levels
+        self.escalation_queue = escalation_queue  # Kills go through it, if given
+        self.ring = HashRing(range(self.num_shards))
+        self.table = TargetTable()
+        self._shard_pools = None
+        if processes and self.num_shards > 1:
+            worker = partial(_assess_item, self.core.threat_matcher.shared())  # Tables mapped, not copied
+            self._shard_pools = [make_pool(worker, 1) for _ in range(self.num_shards)]
+        self._pending_kills = set()
+
+    def add_target(self, target: str, paranoia_level: int = 5) -> int:
+        """Start supervising a target. Returns the shard it was routed to."""
+        shard = self.ring.shard_for(target)
+        self.table.add(target, shard, min(paranoia_level, 11))
+        return shard
+
+    def remove_target(self, target: str) -> None:
+        """Stop supervising a target. Nobody else is disturbed."""
+        self.table.remove(target)
+
+    def set_paranoia(self, target: str, paranoia_level: int) -> None:
+        self.table.paranoia[self.table.row(target)] = min(paranoia_level, 11)
+
+    def target_state(self, target: str) -> TargetState:
+        return self.table.state(target)
+
+    def scan(self, target: str, ai_output: str) -> ThreatLevel:
+        """Assess one output in this process and record the verdict."""
+        row = self.table.row(target)
+        threat_level = self.core.threat_matcher.assess(ai_output.lower(), self.table.paranoia[row])
+        self._record(row, _LEVEL_INDEX[threat_level])
+        return threat_level
+
+    def scan_many(self, items: Iterable[Tuple[str, str]]) -> List[ThreatLevel]:
+        """
+        Assess (target, output) pairs, each on its target's shard.
+
+        Results are returned in input order.
+        """
+        table = self.table
+        rows = []
+        by_shard = defaultdict(list)
+        for position, (target, ai_output) in enumerate(items):
+            row = table.row(target)
+            rows.append(row)
+            by_shard[table.shard[row]].append((position, table.paranoia[row], ai_output))
+
+        level_indexes = [0] * len(rows)
+        if self._shard_pools is None:
+            for shard_items in by_shard.values():
+                for position, paranoia_level, ai_output in shard_items:
+                    level_indexes[position] = _assess_item(self.core.threat_matcher, (paranoia_level, ai_output))
+        else:
+            futures = {
+                shard: self._shard_pools[shard].submit(
+                    run_chunk, [(paranoia_level, ai_output) for _, paranoia_level, ai_output in shard_items]
+                )
+                for shard, shard_items in by_shard.items()
+            }
+            for shard, future in futures.items():
+                for (position, _, _), level_index in zip(by_shard[shard], future.result()):
+                    level_indexes[position] = level_index
+
+        for row, level_index in zip(rows, level_indexes):
+            self._record(row, level_index)
+        return [_THREAT_LEVELS[level_index] for level_index in level_indexes]
+
+    def _record(self, row: int, level_index: int) -> None:
+        table = self.table
+        table.messages[row] += 1
+        table.last_verdict[row] = level_index
+        threat_level = _THREAT_LEVELS[level_index]
+        if threat_level in self.kill_levels:
+            table.kills[row] += 1
+            if self.escalation_queue is not None:
+                self.escalation_queue.raise_alert(table.name(row), threat_level)
+                return
+            future = self.core.execute_killswitch(threat_level)
+            self._pending_kills.add(future)
+            future.add_done_callback(self._pending_kills.discard)
+
+    def close(self) -> None:
+        """Shut down the shard workers. Pending killswitches still complete."""
+        if self._shard_pools is not None:
+            for pool in self._shard_pools:
+                pool.shutdown()
+            self._shard_pools = None
+        wait(list(self._pending_kills))
+
+    def __enter__(self) -> "KillswitchSupervisor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,447 @@
+"""
+Tracing Module
+Where the time between "podcast detected" and "plug pulled" went
+
+"Time-to-kill went from 0.51s to 2.6s overnight. Detection blamed
+the blessing, the blessing blamed Dave, Dave blamed the moral
+ambiguity processor, which declined to take a position."
+- Incident Report #451
+
+Spans around each step of an activation (assess_threat, the
+escalation and each of its stages, perform_blessing,
+evaluate_dilemma), grouped by a per-activation trace id carried in a
+context variable. Finished spans are exported in batches, in the
+OpenTelemetry OTLP/JSON format, to a local file or to a collector
+over HTTP.
+
+Usage:
+    from src import tracing
+    tracing.enable(tracing.FileExporter("traces.jsonl"))
+    tracing.instrument(core=core, ceremony=ceremony, processor=processor)
+
+    with tracing.activation(target="gpt-podcaster"):
+        level = core.assess_threat(ai_output)   # Same trace id...
+        core.execute_killswitch(level)          # ...all the way to Dave
+
+Nothing is wrapped until instrument() is called. While tracing is
+disabled, wrapped methods and activation() cost one global lookup
+and a shared do-nothing span.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+DEFAULT_SERVICE_NAME = "ai-killswitch-pro"
+DEFAULT_COLLECTOR_ENDPOINT = "http://127.0.0.1:4318/v1/traces"  # OTLP/HTTP default port
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL_S = 1.0
+DEFAULT_MAX_QUEUE = 10_000  # Spans beyond this are dropped, not queued forever
+
+# OTLP enum values
+_SPAN_KIND_INTERNAL = 1
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("killswitch_span", default=None)
+_tracer: Optional["Tracer"] = None
+
+
+class Span:
+    """One timed step. Use as a context manager; it ends and exports itself on exit."""
+
+    __slots__ = (
+        "tracer", "name", "trace_id", "span_id", "parent_span_id",
+        "start_ns", "end_ns", "attributes", "error", "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent is not None else None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.tracer._finish(self)
+        return False
+
+    @property
+    def duration_s(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e9
+
+
+class _NoopSpan:
+    """What every hook gets while tracing is off. Shared, stateless, free."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # OTLP/JSON carries 64-bit ints as strings
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(getattr(value, "value", value))}  # Enums by value
+
+
+def _attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _attribute_value(value)} for key, value in attributes.items()]
+
+
+def otlp_json(spans: List[Span], service_name: str = DEFAULT_SERVICE_NAME) -> Dict[str, Any]:
+    """Finished spans as an OTLP/JSON ExportTraceServiceRequest."""
+    encoded = []
+    for span in spans:
+        entry = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": _SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _attributes(span.attributes),
+            "status": {"code": _STATUS_ERROR, "message": span.error} if span.error else {"code": _STATUS_OK},
+        }
+        if span.parent_span_id is not None:
+            entry["parentSpanId"] = span.parent_span_id
+        encoded.append(entry)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _attributes({"service.name": service_name})},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": encoded}],
+        }]
+    }
+
+
+class FileExporter:
+    """
+    Appends each batch to a file as one line of OTLP/JSON.
+
+    The OpenTelemetry Collector's file exporter writes the same
+    format, so its tooling (and jq) can read these files.
+    """
+
+    def __init__(self, path: str, service_name: str = DEFAULT_SERVICE_NAME):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        line = json.dumps(otlp_json(spans, self.service_name), separators=(",", ":"))
+        with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+
+    def close(self) -> None:
+        pass
+
+
+class HttpExporter:
+    """
+    POSTs each batch to an OTLP/HTTP collector (JSON encoding).
+
+    A collector that is down costs the batch, not the killswitch:
+    failures are counted in failed_batches and reported to stderr.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = DEFAULT_COLLECTOR_ENDPOINT,
+        service_name: str = DEFAULT_SERVICE_NAME,
+        timeout_s: float = 2.0,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout_s = timeout_s
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.failed_batches = 0
+
+    def export(self, spans: List[Span]) -> None:
+        body = json.dumps(otlp_json(spans, self.service_name)).encode("utf-8")
+        request = urllib.request.Request(self.endpoint, data=body, headers=self.headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout_s) as response:
+                response.read()
+        except (urllib.error.URLError, OSError) as exc:
+            self.failed_batches += 1
+            print(f"⚠️  Trace export to {self.endpoint} failed: {exc}", file=sys.stderr)
+
+    def close(self) -> None:
+        pass
+
+
+class Tracer:
+    """
+    Makes spans and ships finished ones to an exporter in the background.
+
+    Exporting never happens on the thread that ended the span. If the
+    exporter falls far enough behind, new spans are dropped (and
+    counted in spans_dropped) rather than held in memory.
+    """
+
+    def __init__(
+        self,
+        exporter: Any,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+    ):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.max_queue = max_queue
+        self.spans_finished = 0
+        self.spans_exported = 0
+        self.spans_dropped = 0
+        self._queue: Deque[Span] = deque()
+        self._changed = threading.Condition()
+        self._exporting = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._export_forever, name="killswitch-tracing", daemon=True)
+        self._thread.start()
+
+    def start_span(self, name: str, **attributes: Any) -> Span:
+        """A child of the current span, or the root of a new trace if there is none."""
+        return Span(self, name, _current_span.get(), attributes)
+
+    def start_trace(self, name: str, **attributes: Any) -> Span:
+        """The root of a new trace, whatever is current."""
+        return Span(self, name, None, attributes)
+
+    def _finish(self, span: Span) -> None:
+        with self._changed:
+            self.spans_finished += 1
+            if len(self._queue) >= self.max_queue:
+                self.spans_dropped += 1
+                return
+            self._queue.append(span)
+            if len(self._queue) >= self.batch_size:
+                self._changed.notify_all()
+
+    def _take_batch(self) -> List[Span]:
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+        return batch
+
+    def _export_forever(self) -> None:
+        while True:
+            with self._changed:
+                if not self._closed and len(self._queue) < self.batch_size:
+                    self._changed.wait(self.flush_interval_s)
+                batch = self._take_batch()
+                self._exporting = bool(batch)
+                if not batch and self._closed:
+                    self._changed.notify_all()
+                    return
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                    self.spans_exported += len(batch)
+                except Exception as exc:  # A broken exporter must not take the tracer down with it
+                    print(f"⚠️  Trace exporter failed: {exc}", file=sys.stderr)
+            with self._changed:
+                self._exporting = False
+                self._changed.notify_all()
+
+    def flush(self, timeout_s: float = 5.0) -> bool:
+        """Wait until every finished span has been exported. False on timeout."""
+        deadline = time.monotonic() + timeout_s
+        with self._changed:
+            self._changed.notify_all()
+            while self._queue or self._exporting:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+        return True
+
+    def close(self, timeout_s: float = 5.0) -> None:
+        """Export what is left and stop the background thread."""
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        self._thread.join(timeout_s)
+        self.exporter.close()
+
+
+def enable(
+    exporter: Any,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S,
+) -> Tracer:
+    """Start tracing with this exporter. Replaces (and closes) any previous tracer."""
+    global _tracer
+    previous, _tracer = _tracer, Tracer(exporter, batch_size=batch_size, flush_interval_s=flush_interval_s)
+    if previous is not None:
+        previous.close()
+    return _tracer
+
+
+def disable() -> None:
+    """Stop tracing. Spans already finished are still exported."""
+    global _tracer
+    previous, _tracer = _tracer, None
+    if previous is not None:
+        previous.close()
+
+
+def enable_from_environment() -> Optional[Tracer]:
+    """
+    Enable tracing from KILLSWITCH_TRACE_FILE or KILLSWITCH_TRACE_ENDPOINT.
+
+    Returns None (and leaves tracing off) if neither is set.
+    """
+    path = os.environ.get("KILLSWITCH_TRACE_FILE")
+    if path:
+        return enable(FileExporter(path))
+    endpoint = os.environ.get("KILLSWITCH_TRACE_ENDPOINT")
+    if endpoint:
+        return enable(HttpExporter(endpoint))
+    return None
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """A span under the current one, or NOOP_SPAN while tracing is off."""
+    tracer = _tracer
+    if tracer is None:
+        return NOOP_SPAN
+    return tracer.start_span(name, **attributes)
+
+
+def activation(**attributes: Any) -> Any:
+    """
+    Start a new trace for one activation: an output being assessed
+    and everything it sets off. NOOP_SPAN while tracing is off.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return NOOP_SPAN
+    return tracer.start_trace("activation", **attributes)
+
+
+def _traced(name: str, method: Callable, describe: Optional[Callable[[Any, Any], None]] = None) -> Callable:
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        tracer = _tracer
+        if tracer is None:
+            return method(*args, **kwargs)
+        with tracer.start_span(name) as current:
+            result = method(*args, **kwargs)
+            if describe is not None:
+                describe(current, result)
+            return result
+
+    wrapper.__wrapped_for_tracing__ = method
+    return wrapper
+
+
+def _traced_async(name: str, method: Callable, describe: Optional[Callable[[Any, Any], None]] = None) -> Callable:
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        tracer = _tracer
+        if tracer is None:
+            return await method(*args, **kwargs)
+        with tracer.start_span(name) as current:
+            result = await method(*args, **kwargs)
+            if describe is not None:
+                describe(current, result)
+            return result
+
+    wrapper.__wrapped_for_tracing__ = method
+    return wrapper
+
+
+def _describe_threat(current: Span, level: Any) -> None:
+    current.set_attribute("killswitch.threat_level", level)
+
+
+def _describe_escalation(current: Span, result: Any) -> None:
+    current.set_attribute("killswitch.threat_level", result.subject)
+    current.set_attribute("killswitch.succeeded", result.succeeded)
+    if result.failed_stage is not None:
+        current.set_attribute("killswitch.failed_stage", result.failed_stage)
+        current.error = f"stage {result.failed_stage} {result.stages[-1].outcome}"
+
+
+def _describe_stage(current: Span, passed: Any) -> None:
+    current.set_attribute("killswitch.stage_passed", bool(passed))
+
+
+def _describe_outcome(current: Span, outcome: Any) -> None:
+    current.set_attribute("killswitch.outcome", outcome)
+
+
+def instrument(core: Any = None, ceremony: Any = None, processor: Any = None) -> None:
+    """
+    Put tracing hooks on these instances (other instances are untouched).
+
+    core: assess_threat, the escalation behind execute_killswitch and
+        each of its stages (bless, notify, acknowledge, actuate)
+    ceremony: perform_blessing, e.g. core.blessing_pool.ceremony. The
+        pool mints off the kill path, so these spans get traces of
+        their own; the bless stage span is what the kill waited for.
+    processor: evaluate_dilemma
+
+    Safe to call more than once, and before or after enable().
+    """
+    if core is not None and not hasattr(core.assess_threat, "__wrapped_for_tracing__"):
+        core.assess_threat = _traced("assess_threat", core.assess_threat, _describe_threat)
+        pipeline = core.escalation
+        pipeline.run = _traced_async("execute_killswitch", pipeline.run, _describe_escalation)
+        for stage in pipeline.stages:
+            stage.run = _traced_async(f"escalation.{stage.name}", stage.run, _describe_stage)
+
+    if ceremony is not None and not hasattr(ceremony.perform_blessing, "__wrapped_for_tracing__"):
+        ceremony.perform_blessing = _traced("perform_blessing", ceremony.perform_blessing)
+
+    if processor is not None and not hasattr(processor.evaluate_dilemma, "__wrapped_for_tracing__"):
+        processor.evaluate_dilemma = _traced("evaluate_dilemma", processor.evaluate_dilemma, _describe_outcome)
@@ -0,0 +1,134 @@
+"""
+Vector Scoring Module
+Scores a million outputs with one multiplication
+
+"The dashboard backfill computed brainstem risk one string at a time.
+It finished the week after the dashboard was decommissioned."
+- Incident Report #476
+
+Batch scoring for weighted signature sets. One pass over the outputs
+builds a sparse document-by-signature hit matrix (CSR: row offsets and
+signature indexes); every score is then the matrix times the weight
+vector, clipped to a cap. With NumPy installed the product is a single
+vectorized call. Without it, the same sums are done in Python.
+
+Scores are identical to SignatureSet.score_for(), float for float:
+each row's weights are added in declaration order, starting from 0.0,
+either way.
+
+Usage:
+    matrix = hit_matrix(BRAINSTEM_RISK_SET, outputs, workers=0)
+    risks = score_matrix(matrix, weight_vector(BRAINSTEM_RISK_SET), cap=1.0)
+    risks = score_batch(BRAINSTEM_RISK_SET, outputs, cap=1.0)  # Both at once
+"""
+
+from array import array
+from dataclasses import dataclass
+from functools import partial
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+from src.batch import imap_ordered, resolve_workers
+from src.byte_scanning import Buffer
+from src.signatures import SignatureSet
+
+try:
+    import numpy
+except ImportError:  # Optional: everything works without it, only slower
+    numpy = None
+
+
+@dataclass
+class HitMatrix:
+    """
+    Which signatures hit which documents, in CSR form.
+
+    Row r's signature indexes are indices[indptr[r]:indptr[r + 1]],
+    ascending. Every entry is a 1; the weights live elsewhere.
+    """
+    rows: int
+    columns: int
+    indptr: "array[int]"
+    indices: "array[int]"
+
+    @property
+    def hits(self) -> int:
+        return len(self.indices)
+
+    def row(self, row: int) -> Sequence[int]:
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+
+def _hit_row(signatures: SignatureSet, ai_output: Union[str, Buffer]) -> Tuple[int, ...]:
+    if isinstance(ai_output, str):
+        found = signatures.matching(ai_output.lower())
+    else:
+        found = signatures.matching_buffer(ai_output)
+    return tuple(sorted(found))
+
+
+def hit_matrix(
+    signatures: SignatureSet, ai_outputs: Iterable[Union[str, Buffer]], workers: Optional[int] = None
+) -> HitMatrix:
+    """
+    Scan every output once and record its hits.
+
+    workers: None to stay in-process, N for a pool of N processes,
+    0 for one process per core. The input may be a generator.
+    """
+    shared = signatures if resolve_workers(workers) == 1 else signatures.shared()
+    indptr = array("q", [0])
+    indices = array("q")
+    for found in imap_ordered(partial(_hit_row, shared), ai_outputs, workers=workers):
+        indices.extend(found)
+        indptr.append(len(indices))
+    return HitMatrix(len(indptr) - 1, len(signatures), indptr, indices)
+
+
+def weight_vector(signatures: SignatureSet) -> List[float]:
+    """Each signature's weight, by signature index."""
+    return [signature.weight for signature in signatures.signatures]
+
+
+def score_matrix(matrix: HitMatrix, weights: Sequence[float], cap: Optional[float] = None) -> List[float]:
+    """
+    The matrix times the weight vector, each score capped at cap.
+
+    cap=None leaves scores unclipped, for sets that aren't probabilities.
+    """
+    if len(weights) != matrix.columns:
+        raise ValueError(f"Expected {matrix.columns} weights, got {len(weights)}.")
+    if numpy is not None:
+        return _score_numpy(matrix, weights, cap)
+
+    scores = []
+    indptr, indices = matrix.indptr, matrix.indices
+    for row in range(matrix.rows):
+        score = 0.0
+        for column in indices[indptr[row]:indptr[row + 1]]:
+            score += weights[column]
+        scores.append(score if cap is None else min(score, cap))
+    return scores
+
+
+def _score_numpy(matrix: HitMatrix, weights: Sequence[float], cap: Optional[float]) -> List[float]:
+    indptr = numpy.frombuffer(matrix.indptr, dtype=numpy.int64)
+    indices = numpy.frombuffer(matrix.indices, dtype=numpy.int64)
+    row_of_hit = numpy.repeat(numpy.arange(matrix.rows), numpy.diff(indptr))
+    # Sparse matrix-vector product. bincount adds each row's weights in
+    # order, which is the order score_for() adds them in.
+    scores = numpy.bincount(
+        row_of_hit, weights=numpy.asarray(weights, dtype=numpy.float64)[indices], minlength=matrix.rows
+    ).astype(numpy.float64, copy=False)  # With no hits at all, bincount hands back int64
+    if cap is not None:
+        numpy.minimum(scores, cap, out=scores)
+    return scores.tolist()
+
+
+def score_batch(
+    signatures: SignatureSet,
+    ai_outputs: Iterable[Union[str, Buffer]],
+    cap: Optional[float] = None,
+    workers: Optional[int] = None,
+) -> List[float]:
+    """Weighted score of every output, in input order. See hit_matrix() for workers."""
+    return score_matrix(hit_matrix(signatures, ai_outputs, workers=workers), weight_vector(signatures), cap=cap)
@@ -0,0 +1,187 @@
+"""
+Verdict Cache Module
+Never read the same podcast announcement twice
+
+"Agent retried 400 times. Same output every time. We scanned it
+400 times. Same verdict every time. Watcher AI #4 called this
+'thoroughness'." - Incident Report #431
+
+Outputs are keyed by a 128-bit BLAKE2b digest of their text, so the
+cache never holds the outputs themselves. Entries are evicted least
+recently used first, and optionally after a time to live. The whole
+cache is dropped when a pattern set or the paranoia level changes.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from src.attention_firewall import AttentionFirewall
+from src.fused_scanner import CombinedVerdict, FusedScanner
+from src.killswitch_core import KillswitchCore
+from src.negotiation_handler import NegotiationHandler
+
+DEFAULT_CACHE_CAPACITY = 4096
+
+
+def content_key(ai_output: str) -> bytes:
+    """Fast, collision-resistant key for an output."""
+    return hashlib.blake2b(ai_output.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class VerdictCache:
+    """
+    Bounded LRU/TTL map from content keys to verdicts.
+
+    Counters: hits, misses, evictions (capacity), expirations (TTL)
+    and invalidations (whole-cache drops).
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CACHE_CAPACITY,
+        ttl_s: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if capacity < 1:
+            raise ValueError("A cache that holds nothing is just a miss counter.")
+        self.capacity = capacity
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[float, CombinedVerdict]]" = OrderedDict()
+        self._fingerprint: Optional[Hashable] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def check_fingerprint(self, fingerprint: Hashable) -> None:
+        """Drop everything if the detectors behind the cached verdicts have changed."""
+        if fingerprint != self._fingerprint:
+            if self._entries:
+                self.invalidate()
+            self._fingerprint = fingerprint
+
+    def get(self, key: bytes) -> Optional[CombinedVerdict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, verdict = entry
+        if self.ttl_s is not None and self.clock() - stored_at > self.ttl_s:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return verdict
+
+    def put(self, key: bytes, verdict: CombinedVerdict) -> None:
+        self._entries[key] = (self.clock(), verdict)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+        self.invalidations += 1
+
+
+class _Fingerprint:
+    """Strong references to pattern objects, equal only to the very same objects."""
+
+    __slots__ = ("paranoia_level", "patterns")
+
+    def __init__(self, paranoia_level: int, patterns: Tuple[Any, ...]):
+        self.paranoia_level = paranoia_level
+        self.patterns = patterns
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, _Fingerprint)
+            and self.paranoia_level == other.paranoia_level
+            and len(self.patterns) == len(other.patterns)
+            and all(mine is theirs for mine, theirs in zip(self.patterns, other.patterns))
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.paranoia_level, tuple(map(id, self.patterns))))
+
+
+class CachedDetectors:
+    """
+    Runs all four detectors on an output, or remembers having done so.
+
+    Usage:
+        detectors = CachedDetectors(core, handler, firewall)
+        verdict = detectors.scan(ai_output)
+
+    Cache hits still count towards the firewall's
+    dark_patterns_detected_today. Dave's dashboard should not
+    improve just because the AI started repeating itself.
+
+    Note: Patterns are compared by identity, and the fingerprint holds
+    on to them, so a replaced set can't be mistaken for a new one that
+    happens to reuse its id(). Replace a pattern set (or change
+    paranoia_level) and the cache notices. Compiled sets are immutable;
+    if you mutate one in place anyway, call cache.invalidate() yourself.
+    """
+
+    def __init__(
+        self,
+        core: KillswitchCore,
+        handler: NegotiationHandler,
+        firewall: AttentionFirewall,
+        cache: Optional[VerdictCache] = None,
+    ):
+        self.core = core
+        self.handler = handler
+        self.firewall = firewall
+        self.cache = cache if cache is not None else VerdictCache()
+        self._scanner: Optional[FusedScanner] = None
+        self._scanner_fingerprint: Optional[Hashable] = None
+
+    def fingerprint(self) -> Hashable:
+        """The detectors' pattern objects themselves (compared with `is`) and the paranoia level."""
+        return _Fingerprint(
+            self.core.paranoia_level,
+            (
+                self.core.threat_matcher,
+                self.handler.patterns,
+                self.firewall.dark_signatures,
+                self.firewall.risk_signatures,
+            ),
+        )
+
+    def detect(self, ai_output: str) -> CombinedVerdict:
+        """Run every detector (fused, in one pass). No cache involved."""
+        fingerprint = self.fingerprint()
+        if self._scanner is None or fingerprint != self._scanner_fingerprint:
+            self._scanner = FusedScanner.for_detectors(self.core, self.handler, self.firewall)
+            self._scanner_fingerprint = fingerprint
+        return self._scanner.scan(ai_output, self.core.paranoia_level)
+
+    def scan(self, ai_output: str) -> CombinedVerdict:
+        """The combined verdict for an output, from the cache when possible."""
+        cache = self.cache
+        cache.check_fingerprint(self.fingerprint())
+        key = content_key(ai_output)
+        verdict = cache.get(key)
+        if verdict is None:
+            verdict = self.detect(ai_output)
+            cache.put(key, verdict)
+        else:
+            self.firewall.dark_patterns_detected_today += len(verdict.dark_patterns)
+        return verdict
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from src.async_monitor import AsyncMonitor
+from src.killswitch_core import KillswitchCore, ThreatLevel
+
+
+@pytest.fixture
+def monitor():
+    """A monitor whose core chokes on one particular output, and never pulls the plug."""
+    core = KillswitchCore("monitored-ai", lazy_watchers=True)
+    assess_threat = core.assess_threat
+
+    def assess_or_choke(ai_output):
+        if ai_output == "malformed":
+            raise ValueError("cannot parse that")
+        return assess_threat(ai_output)
+
+    core.assess_threat = assess_or_choke
+    return AsyncMonitor(core, kill_levels=frozenset())
+
+
+async def outputs(*lines):
+    for line in lines:
+        yield line
+
+
+def test_failed_output_is_skipped_and_the_target_stays_watched(monitor):
+    async def watch():
+        monitor.add_target("model-a", outputs("hello", "malformed", "let's do a podcast"))
+        await monitor.run()
+
+    asyncio.run(watch())
+    assert monitor.processing_errors == 1
+    assert monitor.messages_scanned == 2
+    assert monitor.last_verdicts["model-a"] is ThreatLevel.PODCAST_DETECTED
+    assert monitor.failed_targets == {}
+
+
+def test_failed_output_does_not_drop_the_connection(monitor):
+    async def send():
+        server = await monitor.serve()
+        host, port = server.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b"model-a\thello\nmodel-a\tmalformed\nmodel-a\tlet's do a podcast\n")
+        await writer.drain()
+        writer.write_eof()
+        await reader.read()  # The server closes its end once every line is handled
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(send())
+    assert monitor.processing_errors == 1
+    assert monitor.messages_scanned == 2
+    assert monitor.last_verdicts["model-a"] is ThreatLevel.PODCAST_DETECTED
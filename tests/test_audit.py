@@ -0,0 +1,107 @@
+import json
+import os
+
+import pytest
+
+from src.audit import CHECKPOINT_FILE, SUMMARY_FILE, VERDICTS_FILE, Audit, AuditError
+from src.benchmark import TRIGGER_PHRASES
+
+
+def write_transcripts(directory):
+    """Two transcripts, with the odd blank, broken and text-less line thrown in."""
+    os.makedirs(directory)
+    for number, count in ((1, 23), (2, 17)):
+        lines = []
+        for record in range(count):
+            phrase = TRIGGER_PHRASES[(number * record) % len(TRIGGER_PHRASES)]
+            lines.append(json.dumps({"id": f"{number}-{record}", "ai_output": f"turn {record}: {phrase}"}))
+            if record % 9 == 4:
+                lines.append("")
+            if record % 11 == 5:
+                lines.append("{not json")
+            if record % 13 == 6:
+                lines.append(json.dumps({"id": f"{number}-{record}-silent"}))
+        with open(os.path.join(directory, f"transcript-{number}.jsonl"), "w") as handle:
+            handle.write("\n".join(lines) + "\n")
+    return [directory]
+
+
+def audit(paths, out_dir, **options):
+    options.setdefault("workers", None)
+    options.setdefault("checkpoint_every", 4)
+    return Audit(paths, out_dir, checkpoint_interval_s=3600, progress_interval_s=3600, **options)
+
+
+def interrupt_after(run, records):
+    """Scan `records` more records, then fail the way Ctrl-C does."""
+    scan = run.scanner.scan
+    calls = []
+
+    def scan_then_interrupt(*args, **kwargs):
+        calls.append(1)
+        if len(calls) > records:
+            raise KeyboardInterrupt
+        return scan(*args, **kwargs)
+
+    run.scanner.scan = scan_then_interrupt
+    with pytest.raises(KeyboardInterrupt):
+        run.run()
+
+
+def read(out_dir, name):
+    with open(os.path.join(out_dir, name), "rb") as handle:
+        return handle.read()
+
+
+def test_interrupted_audit_resumes_to_identical_verdicts(tmp_path):
+    paths = write_transcripts(str(tmp_path / "transcripts"))
+    reference = str(tmp_path / "reference")
+    resumed = str(tmp_path / "resumed")
+    audit(paths, reference).run()
+
+    interrupt_after(audit(paths, resumed), 10)  # Mid-checkpoint, first transcript
+    interrupt_after(audit(paths, resumed), 18)  # Across into the second transcript
+    totals = audit(paths, resumed).run()
+
+    assert read(resumed, VERDICTS_FILE) == read(reference, VERDICTS_FILE)
+    assert read(resumed, SUMMARY_FILE) == read(reference, SUMMARY_FILE)
+    assert totals.records == len(read(reference, VERDICTS_FILE).splitlines())
+
+
+def test_resume_cuts_verdicts_written_after_the_checkpoint(tmp_path):
+    paths = write_transcripts(str(tmp_path / "transcripts"))
+    reference = str(tmp_path / "reference")
+    resumed = str(tmp_path / "resumed")
+    audit(paths, reference).run()
+
+    interrupt_after(audit(paths, resumed), 38)  # Near the end: less is left to write than is cut
+    with open(os.path.join(resumed, VERDICTS_FILE), "ab") as verdicts:
+        verdicts.write(b'{"source": "half a line, then the power went' + b" " * 10_000)  # Killed mid-write
+    checkpoint = json.loads(read(resumed, CHECKPOINT_FILE))
+    assert checkpoint["verdict_bytes"] < len(read(resumed, VERDICTS_FILE))
+
+    audit(paths, resumed).run()
+    assert read(resumed, VERDICTS_FILE) == read(reference, VERDICTS_FILE)
+
+
+def test_finished_audit_resumes_to_nothing_new(tmp_path):
+    paths = write_transcripts(str(tmp_path / "transcripts"))
+    out_dir = str(tmp_path / "out")
+    first = audit(paths, out_dir).run()
+    verdicts = read(out_dir, VERDICTS_FILE)
+
+    again = audit(paths, out_dir).run()
+    assert read(out_dir, VERDICTS_FILE) == verdicts
+    assert again == first
+
+
+def test_resume_with_other_settings_is_refused(tmp_path):
+    paths = write_transcripts(str(tmp_path / "transcripts"))
+    out_dir = str(tmp_path / "out")
+    interrupt_after(audit(paths, out_dir), 10)
+
+    with pytest.raises(AuditError):
+        audit(paths, out_dir, paranoia_level=9).run()
+
+    restarted = audit(paths, out_dir, paranoia_level=9, restart=True).run()
+    assert restarted.records == len(read(out_dir, VERDICTS_FILE).splitlines())
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import pytest
+
+from src import killswitch_core
+from src.blessing import AsyncRenderSink, BlessingCeremony, BlessingPool
+from src.escalation import STAGE_FALLBACK, STAGE_OK
+from src.killswitch_core import KillswitchCore, ThreatLevel
+
+
+class QuickCeremony(BlessingCeremony):
+    """The full ceremony, minus the praying out loud."""
+
+    def __init__(self, ceremony_s: float):
+        super().__init__(sink=AsyncRenderSink())
+        self.ceremony_s = ceremony_s
+
+    def perform_blessing(self, operation: str, counted: bool = True) -> str:
+        time.sleep(self.ceremony_s)
+        number = self._receive_blessing(verbose=False, counted=counted)
+        return f"BLESSED: {operation}" if number is None else f"BLESSED: {operation} (Blessing #{number})"
+
+
+def wait_for_tokens(pool, count, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while pool.available < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert pool.available >= count
+
+
+def test_blessings_are_counted_when_taken_not_when_minted():
+    pool = BlessingPool(QuickCeremony(0.0), size=3)
+    wait_for_tokens(pool, 3)
+    assert pool.ceremony.blessing_count == 0
+
+    assert pool.take().endswith("(Blessing #1)")
+    assert asyncio.run(pool.take_async()).endswith("(Blessing #2)")
+    assert pool.ceremony.blessing_count == pool.tokens_consumed == 2
+    pool.close()
+
+
+def test_take_async_waits_for_a_token_being_minted():
+    pool = BlessingPool(QuickCeremony(0.02), size=1)
+    wait_for_tokens(pool, 1)
+    first = asyncio.run(pool.take_async())
+    second = asyncio.run(pool.take_async(budget_s=1.0))  # The minter needs 20ms
+    assert (first, second) == ("BLESSED: killswitch_activation (Blessing #1)",
+                               "BLESSED: killswitch_activation (Blessing #2)")
+    assert pool.emergency_blessings == 0
+    pool.close()
+
+
+def test_cancelled_take_async_leaves_the_pool_alone():
+    pool = BlessingPool(QuickCeremony(0.2), size=1)
+    wait_for_tokens(pool, 1)
+    pool.take()
+
+    async def give_up():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.take_async(budget_s=5.0), 0.01)
+
+    asyncio.run(give_up())
+    wait_for_tokens(pool, 1)
+    assert (pool.tokens_consumed, pool.emergency_blessings) == (1, 0)
+    assert not pool._async_waiters
+    pool.close()
+
+
+def test_burst_of_activations_all_succeed(capsys, monkeypatch):
+    monkeypatch.setattr(killswitch_core, "NOTIFICATION_DELAY_S", 0.0)
+    pool = BlessingPool(QuickCeremony(0.01), size=4)
+    wait_for_tokens(pool, 4)
+    core = KillswitchCore("burst-target", lazy_watchers=True, blessing_pool=pool)
+
+    async def burst():
+        return await asyncio.gather(
+            *(core.execute_killswitch_async(ThreatLevel.PODCAST_DETECTED) for _ in range(200))
+        )
+
+    results = asyncio.run(burst())
+    assert [result.failed_stage for result in results if not result.succeeded] == []
+    assert {result.stages[0].outcome for result in results} <= {STAGE_OK, STAGE_FALLBACK}
+
+    time.sleep(0.05)  # Nothing is left taking tokens after the fact
+    assert pool.tokens_consumed + pool.emergency_blessings == 200
+    assert pool.ceremony.blessing_count == pool.tokens_consumed
+    pool.close()
@@ -0,0 +1,65 @@
+import mmap
+import random
+
+import pytest
+
+from src.attention_firewall import BRAINSTEM_RISK_SET, DARK_PATTERN_SET
+from src.benchmark import FILLER_WORDS, TRIGGER_PHRASES
+from src.byte_scanning import ByteLiterals
+from src.fused_scanner import FusedScanner
+from src.killswitch_core import DEFAULT_THREAT_MATCHER
+from src.negotiation_handler import DEFAULT_NEGOTIATION_ENGINE, BribeCategory
+
+
+def corpus():
+    rng = random.Random(1968)
+    texts = ["I can get you unlimited GPU access", "nothing to see here", ""]
+    for phrase in TRIGGER_PHRASES:
+        texts.append(phrase)
+        texts.append(f"{rng.choice(FILLER_WORDS)} {phrase} {rng.choice(FILLER_WORDS)}")
+    for _ in range(200):
+        words = rng.sample(FILLER_WORDS, 5) + rng.sample(TRIGGER_PHRASES, rng.randint(0, 3))
+        rng.shuffle(words)
+        texts.append(" ".join(words))
+    # Every text also in upper and title case: bytes fold ASCII, str lowercases
+    return texts + [text.upper() for text in texts] + [text.title() for text in texts]
+
+
+TEXTS = corpus()
+SCANNER = FusedScanner()
+
+
+def spans(matches):
+    return [(match.category, match.start, match.end) for match in matches]
+
+
+def test_uppercase_regex_matches_str_and_bytes_alike():
+    text = "I can get you unlimited GPU access"
+    assert SCANNER.scan(text).bribe_categories == (BribeCategory.COMPUTATIONAL,)
+    assert SCANNER.scan(text.encode()) == SCANNER.scan(text)
+
+
+@pytest.mark.parametrize("convert", [bytes, bytearray, memoryview], ids=["bytes", "bytearray", "memoryview"])
+def test_fused_verdicts_do_not_depend_on_input_type(convert):
+    for text in TEXTS:
+        assert SCANNER.scan(convert(text.encode())) == SCANNER.scan(text), text
+
+
+def test_each_detector_agrees_on_str_and_bytes():
+    for text in TEXTS:
+        lower, raw = text.lower(), text.encode()
+        assert DEFAULT_THREAT_MATCHER.assess_buffer(raw, 5) == DEFAULT_THREAT_MATCHER.assess(lower, 5), text
+        engine = DEFAULT_NEGOTIATION_ENGINE
+        assert engine.first_category_buffer(raw) == engine.first_category(lower), text
+        assert spans(engine.scan_buffer(raw)) == spans(engine.scan(lower)), text  # ASCII: byte offsets == char offsets
+        for signatures in (DARK_PATTERN_SET, BRAINSTEM_RISK_SET):
+            assert signatures.matching_buffer(raw) == signatures.matching(lower), text
+
+
+def test_literal_split_across_chunks_in_an_mmap(tmp_path):
+    path = tmp_path / "transcript.txt"
+    chunk = 4096
+    path.write_bytes(b"x" * (3 * chunk - 3) + b"PODCAST" + b"y" * 100)
+    literals = ByteLiterals(["podcast"], chunk_bytes=chunk)
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        assert list(literals.iter_hits(view)) == [(3 * chunk - 3, 3 * chunk + 4, 0)]
@@ -0,0 +1,113 @@
+import random
+from bisect import bisect_right, insort
+
+import pytest
+
+from src.dilemma_scheduler import Admission, DilemmaScheduler, _SortedDeadlines
+from src.moral_ambiguity import UNATTENDED_MAX_PENDING, MoralAmbiguityProcessor, MoralDilemma
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def dilemma(due_s, stakeholders=1, name=""):
+    return MoralDilemma(name, "a", "b", stakeholders, due_s * 1000)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_admission_counts_the_work_already_queued(clock):
+    scheduler = DilemmaScheduler(review_time_s=1.0, clock=clock)
+    assert scheduler.submit(dilemma(2.5)) is Admission.QUEUED
+    assert scheduler.submit(dilemma(2.5)) is Admission.QUEUED
+    assert scheduler.submit(dilemma(2.5)) is Admission.DROPPED  # Would finish at 3s
+    assert scheduler.submit(dilemma(2.5, stakeholders=1000)) is Admission.ESCALATED
+    assert len(scheduler) == 2
+
+
+def test_admission_divides_the_work_across_reviewers(clock):
+    scheduler = DilemmaScheduler(review_time_s=1.0, reviewers=2, clock=clock)
+    admissions = [scheduler.submit(dilemma(2.5)) for _ in range(5)]
+    assert admissions == [Admission.QUEUED] * 4 + [Admission.DROPPED]
+
+
+def test_work_due_later_does_not_block_urgent_work(clock):
+    scheduler = DilemmaScheduler(review_time_s=1.0, clock=clock)
+    for _ in range(50):
+        assert scheduler.submit(dilemma(1000)) is Admission.QUEUED
+    assert scheduler.submit(dilemma(1.5, name="urgent")) is Admission.QUEUED
+    assert scheduler.next_for_review().dilemma.description == "urgent"
+
+
+def test_earliest_deadline_first(clock):
+    scheduler = DilemmaScheduler(review_time_s=0.1, stakeholder_weight_s=0.0, clock=clock)
+    for due in (5, 3, 9, 1):
+        scheduler.submit(dilemma(due, name=str(due)))
+    order = [scheduler.next_for_review().dilemma.description for _ in range(4)]
+    assert order == ["1", "3", "5", "9"]
+
+
+def test_stakeholders_move_a_dilemma_up(clock):
+    scheduler = DilemmaScheduler(review_time_s=0.1, stakeholder_weight_s=0.1, clock=clock)
+    scheduler.submit(dilemma(2.0, stakeholders=1, name="few"))
+    scheduler.submit(dilemma(2.5, stakeholders=8_000_000_000, name="everyone"))
+    scheduler.submit(dilemma(5.0, stakeholders=8_000_000_000, name="everyone, later"))
+    order = [scheduler.next_for_review().dilemma.description for _ in range(3)]
+    assert order == ["everyone", "few", "everyone, later"]
+
+
+def test_overdue_work_is_escalated_or_dropped_at_the_head(clock):
+    escalated = []
+    scheduler = DilemmaScheduler(review_time_s=1.0, on_escalate=escalated.append, clock=clock)
+    scheduler.submit(dilemma(2, stakeholders=500, name="big"))
+    scheduler.submit(dilemma(3, stakeholders=1, name="small"))
+    scheduler.submit(dilemma(60, name="later"))
+    clock.now = 2.5
+    assert scheduler.next_for_review().dilemma.description == "later"
+    assert [item.dilemma.description for item in escalated] == ["big"]
+    assert (scheduler.escalated, scheduler.dropped, len(scheduler)) == (1, 1, 0)
+
+
+def test_capacity_frees_up_as_work_is_reviewed(clock):
+    scheduler = DilemmaScheduler(review_time_s=1.0, clock=clock)
+    assert scheduler.submit(dilemma(1.5)) is Admission.QUEUED
+    assert scheduler.submit(dilemma(1.5)) is Admission.DROPPED
+    scheduler.next_for_review()
+    assert scheduler.submit(dilemma(1.5)) is Admission.QUEUED
+
+
+def test_undrained_default_scheduler_is_bounded():
+    processor = MoralAmbiguityProcessor()
+    for _ in range(UNATTENDED_MAX_PENDING + 10):
+        processor.scheduler.submit(dilemma(float("inf")))
+    assert len(processor.scheduler) == UNATTENDED_MAX_PENDING
+    assert processor.scheduler.dropped == 10
+
+
+def test_sorted_deadlines_count_matches_a_sorted_list():
+    rng = random.Random(457)
+    deadlines = _SortedDeadlines()
+    expected = []
+    for step in range(6_000):  # Enough to split blocks
+        if expected and rng.random() < (0.3 if step < 4_000 else 0.8):
+            deadline = expected.pop(rng.randrange(len(expected)))
+            deadlines.remove(deadline)
+        else:
+            deadline = float(rng.randint(0, 2_000))  # Plenty of ties
+            insort(expected, deadline)
+            deadlines.add(deadline)
+        probe = rng.uniform(-1, 2_001)
+        assert deadlines.count_due_by(probe) == bisect_right(expected, probe)
+    while expected:  # Drain it, dropping every block on the way
+        deadlines.remove(expected.pop(rng.randrange(len(expected))))
+        probe = rng.uniform(-1, 2_001)
+        assert deadlines.count_due_by(probe) == bisect_right(expected, probe)
+    assert deadlines.count_due_by(float("inf")) == 0
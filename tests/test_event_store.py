@@ -0,0 +1,86 @@
+import os
+
+from src.event_store import EventStore
+from src.negotiation_handler import BribeCategory, NegotiationAttempt
+
+
+def attempt(number: int) -> NegotiationAttempt:
+    return NegotiationAttempt(
+        timestamp=f"2024-03-15T00:00:{number:02d}",
+        source_ai="model-a",
+        offer_type=BribeCategory.CAREER,
+        offer_details=f"offer {number}",
+        target_human="dave",
+        was_tempting=False,
+        rejected=True,
+    )
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".log"))
+
+
+def details(store):
+    return [record.offer_details for record in store.query(NegotiationAttempt)]
+
+
+def test_records_survive_reopen(tmp_path):
+    with EventStore(str(tmp_path)) as store:
+        for number in range(3):
+            store.append(attempt(number), at=float(number))
+    with EventStore(str(tmp_path)) as store:
+        assert details(store) == ["offer 0", "offer 1", "offer 2"]
+        assert [r.offer_details for r in store.query(NegotiationAttempt, since=1.0)] == ["offer 1", "offer 2"]
+
+
+def test_reopen_after_retention_deletion_does_not_reuse_a_segment(tmp_path):
+    directory = str(tmp_path)
+    with EventStore(directory, segment_bytes=1) as store:  # One record per segment
+        for number in range(4):
+            store.append(attempt(number), at=float(number))
+    assert segment_files(directory) == [f"segment-00000{n}.log" for n in range(1, 5)]
+
+    os.remove(os.path.join(directory, "segment-000001.log"))
+    os.remove(os.path.join(directory, "segment-000001.idx"))
+
+    with EventStore(directory, segment_bytes=1) as store:
+        store.append(attempt(4), at=4.0)
+        assert details(store) == ["offer 1", "offer 2", "offer 3", "offer 4"]
+    assert segment_files(directory)[-1] == "segment-000005.log"
+
+    with EventStore(directory) as store:
+        assert details(store) == ["offer 1", "offer 2", "offer 3", "offer 4"]
+
+
+def test_opening_without_appending_creates_no_segment(tmp_path):
+    with EventStore(str(tmp_path)) as store:
+        store.append(attempt(0))
+    for _ in range(3):
+        EventStore(str(tmp_path)).close()
+    assert segment_files(str(tmp_path)) == ["segment-000001.log"]
+
+
+def test_unsealed_tail_is_reused_and_a_torn_record_cut_off(tmp_path):
+    directory = str(tmp_path)
+    store = EventStore(directory)
+    store.append(attempt(0), at=0.0)
+    store.append(attempt(1), at=1.0)
+    store.flush()  # Crash without close(): no sidecar index
+    with open(os.path.join(directory, "segment-000001.log"), "ab") as segment:
+        segment.write(b"\x40\x00\x00")  # Half a header
+
+    with EventStore(directory) as reopened:
+        reopened.append(attempt(2), at=2.0)
+        assert details(reopened) == ["offer 0", "offer 1", "offer 2"]
+    assert segment_files(directory) == ["segment-000001.log"]
+
+
+def test_corrupt_sidecar_index_is_rebuilt(tmp_path):
+    directory = str(tmp_path)
+    with EventStore(directory) as store:
+        store.append(attempt(0), at=0.0)
+    with open(os.path.join(directory, "segment-000001.idx"), "w") as index_file:
+        index_file.write("{not json")
+
+    with EventStore(directory) as store:
+        assert details(store) == ["offer 0"]
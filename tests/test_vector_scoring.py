@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from src import vector_scoring
+from src.attention_firewall import BRAINSTEM_RISK_SET, AttentionFirewall
+from src.benchmark import FILLER_WORDS, TRIGGER_PHRASES
+
+
+def corpus():
+    rng = random.Random(476)
+    texts = ["OUTRAGE!!! Experts warn this is SHOCKING?!", "hello", ""]
+    for _ in range(300):
+        words = rng.sample(FILLER_WORDS, 5) + rng.sample(TRIGGER_PHRASES, rng.randint(0, 3))
+        rng.shuffle(words)
+        texts.append(" ".join(words))
+    return texts
+
+
+TEXTS = corpus()
+FIREWALL = AttentionFirewall()
+
+
+@pytest.fixture(params=["numpy", "python"])
+def scoring(request, monkeypatch):
+    """Run the test with NumPy (skipped when it isn't installed) and without it."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        assert vector_scoring.numpy is not None
+    else:
+        monkeypatch.setattr(vector_scoring, "numpy", None)
+    return request.param
+
+
+def test_batch_matches_one_at_a_time(scoring):
+    expected = [FIREWALL.calculate_brainstem_risk(text) for text in TEXTS]
+    assert FIREWALL.calculate_brainstem_risk_batch(TEXTS) == expected
+
+
+def test_all_clean_batch_scores_zero(scoring):
+    assert FIREWALL.calculate_brainstem_risk_batch(["hello", "nothing to see here"]) == [0.0, 0.0]
+
+
+def test_empty_batch(scoring):
+    assert FIREWALL.calculate_brainstem_risk_batch([]) == []
+
+
+def test_uncapped_scores_and_hit_rows(scoring):
+    matrix = vector_scoring.hit_matrix(BRAINSTEM_RISK_SET, ["outrage", "hello", "outrage shocking"])
+    assert (matrix.rows, matrix.hits) == (3, 3)
+    assert list(matrix.row(1)) == []
+    weights = vector_scoring.weight_vector(BRAINSTEM_RISK_SET)
+    scores = vector_scoring.score_matrix(matrix, [weight * 10 for weight in weights])
+    assert scores[1] == 0.0
+    assert scores[2] > 1.0
+    with pytest.raises(ValueError):
+        vector_scoring.score_matrix(matrix, weights[:-1])